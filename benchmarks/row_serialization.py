@@ -0,0 +1,68 @@
+"""
+Mide el coste por fila de convertir el resultado de una consulta en valores serializables en JSON,
+con la conversión celda a celda (como hacía utils.encoding.serializable_dict) y con RowSerializer,
+que decide la conversión una única vez por columna.
+
+Uso (desde la raíz del repositorio):
+    PYTHONPATH=src python benchmarks/row_serialization.py [--rows 20000] [--columns 100]
+"""
+import time
+import base64
+import datetime
+import argparse
+from decimal import Decimal
+from collections import namedtuple
+
+from utils.encoding import RowSerializer
+
+
+def serializable_dict(row: dict) -> dict:
+    # Implementación anterior (celda a celda), como referencia
+    for k, v in row.items():
+        if isinstance(v, bytes):
+            row[k] = base64.b64encode(v).decode("utf-8")
+        elif isinstance(v, Decimal):
+            row[k] = float(v)
+        elif isinstance(v, datetime.datetime):
+            row[k] = v.isoformat()
+    return row
+
+
+def synthetic_rows(row_count: int, column_count: int) -> tuple[list[str], list[tuple]]:
+    """
+    Genera filas de una tabla ancha, con la mayoría de columnas de tipos que no necesitan conversión
+    (enteros, cadenas, nulos) y algunas que sí (decimales, fechas, binarios), las mismas que convertía serializable_dict.
+    """
+    now = datetime.datetime(2024, 1, 1, 12, 30)
+    samples = [ 1, "texto", None, 3.5, "otro texto", Decimal("10.25"), 7, now, b"\x00\x01\x02", None ]
+    columns = [ f"COLUMNA_{i:03d}" for i in range(column_count) ]
+    row = tuple(samples[i % len(samples)] for i in range(column_count))
+    Row = namedtuple("Row", columns)
+    return columns, [ Row(*row) for _ in range(row_count) ]
+
+
+def measure(label: str, convert, rows: list) -> float:
+    start = time.perf_counter()
+    convert(rows)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20}: {elapsed * 1e6 / len(rows):8.2f} µs/fila  ({elapsed:.2f} s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste por fila de la serialización de resultados")
+    parser.add_argument("--rows", type=int, default=20000, help="Número de filas")
+    parser.add_argument("--columns", type=int, default=100, help="Número de columnas")
+    args = parser.parse_args()
+
+    columns, rows = synthetic_rows(args.rows, args.columns)
+    print(f"{args.rows} filas de {args.columns} columnas\n")
+
+    before = measure("serializable_dict", lambda rows: [ serializable_dict(row._asdict()) for row in rows ], rows)
+    after = measure("RowSerializer", lambda rows: RowSerializer(columns).serialize(rows), rows)
+
+    print(f"\nMejora: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compara el tamaño del fichero y el tiempo de carga de un esquema sintético muy grande
+en formato JSON (Schema.from_json) y en formato binario (Schema.load).
+Objetivo del formato binario: ocupar al menos 3 veces menos (el tiempo de carga se muestra como referencia).
+
+Uso (desde la raíz del repositorio):
+    PYTHONPATH=src:benchmarks python benchmarks/schema_binary.py [--tables 4000] [--columns 150000] [--repeat 3]
+"""
+import os
+import gc
+import json
+import time
+import argparse
+import tempfile
+
+from dbschema.binary import FORMAT_BINARY
+from dbschema.schema import Schema
+
+from schema_memory import synthetic_schema
+
+
+def measure(label: str, file: str, load, repeat: int) -> tuple[int, float]:
+    # Se toma el mejor de varios intentos, para reducir el ruido
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        schema = load(file)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        tables = len(schema.tables)
+        del schema
+    size = os.path.getsize(file)
+    print(f"{label:<8}: {size / 1024 / 1024:8.1f} MB  {best:6.2f} s  ({tables} tablas)")
+    return size, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño y tiempo de carga del esquema en JSON frente a binario")
+    parser.add_argument("--tables", type=int, default=4000, help="Número de tablas")
+    parser.add_argument("--columns", type=int, default=150000, help="Número total de columnas")
+    parser.add_argument("--repeat", type=int, default=3, help="Número de cargas de cada fichero (se toma la más rápida)")
+    args = parser.parse_args()
+
+    print(f"Esquema sintético de {args.tables} tablas y {args.columns} columnas\n")
+    schema = Schema.model_validate({ "tables": synthetic_schema(args.tables, args.columns) })
+
+    with tempfile.TemporaryDirectory() as directory:
+        # El fichero JSON con el mismo formato que genera dbschema (el esquema dentro de "schema")
+        json_file = os.path.join(directory, "schema.json")
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump({ "schema": schema.model_dump() }, f, indent=4, ensure_ascii=False)
+        binary_file = os.path.join(directory, "schema.bin")
+        schema.save(binary_file, format=FORMAT_BINARY)
+        del schema
+
+        json_size, json_time = measure("JSON", json_file, Schema.load, args.repeat)
+        binary_size, binary_time = measure("Binario", binary_file, Schema.load, args.repeat)
+
+    print(f"\nFichero {json_size / binary_size:.1f} veces más pequeño (objetivo: 3), tiempo de carga {binary_time / json_time:.2f} veces el del JSON")
+
+
+if __name__ == "__main__":
+    main()
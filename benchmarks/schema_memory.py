@@ -0,0 +1,81 @@
+"""
+Compara la memoria que ocupa un esquema sintético muy grande con los modelos pydantic (Schema)
+y con su representación compacta (CompactSchema).
+
+Uso (desde la raíz del repositorio):
+    PYTHONPATH=src python benchmarks/schema_memory.py [--tables 4000] [--columns 150000]
+"""
+import gc
+import time
+import argparse
+import tracemalloc
+
+from dbschema.compact_schema import CompactSchema
+from dbschema.compact_table import CompactTable
+from dbschema.schema import Schema
+
+TYPES = [ "INTEGER", "BIGINT", "VARCHAR(50)", "VARCHAR(255)", "DATETIME", "DECIMAL(10, 2)", "BIT", "CHAR(1)" ]
+
+
+def synthetic_schema(table_count: int, column_count: int) -> list[dict]:
+    """
+    Genera las tablas de un esquema sintético (como diccionarios, igual que se leen del JSON).
+    """
+    columns_per_table = max(1, column_count // table_count)
+    tables = []
+    for t in range(table_count):
+        name = f"TABLA_{t:05d}"
+        columns = [
+            {
+                "name": "ID" if c == 0 else f"COLUMNA_{c:03d}",
+                "type": TYPES[(t + c) % len(TYPES)],
+                "nullable": c != 0,
+                "comment": None if c % 3 else f"Descripción de la columna {c} de {name}",
+                "default": None
+            }
+            for c in range(columns_per_table)
+        ]
+        foreign_keys = [
+            { "column": "COLUMNA_001", "reference": { "table": f"TABLA_{(t + 1) % table_count:05d}", "column": "ID" } }
+        ] if columns_per_table > 1 else []
+        tables.append({
+            "name": name,
+            "comment": f"Tabla sintética {t}",
+            "columns": columns,
+            "primary_keys": [ "ID" ],
+            "foreign_keys": foreign_keys,
+            "schemaName": None
+        })
+    return tables
+
+
+def measure(label: str, build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    schema = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<15}: {current / 1024 / 1024:8.1f} MB  ({elapsed:.2f} s, {len(schema.tables)} tablas)")
+    del schema
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de Schema frente a CompactSchema")
+    parser.add_argument("--tables", type=int, default=4000, help="Número de tablas")
+    parser.add_argument("--columns", type=int, default=150000, help="Número total de columnas")
+    args = parser.parse_args()
+
+    print(f"Esquema sintético de {args.tables} tablas y {args.columns} columnas\n")
+
+    # Los diccionarios se generan cada vez dentro de la medición y se descartan, como al cargar un fichero
+    pydantic_size = measure("Schema", lambda: Schema.model_validate({ "tables": synthetic_schema(args.tables, args.columns) }))
+    compact_size = measure("CompactSchema", lambda: CompactSchema([ CompactTable.from_dict(table) for table in synthetic_schema(args.tables, args.columns) ]))
+
+    print(f"\nReducción: {100 * (1 - compact_size / pydantic_size):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,25 @@
 import os
 import sys
+import atexit
 import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from dbanalyzer import __module_name__, __module_description__, __module_version__, logger
-from dbanalyzer.analyze import analyze_table
-
+from dbanalyzer.analyze import analyze_table, analyze_tables
+from dbanalyzer.batches import group_tables
+from dbanalyzer.context import DEFAULT_TABLE_BUDGET
+from dbanalyzer.manifest import RunManifest, MANIFEST_FILE, STATE_PENDING, STATE_DONE, STATE_FAILED
+from dbanalyzer.prefetch import DEFAULT_CONTEXT_DEPTH
+from dbanalyzer.ratelimit import RateLimiter
+from dbanalyzer.tool_cache import ToolCache, TOOL_CACHE_FILE, DEFAULT_TTL
+from utils.llm_cache import ResponseCache
+
+from dbschema.binary import save_table, FORMATS, FORMAT_JSON, EXTENSIONS
 from dbschema.database import Database
+from dbschema.query_stats import save_profile
+from dbschema.schema_changes import SchemaChanges
 
 from dbutils.dbini import DB_INIFILE, DBIni
 from dbutils.customhelp import CustomHelpFormatter
@@ -36,6 +49,22 @@ def main():
     options.add_argument('--db-url', metavar='URL', nargs='?', help='URL de conexión a la base de datos')
     options.add_argument('--db-name', metavar='DB', nargs='?', help=f"Nombre de la base de datos en el fichero {DB_INIFILE}")
     options.add_argument('--output', metavar='DIR', nargs='?', const='.', help='Directorio de salida para guardar los resultados del análisis semántico. Si no se especifica, se guardará en el directorio actual.')
+    options.add_argument('--format', choices=FORMATS, default=FORMAT_JSON, help='Formato de los ficheros con el resultado del análisis de cada tabla: json (por defecto) o binary (formato binario compacto, con extensión .bin).')
+    options.add_argument('--profile', metavar='FILE', help='Mide el tiempo de ejecución, lectura y serialización, las filas y los bytes de cada sentencia ejecutada y lo guarda en un fichero JSON al terminar.')
+    options.add_argument('--workers', metavar='N', type=int, default=1, help='Número de tablas que se analizan a la vez con --analyze-schema. Por defecto, 1.')
+    options.add_argument('--batch-size', metavar='N', type=int, default=1, help='Con --analyze-schema, analiza juntas (en una única conversación con el modelo) hasta N tablas relacionadas por claves foráneas. Por defecto, 1 (cada tabla por separado).')
+    options.add_argument('--rpm', metavar='N', type=int, help='Número máximo de peticiones por minuto a la API de OpenAI, compartido por todos los hilos. Por defecto, sin límite.')
+    options.add_argument('--tpm', metavar='N', type=int, help='Número máximo de tokens por minuto a la API de OpenAI, compartido por todos los hilos. Por defecto, sin límite.')
+    options.add_argument('--token-budget', metavar='N', type=int, default=DEFAULT_TABLE_BUDGET, help=f'Número máximo de tokens de entrada que se envían al modelo para analizar cada tabla; al agotarse, el modelo responde con la información que ya ha obtenido. Por defecto, {DEFAULT_TABLE_BUDGET}; 0 para no limitarlos.')
+    options.add_argument('--context-depth', metavar='N', type=int, default=DEFAULT_CONTEXT_DEPTH, help=f'Profundidad de las relaciones (claves foráneas en ambos sentidos) de las tablas cuyo esquema y datos de ejemplo se envían al modelo desde el principio, junto con los de la tabla analizada. Por defecto, {DEFAULT_CONTEXT_DEPTH}; 0 para enviar sólo los de la propia tabla.')
+    options.add_argument('--cache-ttl', metavar='SECONDS', type=int, default=DEFAULT_TTL, help=f'Tiempo de vida (en segundos) de los esquemas y datos de las tablas que consulta el modelo, que se reutilizan entre las tablas analizadas. Por defecto, {DEFAULT_TTL}; 0 para no reutilizarlos.')
+    options.add_argument('--save-cache', action='store_true', help=f'Guarda los esquemas y datos de las tablas que consulta el modelo en el directorio de salida ({TOOL_CACHE_FILE}), para reutilizarlos en las siguientes ejecuciones mientras no caduquen. Ojo: el fichero contiene filas de datos reales de las tablas.')
+    options.add_argument('--no-llm-cache', action='store_true', help='No reutiliza las respuestas del modelo guardadas en la caché (~/.dbtools/cache/llm) para peticiones idénticas, ni guarda las nuevas.')
+    options.add_argument('--refresh', action='store_true', help='Ignora el esquema guardado en la caché y lo vuelve a generar a partir de la base de datos.')
+    options.add_argument('--resume', action='store_true', help=f'Con --analyze-schema, reanuda el análisis anterior guardado en el directorio de salida ({MANIFEST_FILE}): no vuelve a analizar las tablas ya analizadas.')
+    options.add_argument('--retry-failed', action='store_true', help='Con --analyze-schema, sólo vuelve a analizar las tablas cuyo análisis anterior falló.')
+    options.add_argument('--rerun-stale', action='store_true', help='Con --analyze-schema, vuelve a analizar las tablas cuyo esquema ha cambiado desde su análisis anterior.')
+    options.add_argument('--changes', metavar='FILE', help='Fichero JSON con los cambios generado por `dbschema --incremental --changes`. Sólo se analizarán (de nuevo) las tablas añadidas o modificadas.')
 
     # Parsea los argumentos
     args = parser.parse_args()
@@ -60,13 +89,17 @@ def main():
         # Si no se ha especificado una URL de conexión a la base de datos, intenta obtenerla de las variables de entorno
         try:
             db_url = args.db_url or DBIni.load().get_url(args.db_name)
+            pool_options = DBIni.load().get_pool_options(args.db_name) if not args.db_url else None
         except Exception as e:
             logger.error(f"No se ha podido obtener la URL de conexión a la base de datos", e)
             sys.exit(1)
 
         # Conecta a la base de datos
         try:
-            database = Database(db_url)
+            database = Database(db_url, workers=args.workers, pool_options=pool_options)
+            if args.profile:
+                # Las estadísticas se activan antes de conectar, para medir también las consultas al catálogo
+                atexit.register(save_profile, database.enable_stats(), args.profile)
             database.connect()
             logger.info(f"👍 Conectado a la base de datos '{database.server}\\{database.name}'")
         except Exception as e:
@@ -81,6 +114,22 @@ def main():
             logger.warning(f"⚠️ El directorio de salida '{output_dir}' no existe. Creando el directorio...")
             os.makedirs(output_dir, exist_ok=True)
 
+    # Caché de los resultados de las funciones que invoca el modelo (se guarda en el directorio de salida sólo con
+    # --save-cache, porque contiene muestras de los datos de las tablas)
+    cache = None
+    if args.cache_ttl > 0:
+        cache_file = os.path.join(output_dir, TOOL_CACHE_FILE) if output_dir and args.save_cache else None
+        cache = ToolCache(args.cache_ttl, cache_file) if args.refresh else ToolCache.load(args.cache_ttl, cache_file)
+
+    # Caché de las respuestas del modelo (si no cambia nada, las tablas se analizan sin llamar a la API)
+    llm_cache = ResponseCache() if not args.no_llm_cache else None
+
+    # Presupuesto de tokens de cada tabla (sin límite si es 0)
+    token_budget = args.token_budget or None
+
+    # Limitador de peticiones y tokens por minuto a la API, compartido por todos los hilos
+    limiter = RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+
     # Analizar una tabla específica
     if args.analyze_table:
 
@@ -89,9 +138,15 @@ def main():
             logger.error("No se ha especificado una base de datos. Por favor, utiliza --db-url o --db-name para conectarte a una base de datos.")
             sys.exit(1)
 
+        # Usa el esquema de la caché (si es válido) para no tener que reflejar las tablas consultadas
+        if not args.refresh:
+            database.get_cached_schema()
+
         # Análisis semántico de la tabla especificada
         table_name = args.analyze_table
-        table_name = analyze_table(apikey, database, table_name)
+        table_name = analyze_table(apikey, database, table_name, cache, limiter, llm_cache, token_budget, args.context_depth)
+        if cache is not None:
+            cache.save()
 
         # Verifica si se ha obtenido una tabla válida
         if not table_name:
@@ -102,9 +157,9 @@ def main():
         table_name.print()
 
         # Si se ha especificado un directorio de salida, guarda el resultado en un archivo JSON        
-        json_file = os.path.join(output_dir, f"{table_name}.json") if output_dir else None
+        json_file = os.path.join(output_dir, f"{table_name}{EXTENSIONS[args.format]}") if output_dir else None
         if json_file and os.path.exists(json_file):
-            table_name.save(json_file)
+            save_table(table_name, json_file, args.format)
             logger.info(f"📒 Resultado del análisis semántico de {table_name} guardado en {json_file}")
 
     # Analizar el esquema de la base de datos
@@ -115,10 +170,19 @@ def main():
             logger.error("No se ha especificado una base de datos. Por favor, utiliza --db-url o --db-name para conectarte a una base de datos.")
             sys.exit(1)
 
-        # Recupera el esquema de la base de datos
+        # Recupera el esquema de la base de datos (de la caché si el catálogo no ha cambiado)
         prefix = args.analyze_schema or None
+        database.get_schema(prefix=prefix, refresh=args.refresh)
         table_names = database.list_tables(filter=prefix)
 
+        # Si se indican los cambios del esquema, sólo se analizan las tablas añadidas o modificadas
+        changed_tables = set()
+        if args.changes:
+            changed_tables = set(SchemaChanges.load(args.changes).changed)
+            table_names = [ table_name for table_name in table_names if table_name in changed_tables ]
+            if cache is not None:
+                cache.invalidate(changed_tables)
+
         logger.info(f"🔍 Iniciando análisis semántico de {len(table_names)} tablas con prefijo '{prefix}'...")
         logger.info(f"📋 Tablas a analizar: {'Todas' if not prefix else table_names if table_names else 'Ninguna'}")
 
@@ -129,46 +193,172 @@ def main():
             "errors": []
         }
 
-        # Recorre las tablas y realiza el análisis semántico de todas ellas
-        for table_name in table_names:
-            logger.info(f"\n🔍 Analizando la tabla '{table_name}'...")
-
-            try:
+        # Estado del análisis de cada tabla, que se guarda en el directorio de salida tras cada cambio (para poder reanudarlo)
+        manifest = RunManifest.load(os.path.join(output_dir, MANIFEST_FILE)) if output_dir else RunManifest()
+        if not output_dir and (args.resume or args.retry_failed or args.rerun_stale):
+            logger.warning("⚠️ Las opciones --resume, --retry-failed y --rerun-stale necesitan un directorio de salida (--output).")
+        manifest.add(table_names)
+        fingerprints = { table_name: RunManifest.fingerprint(database.get_table(table_name)) for table_name in table_names }
+
+        # Cada hilo usa su propia conexión a la base de datos (del mismo pool), que no se puede compartir entre hilos
+        lock = threading.Lock()
+        local = threading.local()
+        workers = []
+
+        def worker_database() -> Database:
+            if args.workers == 1:
+                return database
+            if not hasattr(local, "database"):
+                local.database = database.clone()
+                with lock:
+                    workers.append(local.database)
+            return local.database
+
+        def output_file(table_name: str) -> str | None:
+            return os.path.join(output_dir, f"{table_name}{EXTENSIONS[args.format]}") if output_dir else None
+
+        def pending(table_name: str) -> bool:
+            state = manifest.state(table_name)
+            # Con --retry-failed, sólo las tablas que fallaron
+            if args.retry_failed:
+                if state == STATE_FAILED:
+                    return True
+                stats["skipped_tables"] += 1
+                return False
+
+            # Con --rerun-stale, las tablas cuyo esquema ha cambiado se vuelven a analizar
+            if args.rerun_stale and manifest.is_stale(table_name, fingerprints[table_name]):
+                logger.info(f"🔄 El esquema de la tabla '{table_name}' ha cambiado desde su análisis.")
+                return True
+
+            # Con --resume, no se repiten las tablas ya analizadas
+            if args.resume and state == STATE_DONE:
+                stats["skipped_tables"] += 1
+                return False
+
+            # Verifica si el archivo JSON ya existe
+            json_file = output_file(table_name)
+            if json_file and os.path.exists(json_file) and table_name not in changed_tables:
+                logger.warning(f"⚠️ El archivo JSON '{json_file}' ya existe.")
+                stats["skipped_tables"] += 1
+                return False
+            return True
+
+        def save(table_name: str, analyzed_table: any):
+            logger.info(f"✅ Análisis de la tabla '{table_name}' completado.")
+            with lock:
+                stats["analyzed_tables"] += 1
 
-                # Verifica si el archivo JSON ya existe
-                json_file = os.path.join(output_dir, f"{table_name}.json") if output_dir else None
-                if json_file and os.path.exists(json_file):
-                    logger.warning(f"⚠️ El archivo JSON '{json_file}' ya existe.")
-                    stats["skipped_tables"] += 1
-                    continue
+            # Si hay un directorio de salida, guarda el resultado en un archivo JSON (de forma atómica)
+            json_file = output_file(table_name)
+            if json_file:
+                save_table(analyzed_table, json_file, args.format)
+                logger.info(f"📒 Resultado del análisis semántico de {table_name} guardado en {json_file}")
 
-                # Realiza el análisis semántico de la tabla
-                analyzed_table = analyze_table(apikey, database, table_name)                
-                logger.info(f"✅ Análisis de la tabla '{table_name}' completado.")
-                stats["analyzed_tables"] += 1
-                
-                # Si hay un directorio de salida, guarda el resultado en un archivo JSON
-                if json_file:
-                    analyzed_table.save(json_file)
-                    logger.info(f"📒 Resultado del análisis semántico de {table_name} guardado en {json_file}")
-                
-                # Sino, imprime el resultado del análisis semántico en la consola
-                else:
+            # Sino, imprime el resultado del análisis semántico en la consola
+            else:
+                with lock:
                     analyzed_table.print()
 
-            except Exception as e:
-
-                logger.error(f"❌ No se pudo analizar la tabla '{table_name}': {e}")
+        def failed(table_name: str, e: Exception):
+            logger.error(f"❌ No se pudo analizar la tabla '{table_name}': {e}")
+            with lock:
                 stats["errors"] += [{
                     "table": table_name,
                     "error": str(e)
                 }]
 
+        def analyze(table_name: str):
+            logger.info(f"\n🔍 Analizando la tabla '{table_name}'...")
+
+            manifest.start(table_name)
+            usage = {}
+            started = time.time()
+            try:
+
+                # Realiza el análisis semántico de la tabla
+                analyzed_table = analyze_table(apikey, worker_database(), table_name, cache, limiter, llm_cache, token_budget, args.context_depth, usage)
+                if cache is not None:
+                    cache.save()
+                save(table_name, analyzed_table)
+                manifest.finish(table_name, fingerprints.get(table_name), latency=time.time() - started, **usage)
+
+            except Exception as e:
+
+                failed(table_name, e)
+                manifest.fail(table_name, str(e), latency=time.time() - started, **usage)
+
+        def analyze_batch(batch: list[str]):
+            if len(batch) == 1:
+                analyze(batch[0])
+                return
+            logger.info(f"\n🔍 Analizando las tablas {', '.join(batch)}...")
+
+            for table_name in batch:
+                manifest.start(table_name)
+            usage = {}
+            started = time.time()
+            try:
+
+                # Realiza el análisis semántico de las tablas del lote en una única conversación
+                analyzed_tables = analyze_tables(apikey, worker_database(), batch, cache, limiter, llm_cache, token_budget, usage)
+                if cache is not None:
+                    cache.save()
+
+            except Exception as e:
+
+                for table_name in batch:
+                    failed(table_name, e)
+                    manifest.fail(table_name, str(e), latency=time.time() - started)
+                return
+
+            # Los tokens y el tiempo del lote se reparten entre sus tablas
+            share = { key: value // len(batch) for key, value in usage.items() }
+            latency = (time.time() - started) / len(batch)
+            for analyzed_table in analyzed_tables:
+                try:
+                    save(analyzed_table.name, analyzed_table)
+                    manifest.finish(analyzed_table.name, fingerprints.get(analyzed_table.name), latency=latency, **share)
+                except Exception as e:
+                    failed(analyzed_table.name, e)
+                    manifest.fail(analyzed_table.name, str(e), latency=latency, **share)
+
+            # Las tablas que no ha devuelto el modelo se analizan por separado
+            analyzed = { analyzed_table.name for analyzed_table in analyzed_tables }
+            for table_name in batch:
+                if table_name not in analyzed:
+                    analyze(table_name)
+
+        # Analiza las tablas, varias a la vez si se indica --workers, y en lotes de tablas relacionadas si se indica --batch-size
+        table_names = [ table_name for table_name in table_names if pending(table_name) ]
+        if args.workers > 1:
+            logger.info(f"🧵 Analizando {args.workers} tablas a la vez")
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            if args.batch_size > 1:
+                batches = group_tables(database, table_names, args.batch_size)
+                logger.info(f"📦 Analizando {len(table_names)} tablas en {len(batches)} lotes de hasta {args.batch_size} tablas relacionadas")
+                list(executor.map(analyze_batch, batches))
+            else:
+                list(executor.map(analyze, table_names))
+        for worker in workers:
+            worker.close()
+
         logger.info(f"\n🔍 Análisis semántico de la base de datos '{database.name}' completado:")
         logger.info(f"- Total de tablas analizadas: {stats['total_tables']}")
         logger.info(f"- Tablas analizadas correctamente: {stats['analyzed_tables']}")
         logger.info(f"- Tablas omitidas: {stats['skipped_tables']}")
         logger.info(f"- Errores encontrados: {len(stats['errors'])}")
+        if cache is not None:
+            logger.info(f"- Consultas de funciones reutilizadas de la caché: {cache.hits} de {cache.hits + cache.misses}")
+        if llm_cache is not None:
+            logger.info(f"- Respuestas del modelo reutilizadas de la caché: {llm_cache.hits} de {llm_cache.hits + llm_cache.misses}")
+        if limiter.waited > 0:
+            logger.info(f"- Tiempo de espera por los límites de la API: {limiter.waited:.2f} segundos")
+        totals = manifest.totals()
+        logger.info(f"- Estado de las tablas: {totals[STATE_DONE]} analizadas, {totals[STATE_FAILED]} fallidas, {totals[STATE_PENDING]} pendientes")
+        logger.info(f"- Tokens usados (en total): {totals['input_tokens']} de entrada y {totals['output_tokens']} de salida, en {totals['latency']:.2f} segundos")
+        if manifest.file:
+            logger.info(f"- Estado del análisis guardado en {manifest.file} (--resume para reanudarlo, --retry-failed para reintentar las tablas fallidas)")
 
         if stats["errors"]:
             logger.info("\n🔴 Errores encontrados durante el análisis:")
@@ -2,26 +2,45 @@ import sys
 import json
 import time
 from openai import OpenAI, RateLimitError
+from openai.types.responses import ParsedResponse
+from pydantic import BaseModel
 
 from dbschema.database import Database
 from dbschema.table import Table
 
+from dbanalyzer.context import ContextCompactor, DEFAULT_CONTEXT_TOKENS, DEFAULT_OUTPUT_TOKENS, DEFAULT_TABLE_BUDGET
 from dbanalyzer.functions import tools, call_function
+from dbanalyzer.prefetch import build_context_pack, prefetch_tables, format_tables, DEFAULT_CONTEXT_DEPTH
+from dbanalyzer.ratelimit import RateLimiter
+from dbanalyzer.tool_cache import ToolCache
+from utils.llm_cache import ResponseCache
 
-def analyze_table(apikey: str, database: Database, table_name: str) -> Table:
-    print(f"🔍 Iniciando análisis semántico de la tabla '{table_name}'...")
+# Número máximo de intentos de cada petición cuando se excede el límite de la API
+MAX_TRIES = 5
+# Espera por defecto si la API no indica cuánto esperar (en segundos)
+DEFAULT_RETRY_AFTER = 60
+# Modelo con el que se analizan las tablas
+MODEL = "gpt-4.1-mini"
 
-    client = OpenAI(api_key=apikey)
-    model = "gpt-4.1-mini"
-    temperature = 0.15 if model.startswith("gpt") else None
 
-    with open("src/dbanalyzer/prompt.md", "r", encoding="utf-8") as file:
-        instructions = file.read()
+class TableList(BaseModel):
+    """
+    Respuesta del análisis de un lote de tablas: el esquema comentado de cada una.
+    """
+    tables: list[Table]
+
+
+def analyze_table(apikey: str, database: Database, table_name: str, cache: ToolCache = None, limiter: RateLimiter = None, llm_cache: ResponseCache = None, token_budget: int = DEFAULT_TABLE_BUDGET, context_depth: int = DEFAULT_CONTEXT_DEPTH, usage: dict = None) -> Table:
+    print(f"🔍 Iniciando análisis semántico de la tabla '{table_name}'...")
+
+    # Esquemas y muestras de la tabla y de sus tablas relacionadas, para ahorrar las llamadas a funciones del modelo
+    # (recortados como los resultados de las funciones)
+    context = build_context_pack(database, table_name, context_depth, cache, DEFAULT_OUTPUT_TOKENS, MODEL)
 
     input_messages = [
         {
             "role": "developer", 
-            "content": instructions
+            "content": __instructions__()
         },
         {
             "role": "user", 
@@ -34,34 +53,166 @@ def analyze_table(apikey: str, database: Database, table_name: str) -> Table:
                 relacionadas. Aprovecha los comentarios que ya tengan tablas y columnas del esquema, mejorándolos. 
                 Recuerda que puedes obtener el esquema y  datos de cualquier tabla relacionada para ayudarte a 
                 interpretar los campos de '{table_name}'. Antes de pedir datos de una tabla relacionada, comprueba
-                si existe en la base de datos, y puedes usar las funciones para esto.
+                si existe en la base de datos, y puedes usar las funciones para esto. A continuación tienes el esquema
+                y una muestra de los datos de la tabla y de sus tablas relacionadas, así que no necesitas pedirlos.
+
+                {context}
             """
         },
     ]
 
+    response = __converse__(apikey, database, input_messages, Table, table_name, cache, limiter, llm_cache, token_budget, usage=usage)
+    if response is None:
+        return None
+
+    # Cuando ya no hay tool calls, procesa la respuesta final
+    try:        
+        # Coge sólo la última respuesta
+        print("✅ Análisis semántico completado con éxito.")
+        table = response.output_parsed
+        table.schemaName = database.name
+    except json.JSONDecodeError as e:
+        print(f"❌ Error al procesar la respuesta del modelo: {e}", file=sys.stderr)
+        print("🤖 La respuesta del modelo no es un JSON válido:")
+        print(response.output_text)
+        raise e
+    
+    return table
+
+
+def analyze_tables(apikey: str, database: Database, table_names: list[str], cache: ToolCache = None, limiter: RateLimiter = None, llm_cache: ResponseCache = None, token_budget: int = DEFAULT_TABLE_BUDGET, usage: dict = None) -> list[Table]:
+    """
+    Analiza un lote de tablas (p.ej. relacionadas por claves foráneas) en una única conversación con el modelo:
+    el esquema reducido y una muestra de datos de cada tabla se envían desde el principio, así que el modelo sólo
+    tiene que pedir con funciones la información de otras tablas relacionadas.
+    :param apikey: Clave de la API de OpenAI.
+    :param database: Base de datos.
+    :param table_names: Nombres de las tablas a analizar.
+    :param cache: Caché de los resultados de las funciones.
+    :param limiter: Limitador de peticiones y tokens por minuto.
+    :param llm_cache: Caché de las respuestas del modelo.
+    :param token_budget: Número máximo de tokens de entrada de la conversación (por cada tabla del lote).
+    :param usage: Diccionario en el que se acumulan los tokens de entrada y salida usados (opcional).
+    :return: Esquemas comentados de las tablas analizadas (puede faltar alguna, si el modelo no la devuelve).
+    """
+    print(f"🔍 Iniciando análisis semántico de {len(table_names)} tablas: {', '.join(table_names)}...")
+
+    # Esquemas y muestras de las tablas del lote (con las mismas funciones que usa el modelo, y su caché, y recortados igual)
+    context = format_tables(prefetch_tables(database, table_names, cache), max_tokens=DEFAULT_OUTPUT_TOKENS, model=MODEL)
+
+    input_messages = [
+        {
+            "role": "developer", 
+            "content": __instructions__()
+        },
+        {
+            "role": "user", 
+            "content": f"""
+                Haz un análisis semántico de las tablas {', '.join(f"'{table_name}'" for table_name in table_names)} y 
+                proporciona el esquema comentado de cada una de ellas (todas, con el mismo nombre), en una lista.
+                Añade ejemplos significativos de datos a los comentarios de cada campo, si es posible,
+                y en caso de que sean referencias a otras tablas, muestra algún campo relevante de la otra tabla,
+                el valor de algún campo descriptivo. A continuación tienes el esquema y una muestra de los datos de
+                cada tabla, así que no necesitas pedirlos. Si necesitas información de otras tablas relacionadas, 
+                puedes ir encadenando llamadas a funciones. Aprovecha los comentarios que ya tengan tablas y columnas 
+                del esquema, mejorándolos.
+
+                {context}
+            """
+        },
+    ]
+
+    response = __converse__(apikey, database, input_messages, TableList, ", ".join(table_names), cache, limiter, llm_cache, token_budget, len(table_names), usage)
+    if response is None or response.output_parsed is None:
+        return []
+
+    # Sólo las tablas del lote (sin distinguir mayúsculas), con el nombre original
+    names = { table_name.lower(): table_name for table_name in table_names }
+    tables = []
+    for table in response.output_parsed.tables:
+        table_name = names.pop(table.name.lower(), None)
+        if table_name is None:
+            continue
+        table.name = table_name
+        table.schemaName = database.name
+        tables.append(table)
+    if names:
+        print(f"⚠️ El modelo no ha devuelto el análisis de las tablas: {', '.join(names.values())}", file=sys.stderr)
+    print(f"✅ Análisis semántico de {len(tables)} de {len(table_names)} tablas completado con éxito.")
+    return tables
+
+
+def __instructions__() -> str:
+    with open("src/dbanalyzer/prompt.md", "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def __converse__(apikey: str, database: Database, input_messages: list, text_format: type[BaseModel], label: str,
+                 cache: ToolCache, limiter: RateLimiter, llm_cache: ResponseCache, token_budget: int, tables: int = 1, usage: dict = None) -> ParsedResponse | None:
+    # Conversación con el modelo: se ejecutan las funciones que pida hasta que devuelva la respuesta final.
+    # El tamaño del contexto y el presupuesto de tokens son proporcionales al número de tablas analizadas.
+    # Los tokens usados (sin contar las respuestas de la caché) se acumulan en usage
+    client = OpenAI(api_key=apikey)
+    model = MODEL
+    temperature = 0.15 if model.startswith("gpt") else None
+
+    # Mantiene acotado el contexto (resultados de las funciones) y los tokens enviados para el análisis
+    compactor = ContextCompactor(model, tools, context_tokens=DEFAULT_CONTEXT_TOKENS * tables, budget=token_budget * tables if token_budget else None)
+
     response = None
     tries = 0
     while True:
 
         try:
             tries += 1
-            print(f"➡️ Enviando mensaje al modelo... (intento {tries} de 3)")
-            response = client.responses.parse(
-                model=model,
-                input=input_messages,
-                tools=tools,
-                tool_choice="auto",  # o "required" si quieres forzar tools
-                text_format=Table,
-                temperature=temperature,
-            )
+            input_tokens = compactor.compact(input_messages)
+            # Si se agota el presupuesto, el modelo debe responder con la información que ya tiene
+            over_budget = compactor.over_budget(input_tokens)
+            if over_budget:
+                print(f"⚠️ Se ha agotado el presupuesto de tokens de '{label}' ({compactor.spent} de {compactor.budget}). Se pide la respuesta final al modelo.")
+            request = {
+                "model": model,
+                "input": input_messages,
+                "tools": tools,
+                "tool_choice": "none" if over_budget else "auto",  # o "required" si quieres forzar tools
+                "text_format": text_format,
+                "temperature": temperature,
+            }
+
+            # Si la misma petición (instrucciones, mensajes y resultados de las funciones) ya se hizo, se reutiliza la respuesta
+            key = ResponseCache.key(**request) if llm_cache is not None else None
+            response = llm_cache.get(key, ParsedResponse[text_format]) if llm_cache is not None else None
+            if response is not None:
+                print(f"♻️ Respuesta del modelo recuperada de la caché")
+                # Se cuentan igual que en la petición original, para que las decisiones del presupuesto (y las claves
+                # de las peticiones siguientes) sean las mismas al reutilizar la caché
+                compactor.record(response.usage.input_tokens if response.usage is not None else input_tokens)
+            else:
+                print(f"➡️ Enviando mensaje al modelo... (intento {tries} de {MAX_TRIES})")
+                if limiter is not None:
+                    # Espera su turno según los límites de peticiones y tokens por minuto compartidos con el resto de hilos
+                    limiter.acquire(input_tokens)
+                response = client.responses.parse(**request)
+                compactor.record(response.usage.input_tokens if response.usage is not None else input_tokens)
+                if limiter is not None and response.usage is not None:
+                    limiter.record(response.usage.total_tokens - input_tokens)
+                if usage is not None and response.usage is not None:
+                    usage["input_tokens"] = usage.get("input_tokens", 0) + response.usage.input_tokens
+                    usage["output_tokens"] = usage.get("output_tokens", 0) + response.usage.output_tokens
+                if llm_cache is not None:
+                    llm_cache.put(key, response)
             tries = 0 # Reinicia el contador de intentos si la llamada fue exitosa
         except RateLimitError as e:
-            print(f"⚠️ Se ha excedido el límite de tokens por minuto. Esperando 1 minuto para reintentar... ({e})", file=sys.stderr)
-            if tries < 3:                
-                time.sleep(60)  # Espera 1 minuto antes de reintentar
-                continue  # Si hay un error de límite de tasa, simplemente continuamos y esperamos a que se resuelva
+            retry_after = __retry_after__(e)
+            print(f"⚠️ Se ha excedido el límite de la API. Esperando {retry_after:.0f} segundos para reintentar... ({e})", file=sys.stderr)
+            if tries < MAX_TRIES:
+                if limiter is not None:
+                    limiter.pause(retry_after)  # Detiene también las peticiones del resto de hilos
+                else:
+                    time.sleep(retry_after)
+                continue
             else:
-                print("❌ No se ha podido completar el análisis semántico tras 3 intentos. Abortando.", file=sys.stderr)
+                print(f"❌ No se ha podido completar el análisis semántico tras {MAX_TRIES} intentos. Abortando.", file=sys.stderr)
                 break
         except Exception as e:
             print(f"❌ Error al enviar el mensaje al modelo: {e}", file=sys.stderr)
@@ -78,26 +229,22 @@ def analyze_table(apikey: str, database: Database, table_name: str) -> Table:
         for tool_call in tool_calls:
             name = tool_call.name
             args = json.loads(tool_call.arguments)
-            result = call_function(name, database, args)
+            result = call_function(name, database, args, cache)
             print(f"\t✅ Llamada a función {name} con argumentos {args} completada con éxito.")
-            # Añade el resultado como function_call_output
-            input_messages.append(tool_call)
-            input_messages.append({
-                "type": "function_call_output",
-                "call_id": tool_call.call_id,
-                "output": str(result),
-            })
+            # Añade el resultado como function_call_output (recortado si es muy largo)
+            compactor.add_output(input_messages, tool_call, result)
 
-    # Cuando ya no hay tool calls, procesa la respuesta final
-    try:        
-        # Coge sólo la última respuesta
-        print("✅ Análisis semántico completado con éxito.")
-        table = response.output_parsed
-        table.schemaName = database.name
-    except json.JSONDecodeError as e:
-        print(f"❌ Error al procesar la respuesta del modelo: {e}", file=sys.stderr)
-        print("🤖 La respuesta del modelo no es un JSON válido:")
-        print(response.output_text)
-        raise e
-    
-    return table
+    return response
+
+
+def __retry_after__(error: RateLimitError) -> float:
+    # Segundos que indica la API que hay que esperar (cabeceras retry-after-ms o retry-after)
+    headers = error.response.headers if getattr(error, "response", None) is not None else {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return DEFAULT_RETRY_AFTER
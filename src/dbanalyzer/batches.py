@@ -0,0 +1,50 @@
+from networkx import Graph, bfs_tree, connected_components
+
+from dbschema.database import Database
+
+# Número máximo de tablas por defecto de cada lote
+DEFAULT_BATCH_SIZE = 8
+
+
+def group_tables(database: Database, table_names: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> list[list[str]]:
+    """
+    Agrupa las tablas en lotes para analizarlas juntas, según las claves foráneas que las relacionan: las tablas de cada
+    componente conexo del grafo de claves foráneas van en el mismo lote (si el componente es más grande que el lote,
+    se divide recorriéndolo en anchura, para que las tablas relacionadas queden juntas), y las tablas sueltas o
+    los componentes pequeños se reúnen hasta completar los lotes.
+    :param database: Base de datos (con el esquema cargado).
+    :param table_names: Nombres de las tablas a agrupar.
+    :param batch_size: Número máximo de tablas de cada lote.
+    :return: Lotes de nombres de tablas.
+    """
+    graph = Graph()
+    graph.add_nodes_from(table_names)
+    names = { name.lower(): name for name in table_names }
+    for name in table_names:
+        table = database.get_table(name)
+        if table is None:
+            continue
+        for fk in table.foreign_keys:
+            # Sólo las relaciones entre tablas a analizar
+            reference = names.get(fk.reference.table.lower())
+            if reference is not None and reference != name:
+                graph.add_edge(name, reference)
+
+    # Componentes conexos, de mayor a menor (y por nombre, para que los lotes sean siempre los mismos)
+    components = sorted(connected_components(graph), key=lambda component: (-len(component), min(component)))
+    batches = []
+    pending = []
+    for component in components:
+        if len(component) > batch_size:
+            # Se recorre desde la tabla más relacionada, para que cada lote tenga tablas relacionadas entre sí
+            root = max(sorted(component), key=graph.degree)
+            ordered = list(bfs_tree(graph, root, sort_neighbors=sorted))
+            batches.extend(ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size))
+            continue
+        if len(pending) + len(component) > batch_size:
+            batches.append(pending)
+            pending = []
+        pending.extend(sorted(component))
+    if pending:
+        batches.append(pending)
+    return batches
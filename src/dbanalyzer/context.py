@@ -0,0 +1,142 @@
+from dbanalyzer.tokens import count_tokens, get_encoding
+
+# Número máximo de tokens del resultado de cada llamada a una función
+DEFAULT_OUTPUT_TOKENS = 2000
+# Número máximo de tokens del contexto que se envía en cada petición (a partir de ahí se compactan los resultados antiguos)
+DEFAULT_CONTEXT_TOKENS = 16000
+# Número máximo de tokens de entrada que se pueden enviar en total para analizar una tabla
+DEFAULT_TABLE_BUDGET = 100000
+# Longitud máxima de los valores de texto de los datos de ejemplo
+MAX_VALUE_LENGTH = 80
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Recorta un texto a un número máximo de tokens, indicando cuántos se han omitido.
+    :param text: Texto a recortar.
+    :param max_tokens: Número máximo de tokens.
+    :param model: Nombre del modelo (para contar los tokens con su codificación).
+    :return: Texto recortado (o el mismo texto, si no supera el máximo).
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        # Sin codificación, se estima en unos 4 caracteres por token
+        if len(text) <= max_tokens * 4:
+            return text
+        return f"{text[:max_tokens * 4]}… [recortado: ~{(len(text) - max_tokens * 4) // 4} tokens omitidos]"
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return f"{encoding.decode(tokens[:max_tokens])}… [recortado: {len(tokens) - max_tokens} tokens omitidos]"
+
+
+def compact_rows(rows: list[dict], max_value_length: int = MAX_VALUE_LENGTH) -> dict:
+    """
+    Representación compacta de unas filas: los nombres de las columnas una única vez (no en cada fila)
+    y los valores de texto largos recortados.
+    :param rows: Filas (diccionarios columna -> valor).
+    :param max_value_length: Longitud máxima de los valores de texto.
+    :return: Diccionario con las columnas y las filas (listas de valores).
+    """
+    columns = list(rows[0].keys()) if rows else []
+    return {
+        "columns": columns,
+        "rows": [
+            [ __shorten__(row.get(column), max_value_length) for column in columns ]
+            for row in rows
+        ]
+    }
+
+
+def __shorten__(value: any, max_length: int) -> any:
+    if isinstance(value, str) and len(value) > max_length:
+        return value[:max_length] + "…"
+    return value
+
+
+class ContextCompactor:
+    """
+    Mantiene acotado el contexto de la conversación del análisis de una tabla, que crece con cada llamada a una función:
+    - Recorta el resultado de cada función a un número máximo de tokens.
+    - Cuando el contexto supera su tamaño máximo, sustituye los resultados más antiguos por una breve referencia
+      (el modelo ya los ha tenido en cuenta), empezando por los más antiguos y sin tocar los de la última ronda.
+    - Lleva la cuenta de los tokens enviados para analizar la tabla; cuando se agota el presupuesto, el modelo
+      debe responder con la información que ya tiene (sin más llamadas a funciones).
+    """
+
+    def __init__(self, model: str, tools: list = None, output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+                 context_tokens: int = DEFAULT_CONTEXT_TOKENS, budget: int = DEFAULT_TABLE_BUDGET):
+        """
+        :param model: Nombre del modelo.
+        :param tools: Definición de las funciones que puede invocar el modelo (cuentan en el contexto).
+        :param output_tokens: Número máximo de tokens del resultado de cada función.
+        :param context_tokens: Número máximo de tokens del contexto de cada petición.
+        :param budget: Número máximo de tokens de entrada enviados en total para la tabla.
+        """
+        self.model = model
+        self.tools = tools
+        self.output_tokens = output_tokens
+        self.context_tokens = context_tokens
+        self.budget = budget
+        self.spent = 0
+        self.__round_start__ = 0
+        self.__round_end__ = 0
+        self.__compacted__ = set()
+
+    def add_output(self, messages: list, tool_call: any, result: str):
+        """
+        Añade a la conversación una llamada a una función y su resultado (recortado).
+        :param messages: Mensajes de la conversación.
+        :param tool_call: Llamada a la función del modelo.
+        :param result: Resultado de la función.
+        """
+        messages.append(tool_call)
+        messages.append({
+            "type": "function_call_output",
+            "call_id": tool_call.call_id,
+            "output": truncate_tokens(str(result), self.output_tokens, self.model),
+        })
+
+    def compact(self, messages: list) -> int:
+        """
+        Compacta la conversación si supera el tamaño máximo del contexto.
+        :param messages: Mensajes de la conversación (se modifican).
+        :return: Número de tokens de la conversación compactada.
+        """
+        # Una nueva ronda empieza con los mensajes añadidos desde la petición anterior (en los reintentos no cambia)
+        if len(messages) > self.__round_end__:
+            self.__round_start__, self.__round_end__ = self.__round_end__, len(messages)
+        round_start = self.__round_start__
+        tokens = count_tokens(messages, self.model, self.tools)
+        if tokens <= self.context_tokens:
+            return tokens
+        calls = { getattr(message, "call_id", None): message for message in messages if not isinstance(message, dict) }
+        for i, message in enumerate(messages):
+            if tokens <= self.context_tokens:
+                break
+            # Los resultados de la última ronda de llamadas (añadidos desde la petición anterior) no se compactan
+            if i >= round_start:
+                break
+            if not isinstance(message, dict) or message.get("type") != "function_call_output" or i in self.__compacted__:
+                continue
+            call = calls.get(message["call_id"])
+            messages[i] = {
+                "type": "function_call_output",
+                "call_id": message["call_id"],
+                "output": f"[Resultado de {getattr(call, 'name', 'la función')}({getattr(call, 'arguments', '')}) omitido para reducir el contexto: ya se ha tenido en cuenta]",
+            }
+            self.__compacted__.add(i)
+            tokens = count_tokens(messages, self.model, self.tools)
+        return tokens
+
+    def over_budget(self, tokens: int) -> bool:
+        """
+        Indica si enviar una petición con este número de tokens agotaría el presupuesto de la tabla.
+        """
+        return self.budget is not None and self.spent + tokens > self.budget
+
+    def record(self, tokens: int):
+        """
+        Registra los tokens de entrada de una petición enviada.
+        """
+        self.spent += tokens
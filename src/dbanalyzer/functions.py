@@ -3,10 +3,12 @@ import inspect
 import json
 from typing import get_type_hints
 
-from sqlalchemy import text
 from dbschema.database import Database
 from dbschema.table import Table
 
+from dbanalyzer.context import compact_rows
+from dbanalyzer.tool_cache import ToolCache
+
 tools = [
     #{
     #    "type": "function",
@@ -72,7 +74,21 @@ tools = [
     },
 ]
 
-def call_function(fn_name, database, args):
+# Funciones cuyos resultados se pueden reutilizar (sólo dependen de sus argumentos)
+CACHED_FUNCTIONS = [ "list_tables", "get_table_schema", "get_table_data" ]
+
+def call_function(fn_name, database, args, cache: ToolCache = None):
+    if cache is not None and fn_name in CACHED_FUNCTIONS:
+        result = cache.get(fn_name, args)
+        if result is not None:
+            print(f"♻️ Resultado de la función '{fn_name}' con los argumentos {args} recuperado de la caché")
+            return result
+        result = __call_function__(fn_name, database, args)
+        cache.put(fn_name, args, result)
+        return result
+    return __call_function__(fn_name, database, args)
+
+def __call_function__(fn_name, database, args):
     print(f"⚙️ Invocando la función '{fn_name}' con los argumentos: {args}")
     if fn_name == "table_exists":
         return table_exists(database, **args)
@@ -80,10 +96,11 @@ def call_function(fn_name, database, args):
         return json.dumps(list_tables(database))
     if fn_name == "get_table_schema":
         table = get_table_schema(database, **args)
-        return table.model_dump_json(exclude_none=True) if table else None
+        # Representación reducida del esquema (tipos y claves), mucho más breve que el modelo completo
+        return json.dumps(table.reduce(comments=True), ensure_ascii=False) if table else None
     if fn_name == "get_table_data":
         data = get_table_data(database, **args)
-        return json.dumps(data) if data else None
+        return json.dumps(compact_rows(data), ensure_ascii=False, default=str) if data else None
 
 def table_exists(database: Database, name: str) -> bool:
     """
@@ -129,25 +146,11 @@ def get_table_data(database: Database, table_name: str, limit: int = 10) -> list
     """
     try:
         print(f"🗒️ Obteniendo datos de la tabla '{table_name}' con un límite de {limit} filas...")
-        table = database.get_table(table_name)  # Verifica si la tabla existe
         total = database.count_rows(table_name)
         if total == 0:
             print(f"⚠️ La tabla '{table_name}' está vacía. No se obtendrán datos.")
             return []
-        if limit > total:
-            stmt = text(f"SELECT * FROM {table_name}")
-        else:
-            columns_list = [ f"{col.name}" for col in table.columns ] if table else []
-            columns_str = (", " + ", ".join(columns_list)) if columns_list else ""        
-            stmt = text(
-                f"""
-                SELECT TOP {limit} *
-                FROM {table_name}
-                WHERE 0.10 >= CAST(CHECKSUM(NEWID(){columns_str}) & 0x7fffffff AS float) / CAST (0x7fffffff AS int)
-                ORDER BY NEWID()
-                """
-            )
-        data = database.execute(stmt)
+        data = database.sample(table_name, limit)
         print(f"✅ Datos obtenidos de la tabla '{table_name}': {len(data)} filas.")
         return data;
     except Exception as e:
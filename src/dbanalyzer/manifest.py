@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from dbschema.table import Table
+from utils.files import atomic_open
+
+# Nombre del fichero en el que se guarda el estado del análisis, en el directorio de salida
+MANIFEST_FILE = ".dbanalyzer-manifest.json"
+
+# Estados de las tablas
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+
+class RunManifest:
+    """
+    Estado persistente del análisis de un esquema (--analyze-schema), que se guarda en el directorio de salida tras cada
+    cambio: para cada tabla, su estado (pending, running, done o failed), el número de intentos, los tokens usados,
+    el tiempo del análisis, el último error y la huella de su esquema cuando se analizó.
+    Así, si el análisis se interrumpe, se puede reanudar sin repetir las tablas ya analizadas, reintentar sólo las que
+    fallaron o volver a analizar las que han cambiado desde entonces.
+    """
+
+    def __init__(self, file: str = None):
+        """
+        :param file: Fichero en el que se guarda el estado (None para no guardarlo).
+        """
+        self.file = file
+        self.tables = {}
+        self.__lock__ = threading.Lock()
+
+    @classmethod
+    def load(cls, file: str = None) -> "RunManifest":
+        """
+        Carga el estado del análisis guardado en el fichero (si existe). Las tablas que estaban en curso (el análisis
+        se interrumpió) se marcan como pendientes.
+        :param file: Fichero en el que se guarda el estado.
+        :return: Estado del análisis.
+        """
+        manifest = cls(file)
+        if file and os.path.exists(file):
+            try:
+                with open(file, "r", encoding="utf-8") as f:
+                    manifest.tables = json.load(f).get("tables", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ No se ha podido cargar el estado del análisis '{file}': {e}")
+            for entry in manifest.tables.values():
+                if entry["state"] == STATE_RUNNING:
+                    entry["state"] = STATE_PENDING
+        return manifest
+
+    @staticmethod
+    def fingerprint(table: Table) -> str | None:
+        """
+        Calcula la huella del esquema de una tabla (columnas, tipos y claves), que cambia cuando cambia su estructura.
+        :param table: Tabla.
+        :return: Huella del esquema de la tabla, o None si no se conoce la tabla.
+        """
+        if table is None:
+            return None
+        data = json.dumps(table.reduce(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+    def state(self, table_name: str) -> str | None:
+        """
+        Estado de una tabla, o None si no está en el estado del análisis.
+        """
+        entry = self.tables.get(table_name)
+        return entry["state"] if entry is not None else None
+
+    def is_stale(self, table_name: str, fingerprint: str) -> bool:
+        """
+        Indica si una tabla analizada ha cambiado desde entonces (su huella es distinta).
+        """
+        entry = self.tables.get(table_name)
+        return entry is not None and entry["state"] == STATE_DONE and fingerprint is not None and entry.get("fingerprint") != fingerprint
+
+    def add(self, table_names: list[str]):
+        """
+        Añade las tablas que aún no están en el estado del análisis, como pendientes.
+        :param table_names: Nombres de las tablas.
+        """
+        with self.__lock__:
+            for table_name in table_names:
+                self.tables.setdefault(table_name, {
+                    "state": STATE_PENDING,
+                    "attempts": 0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "latency": 0.0,
+                    "error": None,
+                    "fingerprint": None,
+                    "updated": time.time(),
+                })
+        self.save()
+
+    def start(self, table_name: str):
+        """
+        Marca una tabla como en curso, con un intento más.
+        """
+        self.__update__(table_name, STATE_RUNNING, attempts=1)
+
+    def finish(self, table_name: str, fingerprint: str = None, input_tokens: int = 0, output_tokens: int = 0, latency: float = 0.0):
+        """
+        Marca una tabla como analizada.
+        :param table_name: Nombre de la tabla.
+        :param fingerprint: Huella del esquema de la tabla analizada.
+        :param input_tokens: Tokens de entrada usados en el análisis.
+        :param output_tokens: Tokens de salida usados en el análisis.
+        :param latency: Tiempo del análisis (en segundos).
+        """
+        self.__update__(table_name, STATE_DONE, fingerprint=fingerprint, error=None, input_tokens=input_tokens, output_tokens=output_tokens, latency=latency)
+
+    def fail(self, table_name: str, error: str, input_tokens: int = 0, output_tokens: int = 0, latency: float = 0.0):
+        """
+        Marca una tabla como fallida.
+        :param table_name: Nombre de la tabla.
+        :param error: Mensaje del error.
+        :param input_tokens: Tokens de entrada usados en el intento.
+        :param output_tokens: Tokens de salida usados en el intento.
+        :param latency: Tiempo del intento (en segundos).
+        """
+        self.__update__(table_name, STATE_FAILED, error=error, input_tokens=input_tokens, output_tokens=output_tokens, latency=latency)
+
+    def totals(self) -> dict:
+        """
+        Totales del análisis: número de tablas en cada estado, intentos, tokens y tiempo.
+        """
+        with self.__lock__:
+            entries = list(self.tables.values())
+        totals = { state: 0 for state in (STATE_PENDING, STATE_RUNNING, STATE_DONE, STATE_FAILED) }
+        for entry in entries:
+            totals[entry["state"]] += 1
+        for key in ("attempts", "input_tokens", "output_tokens", "latency"):
+            totals[key] = sum(entry[key] for entry in entries)
+        return totals
+
+    def save(self):
+        """
+        Guarda el estado del análisis en su fichero (si tiene), sustituyéndolo de forma atómica.
+        """
+        if not self.file:
+            return
+        with self.__lock__:
+            data = json.dumps({ "tables": self.tables }, indent=4, ensure_ascii=False)
+            with atomic_open(self.file, "w", encoding="utf-8") as f:
+                f.write(data)
+
+    def __update__(self, table_name: str, state: str, attempts: int = 0, input_tokens: int = 0, output_tokens: int = 0, latency: float = 0.0, **values):
+        # Los intentos, tokens y tiempos se acumulan entre intentos (y ejecuciones)
+        with self.__lock__:
+            entry = self.tables[table_name]
+            entry["state"] = state
+            entry["attempts"] += attempts
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["latency"] = round(entry["latency"] + latency, 3)
+            entry.update(values)
+            entry["updated"] = time.time()
+        self.save()
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from dbschema.database import Database
+
+from dbanalyzer.context import truncate_tokens, DEFAULT_OUTPUT_TOKENS
+from dbanalyzer.functions import call_function
+from dbanalyzer.tool_cache import ToolCache
+
+# Profundidad por defecto de las relaciones que se incluyen en el contexto inicial (1: sólo las tablas directamente relacionadas)
+DEFAULT_CONTEXT_DEPTH = 1
+# Número máximo de tablas relacionadas en el contexto inicial
+MAX_RELATED_TABLES = 8
+
+
+def related_tables(database: Database, table_name: str, depth: int = DEFAULT_CONTEXT_DEPTH, max_tables: int = MAX_RELATED_TABLES) -> list[str]:
+    """
+    Recupera las tablas relacionadas con una tabla hasta una profundidad: las tablas a las que hace referencia con sus
+    claves foráneas y las que la referencian (éstas, sólo si hay un esquema cargado), recorridas en anchura.
+    :param database: Base de datos.
+    :param table_name: Nombre de la tabla.
+    :param depth: Profundidad máxima de las relaciones.
+    :param max_tables: Número máximo de tablas relacionadas (las más cercanas).
+    :return: Nombres de las tablas relacionadas (sin la propia tabla).
+    """
+    visited = { table_name.lower() }
+    related = []
+    level = [ table_name ]
+    for _ in range(depth):
+        next_level = []
+        for name in level:
+            table = database.get_table(name)
+            references = [ fk.reference.table for fk in table.foreign_keys ] if table is not None else []
+            for related_name in references + database.get_referencing_tables(name):
+                if related_name.lower() in visited or not database.table_exists(related_name):
+                    continue
+                visited.add(related_name.lower())
+                next_level.append(related_name)
+        related.extend(next_level)
+        if len(related) >= max_tables or not next_level:
+            break
+        level = next_level
+    return related[:max_tables]
+
+
+def prefetch_tables(database: Database, table_names: list[str], cache: ToolCache = None) -> dict[str, tuple[str, str]]:
+    """
+    Recupera el esquema reducido y una muestra de datos de varias tablas (los mismos resultados que las funciones
+    get_table_schema y get_table_data, con su caché), en paralelo si la base de datos tiene varios workers.
+    :param database: Base de datos.
+    :param table_names: Nombres de las tablas.
+    :param cache: Caché de los resultados de las funciones.
+    :return: Diccionario con el esquema y los datos de cada tabla.
+    """
+    def fetch(db: Database, table_name: str) -> tuple[str, str]:
+        schema = call_function("get_table_schema", db, { "name": table_name }, cache)
+        data = call_function("get_table_data", db, { "table_name": table_name }, cache)
+        return schema, data
+
+    def fetch_clone(table_name: str) -> tuple[str, str]:
+        # Cada hilo usa su propia conexión del pool
+        with database.clone() as db:
+            return fetch(db, table_name)
+
+    # Las copias (p.ej. de los hilos de --analyze-schema) ya se ejecutan en paralelo: no se piden más conexiones al pool
+    if database.workers == 1 or database.parent is not None or len(table_names) <= 1:
+        return { table_name: fetch(database, table_name) for table_name in table_names }
+    with ThreadPoolExecutor(max_workers=database.workers) as executor:
+        return dict(zip(table_names, executor.map(fetch_clone, table_names)))
+
+
+def build_context_pack(database: Database, table_name: str, depth: int = DEFAULT_CONTEXT_DEPTH, cache: ToolCache = None,
+                       max_tokens: int = DEFAULT_OUTPUT_TOKENS, model: str = None) -> str:
+    """
+    Construye el contexto inicial del análisis de una tabla: el esquema reducido y una muestra de datos de la tabla
+    y de sus tablas relacionadas, para que el modelo no tenga que pedirlos con llamadas a funciones.
+    :param database: Base de datos.
+    :param table_name: Nombre de la tabla a analizar.
+    :param depth: Profundidad de las relaciones incluidas (0: sólo la propia tabla).
+    :param cache: Caché de los resultados de las funciones.
+    :param max_tokens: Número máximo de tokens del esquema y de los datos de cada tabla.
+    :param model: Nombre del modelo (para contar los tokens con su codificación).
+    :return: Texto con el esquema y los datos de cada tabla.
+    """
+    related = related_tables(database, table_name, depth) if depth > 0 else []
+    return format_tables(prefetch_tables(database, [ table_name ] + related, cache), { table_name }, max_tokens, model)
+
+
+def format_tables(tables: dict[str, tuple[str, str]], targets: set[str] = None, max_tokens: int = DEFAULT_OUTPUT_TOKENS, model: str = None) -> str:
+    """
+    Da formato al esquema y los datos de varias tablas para incluirlos en un mensaje al modelo, recortando cada uno
+    igual que los resultados de las funciones.
+    :param tables: Esquema y datos de cada tabla.
+    :param targets: Tablas a analizar (el resto se indican como relacionadas).
+    :param max_tokens: Número máximo de tokens del esquema y de los datos de cada tabla.
+    :param model: Nombre del modelo (para contar los tokens con su codificación).
+    :return: Texto con el esquema y los datos de cada tabla.
+    """
+    sections = []
+    for table_name, (schema, data) in tables.items():
+        title = table_name if targets is None or table_name in targets else f"{table_name} (relacionada)"
+        schema = truncate_tokens(schema, max_tokens, model) if schema else schema
+        data = truncate_tokens(data, max_tokens, model) if data else 'la tabla está vacía'
+        sections.append(f"### {title}\n\nEsquema: {schema}\n\nDatos de ejemplo: {data}")
+    return "\n\n".join(sections)
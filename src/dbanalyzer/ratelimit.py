@@ -0,0 +1,91 @@
+import time
+import threading
+from collections import deque
+
+# Ventana de tiempo de los límites de la API (en segundos)
+WINDOW = 60.0
+
+
+class RateLimiter:
+    """
+    Limitador de peticiones y tokens por minuto compartido por todos los hilos que llaman a la API.
+    Antes de cada petición se reserva su número estimado de tokens; si con ella se superaría alguno de los límites
+    en el último minuto, se espera lo justo para no superarlo. Cuando la API devuelve un error de límite excedido,
+    se detienen todas las peticiones durante el tiempo que indica la API (retry-after), en lugar de una espera fija.
+    """
+
+    def __init__(self, requests_per_minute: int = None, tokens_per_minute: int = None):
+        """
+        :param requests_per_minute: Número máximo de peticiones por minuto (None para no limitarlas).
+        :param tokens_per_minute: Número máximo de tokens por minuto (None para no limitarlos).
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.waited = 0.0
+        self.__events__ = deque()     # (instante, peticiones, tokens)
+        self.__tokens__ = 0
+        self.__requests__ = 0
+        self.__paused_until__ = 0.0
+        self.__lock__ = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Espera hasta que se pueda hacer una petición con el número de tokens indicado y la registra.
+        :param tokens: Número estimado de tokens de la petición.
+        :return: Segundos de espera.
+        """
+        waited = 0.0
+        while True:
+            with self.__lock__:
+                now = time.monotonic()
+                wait = self.__wait__(now, tokens)
+                if wait <= 0:
+                    self.__register__(now, 1, tokens)
+                    self.waited += waited
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def record(self, tokens: int):
+        """
+        Registra tokens consumidos por una petición ya hecha (p.ej. la diferencia entre los tokens reales y los estimados).
+        :param tokens: Número de tokens (puede ser negativo, si se estimaron de más).
+        """
+        with self.__lock__:
+            self.__register__(time.monotonic(), 0, tokens)
+
+    def pause(self, seconds: float):
+        """
+        Detiene todas las peticiones durante un tiempo (p.ej. el retry-after de un error de límite excedido).
+        :param seconds: Segundos de pausa.
+        """
+        with self.__lock__:
+            self.__paused_until__ = max(self.__paused_until__, time.monotonic() + seconds)
+
+    def __wait__(self, now: float, tokens: int) -> float:
+        # Descarta las peticiones de fuera de la ventana y calcula cuánto falta para que quepa la nueva
+        while self.__events__ and now - self.__events__[0][0] >= WINDOW:
+            _, requests, used = self.__events__.popleft()
+            self.__requests__ -= requests
+            self.__tokens__ -= used
+        wait = self.__paused_until__ - now
+        if self.requests_per_minute and self.__requests__ >= self.requests_per_minute:
+            wait = max(wait, self.__expires__(now, lambda requests, used: requests, self.__requests__ - self.requests_per_minute + 1))
+        # Una petición con más tokens que el límite sólo se hace con la ventana vacía (si no, no se haría nunca)
+        if self.tokens_per_minute and self.__tokens__ > 0 and self.__tokens__ + tokens > self.tokens_per_minute:
+            wait = max(wait, self.__expires__(now, lambda requests, used: used, self.__tokens__ + tokens - self.tokens_per_minute))
+        return wait
+
+    def __expires__(self, now: float, amount, excess: int) -> float:
+        # Tiempo hasta que salgan de la ventana las peticiones necesarias para liberar el exceso
+        released = 0
+        for instant, requests, used in self.__events__:
+            released += amount(requests, used)
+            if released >= excess:
+                return instant + WINDOW - now
+        return self.__events__[-1][0] + WINDOW - now if self.__events__ else 0.0
+
+    def __register__(self, now: float, requests: int, tokens: int):
+        self.__events__.append((now, requests, tokens))
+        self.__requests__ += requests
+        self.__tokens__ += tokens
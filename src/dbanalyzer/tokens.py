@@ -0,0 +1,53 @@
+import json
+from functools import lru_cache
+
+import tiktoken
+
+# Codificación por defecto para los modelos que tiktoken no conoce
+DEFAULT_ENCODING = "o200k_base"
+# Tokens adicionales de cada mensaje (rol, separadores...)
+TOKENS_PER_MESSAGE = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding | None:
+    """
+    Devuelve la codificación de tiktoken de un modelo (o la codificación por defecto si no la conoce).
+    :param model: Nombre del modelo.
+    :return: Codificación, o None si no se ha podido cargar (p.ej. sin acceso a la red para descargarla).
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        return None
+
+
+def count_tokens(messages: list, model: str, tools: list = None) -> int:
+    """
+    Estima el número de tokens de entrada de una petición a la API.
+    :param messages: Mensajes de la petición (diccionarios o llamadas a funciones del modelo).
+    :param model: Nombre del modelo.
+    :param tools: Definición de las funciones que puede invocar el modelo.
+    :return: Número estimado de tokens.
+    """
+    texts = [ __message_text__(message) for message in messages ]
+    if tools:
+        texts.append(json.dumps(tools, ensure_ascii=False))
+    encoding = get_encoding(model)
+    if encoding is None:
+        # Sin codificación, se estima en unos 4 caracteres por token
+        return sum(len(text) // 4 + TOKENS_PER_MESSAGE for text in texts)
+    return sum(len(encoding.encode(text, disallowed_special=())) + TOKENS_PER_MESSAGE for text in texts)
+
+
+def __message_text__(message: any) -> str:
+    if isinstance(message, dict):
+        return str(message.get("content") or message.get("output") or "")
+    # Llamadas a funciones del modelo (ResponseFunctionToolCall)
+    return f"{getattr(message, 'name', '')}{getattr(message, 'arguments', '')}"
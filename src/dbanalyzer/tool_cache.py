@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import threading
+
+from utils.files import atomic_open
+
+# Nombre del fichero en el que se guarda la caché, en el directorio de salida del análisis
+TOOL_CACHE_FILE = ".dbanalyzer-cache.json"
+# Tiempo de vida por defecto de los resultados (en segundos)
+DEFAULT_TTL = 3600
+
+
+class ToolCache:
+    """
+    Caché de los resultados de las funciones que invoca el modelo durante el análisis (list_tables, get_table_schema
+    y get_table_data), por función y argumentos (el nombre de la tabla), con un tiempo de vida.
+    Así, el esquema y los datos de una tabla relacionada se leen de la base de datos una única vez por ejecución,
+    aunque el modelo los pida en la conversación de varias tablas. Opcionalmente se guarda en un fichero, para
+    reutilizarla en las siguientes ejecuciones mientras no caduque.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, file: str = None):
+        """
+        :param ttl: Tiempo de vida de los resultados (en segundos).
+        :param file: Fichero en el que se guarda la caché (None para no guardarla).
+        """
+        self.ttl = ttl
+        self.file = file
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.__lock__ = threading.Lock()
+
+    @classmethod
+    def load(cls, ttl: float = DEFAULT_TTL, file: str = None) -> "ToolCache":
+        """
+        Crea la caché, con los resultados guardados en el fichero que no hayan caducado. Si el fichero no se puede
+        leer o alguna entrada no es válida, se ignora todo el fichero.
+        :param ttl: Tiempo de vida de los resultados (en segundos).
+        :param file: Fichero en el que se guarda la caché.
+        :return: Caché de los resultados de las funciones.
+        """
+        cache = cls(ttl, file)
+        if file and os.path.exists(file):
+            try:
+                with open(file, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                ToolCache.__validate__(entries)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ No se ha podido cargar la caché de las funciones '{file}': {e}")
+                entries = {}
+            now = time.time()
+            cache.entries = { key: entry for key, entry in entries.items() if now - entry["time"] < ttl }
+        return cache
+
+    def get(self, fn_name: str, args: dict) -> str | None:
+        """
+        Recupera el resultado de una función, si está en la caché y no ha caducado.
+        :param fn_name: Nombre de la función.
+        :param args: Argumentos de la función.
+        :return: Resultado de la función, o None si no está en la caché.
+        """
+        key = ToolCache.__key__(fn_name, args)
+        with self.__lock__:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry["time"] >= self.ttl:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["result"]
+
+    def put(self, fn_name: str, args: dict, result: str):
+        """
+        Guarda el resultado de una función en la caché (los resultados vacíos no se guardan).
+        :param fn_name: Nombre de la función.
+        :param args: Argumentos de la función.
+        :param result: Resultado de la función.
+        """
+        if result is None:
+            return
+        with self.__lock__:
+            self.entries[ToolCache.__key__(fn_name, args)] = { "time": time.time(), "result": result }
+
+    def invalidate(self, table_names: list[str]):
+        """
+        Elimina de la caché los resultados de unas tablas (p.ej. las modificadas) y la lista de tablas.
+        :param table_names: Nombres de las tablas.
+        """
+        table_names = set(table_names)
+        with self.__lock__:
+            for key in list(self.entries):
+                fn_name, args = key.split(":", 1)
+                if fn_name == "list_tables" or table_names.intersection(json.loads(args).values()):
+                    del self.entries[key]
+
+    def save(self):
+        """
+        Guarda la caché en su fichero (si tiene), sustituyéndolo de forma atómica.
+        """
+        if not self.file:
+            return
+        with self.__lock__:
+            entries = dict(self.entries)
+        with atomic_open(self.file, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+
+    @staticmethod
+    def __validate__(entries: any):
+        # Cada entrada debe tener el momento en que se guardó y el resultado de la función
+        if not isinstance(entries, dict):
+            raise ValueError("el contenido no es un diccionario de entradas")
+        for key, entry in entries.items():
+            if not isinstance(entry, dict) or not isinstance(entry.get("time"), (int, float)) or not isinstance(entry.get("result"), str):
+                raise ValueError(f"la entrada '{key}' no es válida")
+
+    @staticmethod
+    def __key__(fn_name: str, args: dict) -> str:
+        return f"{fn_name}:{json.dumps(args, sort_keys=True, ensure_ascii=False)}"
@@ -13,19 +13,22 @@ def find_missing_relationships(schema):
     """
     missing_relationships = []
 
-    # Crear un diccionario de claves primarias por tabla
-    primary_keys = {table.name: table.primary_keys for table in schema.tables}
+    # Crear un diccionario con las tablas de cada columna de clave primaria
+    primary_keys = {}
+    for table in schema.tables:
+        for pk_column in table.primary_keys:
+            primary_keys.setdefault(pk_column, []).append(table.name)
 
     # Iterar sobre las tablas para buscar columnas que podrían ser claves foráneas
     for table in schema.tables:
         for column in table.columns:
             # Ignorar columnas que ya son claves foráneas
-            if any(fk.column == column.name for fk in table.foreign_keys):
+            if table.get_foreign_keys(column.name):
                 continue
 
             # Buscar si el nombre de la columna coincide con una clave primaria de otra tabla
-            for target_table, pk_columns in primary_keys.items():
-                if column.name in pk_columns and table.name != target_table:
+            for target_table in primary_keys.get(column.name, []):
+                if table.name != target_table:
                     missing_relationships.append((table.name, column.name, target_table))
 
     return missing_relationships
@@ -33,7 +36,7 @@ def find_missing_relationships(schema):
 
 def main():
     # Cargar el esquema de la base de datos desde un archivo JSON
-    schema = Schema.from_json("schemas/pec.json")
+    schema = Schema.load("schemas/pec.json")
 
     # Crea un grafo dirigido
     graph = DiGraph()
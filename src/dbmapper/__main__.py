@@ -7,7 +7,7 @@ from tabulate import tabulate
 from dbmapper import __module_name__, __module_description__, __module_version__
 from dbmapper.mapper import Mapper
 
-from dbschema.schema import Schema
+from dbschema.compact_schema import CompactSchema
 
 from dbutils.customhelp import CustomHelpFormatter
 
@@ -45,8 +45,8 @@ def main():
     print(f"- Esquema destino : {args.dst_schema}")
 
     mapper = Mapper(
-        src_schema=Schema.from_json(args.src_schema),
-        dst_schema=Schema.from_json(args.dst_schema)
+        src_schema=CompactSchema.load(args.src_schema),
+        dst_schema=CompactSchema.load(args.dst_schema)
     )
     map = mapper.match(threshold=args.threshold)
 
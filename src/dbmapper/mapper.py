@@ -5,16 +5,17 @@ from dbmapper.matcher import Matcher
 from dbmapper.score import Score
 
 from dbschema.column import Column
+from dbschema.compact_schema import CompactSchema
 from dbschema.schema import Schema
 from dbschema.table import Table
 
 
 class Mapper:
 
-    src_schema: Schema
-    dst_schema: Schema
+    src_schema: Schema | CompactSchema
+    dst_schema: Schema | CompactSchema
 
-    def __init__(self, src_schema: Schema, dst_schema: Schema):
+    def __init__(self, src_schema: Schema | CompactSchema, dst_schema: Schema | CompactSchema):
         self.src_schema = src_schema
         self.dst_schema = dst_schema
 
@@ -31,6 +31,7 @@ def main():
     options.add_argument('--db-url', metavar='URL', nargs='?', help='URL de conexión a la base de datos')
     options.add_argument('--db-name', metavar='DB', nargs='?', help=f"Nombre de la base de datos en el fichero {DB_INIFILE}")
     options.add_argument('--output', metavar='DIR', nargs='?', const='.', help='Directorio de salida para los ficheros generados. Por defecto, el directorio actual.')
+    options.add_argument('--refresh', action='store_true', help='Ignora la estructura guardada en la caché y la vuelve a cargar de la base de datos.')
 
     # Parsea los argumentos
     args = parser.parse_args()
@@ -45,6 +46,7 @@ def main():
         # Si no se ha especificado una URL de conexión a la base de datos, intenta obtenerla de las variables de entorno
         try:
             db_url = args.db_url or DBIni.load().get_url(args.db_name)
+            pool_options = DBIni.load().get_pool_options(args.db_name) if not args.db_url else None
         except Exception as e:
             logger.error(f"No se ha podido obtener la URL de conexión a la base de datos", e)
             sys.exit(1)
@@ -55,6 +57,6 @@ def main():
         prefix = args.gen_classes or ''
         try:
             print(f"Generando las clases ORM en el directorio '{output}'...")
-            generate_orm_code(db_url, prefix, output)
+            generate_orm_code(db_url, prefix, output, refresh=args.refresh, pool_options=pool_options)
         except ValueError as e:
             logger.error(f"Error: {e}")
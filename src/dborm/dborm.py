@@ -1,13 +1,13 @@
 from sqlacodegen.generators import DeclarativeGenerator
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import MetaData
 
 from dbschema.database import Database
 
-def generate_orm_code(dburl, prefix, output_dir='.'):
+def generate_orm_code(dburl, prefix, output_dir='.', refresh=False, pool_options=None):
 
     print(f"Generando las clases ORM en el directorio '{output_dir}'...")
 
-    database = Database(dburl)
+    database = Database(dburl, pool_options=pool_options)
     database.connect()
 
     print(database)
@@ -16,10 +16,17 @@ def generate_orm_code(dburl, prefix, output_dir='.'):
     table_names = database.list_tables(filter=prefix)
     print("📋 Tablas a incluir: ✅", table_names or "Todas")
 
-    # Cargar la estructura de la base de datos existente
-    print("🔄 Cargando la estructura de la base de datos...")
-    metadata = MetaData()
-    metadata.reflect(bind=database.engine, only=table_names)
+    # Cargar la estructura de la base de datos existente (de la caché si el catálogo no ha cambiado)
+    fingerprint = database.fingerprint()
+    metadata = database.cache.load_metadata(dburl, prefix, fingerprint) if not refresh else None
+    if metadata is not None:
+        print("🗃️ Estructura de la base de datos recuperada de la caché")
+    else:
+        print("🔄 Cargando la estructura de la base de datos...")
+        metadata = MetaData()
+        metadata.reflect(bind=database.engine, only=table_names)
+        if fingerprint is not None:
+            database.cache.save_metadata(dburl, prefix, fingerprint, metadata)
 
     # Generar el código ORM
     print("🛠️ Generando el código ORM...")
@@ -28,5 +35,6 @@ def generate_orm_code(dburl, prefix, output_dir='.'):
 
     with open(f"{output_dir}/{prefix}models.py", "w", encoding="utf-8") as f:
         f.write(generator.generate())
+    database.close()
 
     print(f"✅ Clases ORM generadas correctamente en '{output_dir}/{prefix}models.py'")
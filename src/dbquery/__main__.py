@@ -1,16 +1,20 @@
+import os
 import sys
-import json
+import atexit
+import time
 import argparse
 
-from tabulate import tabulate
-
 from sqlalchemy import text
 from dbquery import __module_name__, __module_description__, __module_version__
+from dbquery.batch import BatchRunner, load_queries
+from dbquery.export import EXPORTERS, FORMATS, FORMAT_JSON, FORMAT_COLUMNAR, TableExporter, open_output
 from dbquery.natlang import generate_query
 from dbschema.database import Database
+from dbschema.query_stats import save_profile
 from dbutils.config import Config
 from dbutils.customhelp import CustomHelpFormatter
 from dbutils.dbini import DB_INIFILE, DBIni
+from utils.llm_cache import ResponseCache
 
 def db_connect(args):
     database = None
@@ -18,13 +22,17 @@ def db_connect(args):
         try:
             # Si no se ha especificado una URL de conexión a la base de datos, intenta obtenerla de las variables de entorno
             db_url = args.db_url or DBIni.load().get_url(args.db_name)
+            pool_options = DBIni.load().get_pool_options(args.db_name) if not args.db_url else None
         except Exception as e:
             print(f"No se ha podido obtener la URL de conexión a la base de datos: {e}", file=sys.stderr)
             sys.exit(1)
 
         # Conecta a la base de datos
         try:
-            database = Database(db_url)
+            database = Database(db_url, workers=args.workers, pool_options=pool_options)
+            if args.profile:
+                # Las estadísticas se activan antes de conectar, para medir también las consultas al catálogo
+                atexit.register(save_profile, database.enable_stats(), args.profile)
             database.connect()
             print(f"🏓 Conectado a la base de datos '{database.name}'")
         except Exception as e:
@@ -37,11 +45,31 @@ def load_sql(sql_file):
         print(f"📄 Leyendo consulta SQL desde el fichero '{sql_file}'...")
         with open(sql_file, 'r') as file:
             return file.read()
-    except FileNotFoundError:
-        print(f"❌ No se ha encontrado el fichero '{sql_file}'.", file=sys.stderr)
-        sys.exit(1)
     except Exception as e:
+        sql_file_error(sql_file, e)
+
+def sql_file_error(sql_file, e):
+    if isinstance(e, FileNotFoundError):
+        print(f"❌ No se ha encontrado el fichero '{sql_file}'.", file=sys.stderr)
+    else:
         print(f"❌ Error al leer el fichero '{sql_file}': {e}", file=sys.stderr)
+    sys.exit(1)
+
+def run_batch(database: Database, args):
+    try:
+        queries = load_queries(args.sql_file, database.type)
+    except OSError as e:
+        sql_file_error(args.sql_file, e)
+    if not queries:
+        print(f"❌ No se han encontrado consultas en '{args.sql_file}'.", file=sys.stderr)
+        sys.exit(1)
+    output_dir = args.output or "."
+    print(f"⚙️ Ejecutando {len(queries)} consultas con {args.workers} hilos (resultados en '{output_dir}', formato {args.format})...")
+    start = time.perf_counter()
+    summaries = BatchRunner(database, workers=args.workers, batch_size=args.batch_size).run(queries, output_dir, args.format)
+    print()
+    BatchRunner.print_summary(summaries, time.perf_counter() - start)
+    if any(summary["error"] for summary in summaries):
         sys.exit(1)
 
 def main():
@@ -61,7 +89,7 @@ def main():
     commands.add_argument('-h', '--help', action='store_true', help='Muestra esta ayuda')
     commands.add_argument('-v', '--version', action='version', help='Mostrar versión', version=f'{__module_name__} v{__module_version__}')
     commands.add_argument('--sql', metavar='QUERY', nargs='?', const='', help='Devuelve el resultado de una consulta SQL')
-    commands.add_argument('--sql-file', metavar='FILE', nargs='?', const='', help='Devuelve el resultado de una consulta SQL proporcionada en un fichero')
+    commands.add_argument('--sql-file', metavar='FILE', nargs='?', const='', help='Devuelve el resultado de una consulta SQL proporcionada en un fichero. Si es un directorio con ficheros .sql (o se indica --batch), cada sentencia se ejecuta por separado, en paralelo, y el resultado de cada una se guarda en su propio fichero en el directorio indicado con --output.')
     commands.add_argument('--nat-lang', '-nl', metavar='QUERY', nargs='?', const='', help='Devuelve el resultado de una consulta en lenguaje natural')
     
     # define las opciones adicionales a los comandos
@@ -70,6 +98,12 @@ def main():
     options.add_argument('--db-name', metavar='DB', nargs='?', help=f"Nombre de la base de datos en el fichero {DB_INIFILE}")
     options.add_argument('--json', metavar='FILE', nargs='?', const='', help='Entrada o salida en formato JSON. Si no se especifica un fichero, se utiliza la entrada y salida estándar.')
     options.add_argument('--output', metavar='DIR', nargs='?', const='.', help='Directorio de salida para los ficheros generados. Por defecto, el directorio actual.')
+    options.add_argument('--format', choices=FORMATS, default=FORMAT_JSON, help='Formato del resultado con la opción --json: json (por defecto), ndjson (un objeto por línea), csv o columnar (formato binario por bloques, requiere un fichero).')
+    options.add_argument('--batch', action='store_true', help='Con --sql-file, ejecuta cada sentencia del fichero (separadas por ; o GO) como una consulta independiente, en paralelo. Sin esta opción, el fichero se ejecuta como una única consulta.')
+    options.add_argument('--workers', metavar='N', type=int, default=4, help='Número de consultas que se ejecutan a la vez con --sql-file en modo --batch (o con un directorio). Por defecto, 4.')
+    options.add_argument('--batch-size', metavar='N', type=int, default=10000, help='Número de filas que se leen de la base de datos (y se escriben) en cada lote. Por defecto, 10000.')
+    options.add_argument('--profile', metavar='FILE', help='Mide el tiempo de ejecución, lectura y serialización, las filas y los bytes de cada sentencia ejecutada y lo guarda en un fichero JSON al terminar.')
+    options.add_argument('--no-llm-cache', action='store_true', help='No reutiliza las respuestas del modelo guardadas en la caché (~/.dbtools/cache/llm) para consultas en lenguaje natural idénticas, ni guarda las nuevas.')
     options.add_argument('--schema', metavar='DIR', nargs='?', const='.', help='Directorio con el esquema de la base de datos en formato JSON. Necesario para consultas en lenguaje natural.')
 
     # Parsea los argumentos
@@ -89,6 +123,11 @@ def main():
             print("❌ No se ha especificado una base de datos. Por favor, utiliza --db-url o --db-name para conectarte a una base de datos.")
             sys.exit(1)
 
+        # Varias consultas (las sentencias de un fichero con --batch, o los ficheros de un directorio): se ejecutan en paralelo, cada una a su fichero
+        if args.sql_file and (args.batch or os.path.isdir(args.sql_file)):
+            run_batch(database, args)
+            return
+
         if args.sql_file is not None and args.sql_file != '':
             sql = load_sql(args.sql_file)
         elif args.sql is not None and args.sql != '':
@@ -98,25 +137,47 @@ def main():
 
         sql = sql.strip()
         query = text(sql)
-        result = database.execute(query)
+        # Las estadísticas se agrupan por el SQL compilado: se compila una única vez para todos los lotes
+        statement = database.compile(query) if database.stats is not None else None
+
+        # El resultado se lee por lotes con un cursor del lado del servidor y se va escribiendo según llega
+        def batches(exporter):
+            return database.stream(query, batch_size=args.batch_size, raw=True, on_result=exporter.prepare)
 
         if args.json is not None:
+
+            if args.format == FORMAT_COLUMNAR and args.json == '':
+                print("❌ El formato columnar requiere especificar un fichero con la opción --json.", file=sys.stderr)
+                sys.exit(1)
             
             if args.json == '':
                 json_output = sys.stdout
             else:
-                json_output = open(args.json, 'w', encoding='utf-8')
+                json_output = open_output(args.json, args.format)
+
+            try:
+                with EXPORTERS[args.format](json_output) as exporter:
+                    for batch in batches(exporter):
+                        with database.measure(statement, "serialize"):
+                            exporter.write(batch)
+            finally:
+                if json_output is not sys.stdout:
+                    json_output.close()
 
-            json.dump(result, json_output, indent=4, ensure_ascii=False)            
+            if statement is not None and args.json != '':
+                database.stats.record(statement, bytes=os.path.getsize(args.json))
 
             if args.json != '':
-                print(f"\n✅ Resultado guardado en {args.json} con {len(result)} filas.")
+                print(f"\n✅ Resultado guardado en {args.json} ({args.format}) con {exporter.count} filas.")
             else:
-                print(f"\n✅ Resultado mostrado con {len(result)} filas.")
+                print(f"\n✅ Resultado mostrado con {exporter.count} filas.")
 
         else:
-            print(tabulate(result, headers="keys", tablefmt="grid"))
-            print(f"✅ Resultado mostrado con {len(result)} filas.")
+            with TableExporter(sys.stdout) as exporter:
+                for batch in batches(exporter):
+                    with database.measure(statement, "serialize"):
+                        exporter.write(batch)
+            print(f"✅ Resultado mostrado con {exporter.count} filas.")
 
     if args.nat_lang is not None:
 
@@ -127,7 +188,8 @@ def main():
             print("No se ha especificado la clave de API de OpenAI. Por favor, configura 'openai.apikey' en el fichero de configuración.", file=sys.stderr)
             sys.exit(1)
 
-        sql = generate_query(apikey, "schemas/PincelPreDB", "Módulos del ciclo formativo de grado superior de Desarrollo de Aplicaciones Web del curso 2024")
+        llm_cache = ResponseCache() if not args.no_llm_cache else None
+        sql = generate_query(apikey, "schemas/PincelPreDB", "Módulos del ciclo formativo de grado superior de Desarrollo de Aplicaciones Web del curso 2024", llm_cache)
         print(f"⚙️ Consulta generada:", sql)
 
 if __name__ == "__main__":
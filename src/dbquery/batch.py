@@ -0,0 +1,182 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+from tabulate import tabulate
+
+from dbquery.export import EXPORTERS, EXTENSIONS, FORMAT_JSON, open_output
+from dbschema.database import Database
+
+# Separador de lotes de SQL Server: una línea que sólo contiene GO
+GO_SEPARATOR = re.compile(r"^\s*GO\s*;?\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+# Etiqueta de una cadena entre dólares de PostgreSQL ($$...$$ o $etiqueta$...$etiqueta$)
+DOLLAR_QUOTE = re.compile(r"\$(?:[^\W\d]\w*)?\$")
+# Dialectos en los que '#' inicia un comentario de línea y '\' es un escape dentro de las cadenas
+MYSQL_DIALECTS = ("mysql", "mariadb")
+
+
+def split_statements(sql: str, dialect: str = None) -> list[str]:
+    """
+    Divide un script SQL en sentencias, separadas por ';' o por líneas con GO (SQL Server).
+    Los ';' dentro de cadenas (también las de PostgreSQL entre dólares), identificadores entre comillas, corchetes
+    o acentos graves y comentarios no separan sentencias.
+    :param sql: Script SQL.
+    :param dialect: Tipo de base de datos (p.ej. mysql). En MySQL y MariaDB, '#' inicia un comentario de línea
+        y '\\' escapa el siguiente carácter de una cadena.
+    :return: Lista de sentencias (sin el separador y sin sentencias vacías ni sólo con comentarios).
+    """
+    mysql = dialect in MYSQL_DIALECTS
+    statements = []
+    for script in GO_SEPARATOR.split(sql):
+        current = []
+        has_code = False
+        i = 0
+        while i < len(script):
+            char = script[i]
+            if char in ("'", '"', "[", "`"):
+                # Cadena o identificador: se copia entero (las comillas duplicadas son escapes)
+                closing = "]" if char == "[" else char
+                end = i + 1
+                while end < len(script):
+                    if mysql and script[end] == "\\" and char in ("'", '"'):
+                        end += 2
+                        continue
+                    if script[end] == closing:
+                        if end + 1 < len(script) and script[end + 1] == closing:
+                            end += 2
+                            continue
+                        break
+                    end += 1
+                current.append(script[i:end + 1])
+                has_code = True
+                i = end + 1
+            elif char == "$" and (i == 0 or not (script[i - 1].isalnum() or script[i - 1] in "_$")) and DOLLAR_QUOTE.match(script, i):
+                # Cadena entre dólares (p.ej. el cuerpo de una función): hasta la misma etiqueta
+                tag = DOLLAR_QUOTE.match(script, i).group()
+                end = script.find(tag, i + len(tag))
+                end = len(script) if end < 0 else end + len(tag)
+                current.append(script[i:end])
+                has_code = True
+                i = end
+            elif script.startswith("--", i) or (mysql and char == "#"):
+                end = script.find("\n", i)
+                end = len(script) if end < 0 else end
+                current.append(script[i:end])
+                i = end
+            elif script.startswith("/*", i):
+                end = script.find("*/", i + 2)
+                end = len(script) if end < 0 else end + 2
+                current.append(script[i:end])
+                i = end
+            elif char == ";":
+                if has_code:
+                    statements.append("".join(current).strip())
+                current = []
+                has_code = False
+                i += 1
+            else:
+                current.append(char)
+                has_code = has_code or not char.isspace()
+                i += 1
+        if has_code:
+            statements.append("".join(current).strip())
+    return statements
+
+
+def load_queries(path: str, dialect: str = None) -> list[tuple[str, str]]:
+    """
+    Carga las consultas de un fichero SQL o de todos los ficheros .sql de un directorio.
+    Cada consulta se nombra como su fichero (y su posición dentro del fichero, si contiene varias).
+    :param path: Fichero o directorio.
+    :param dialect: Tipo de base de datos (ver split_statements).
+    :return: Lista de (nombre, consulta).
+    """
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, file) for file in os.listdir(path) if file.lower().endswith(".sql"))
+    else:
+        files = [ path ]
+    queries = []
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            statements = split_statements(f.read(), dialect)
+        name = os.path.splitext(os.path.basename(file))[0]
+        for n, statement in enumerate(statements, start=1):
+            queries.append((f"{name}_{n}" if len(statements) > 1 else name, statement))
+    return queries
+
+
+class BatchRunner:
+    """
+    Ejecuta varias consultas independientes en paralelo, cada una con su propia conexión del pool de la base de datos,
+    guardando el resultado de cada una en su propio fichero según se va leyendo.
+    """
+
+    def __init__(self, database: Database, workers: int = 4, batch_size: int = 10000):
+        """
+        :param database: Base de datos (conectada). Su pool debe admitir al menos tantas conexiones como hilos.
+        :param workers: Número de consultas que se ejecutan a la vez.
+        :param batch_size: Número de filas que se leen (y se escriben) en cada lote.
+        """
+        self.database = database
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+
+    def run(self, queries: list[tuple[str, str]], output_dir: str = ".", format: str = FORMAT_JSON) -> list[dict]:
+        """
+        Ejecuta las consultas en paralelo.
+        :param queries: Lista de (nombre, consulta).
+        :param output_dir: Directorio donde se guarda el resultado de cada consulta ({nombre}.{formato}).
+        :param format: Formato de los ficheros de salida.
+        :return: Resumen de cada consulta (nombre, filas, tiempo, fichero y error), en el mismo orden.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [ executor.submit(self.__run_query__, name, sql, output_dir, format) for name, sql in queries ]
+            return [ future.result() for future in futures ]
+
+    def __run_query__(self, name: str, sql: str, output_dir: str, format: str) -> dict:
+        file = os.path.join(output_dir, f"{name}{EXTENSIONS[format]}")
+        summary = { "name": name, "rows": 0, "seconds": 0.0, "file": file, "error": None }
+        start = time.perf_counter()
+        try:
+            # Las estadísticas se agrupan por el SQL compilado (el que registra la ejecución): se compila una única vez
+            query = text(sql)
+            statement = self.database.compile(query) if self.database.stats is not None else None
+            with self.database.engine.connect() as connection:
+                with open_output(file, format) as output:
+                    with EXPORTERS[format](output) as exporter:
+                        for batch in self.database.stream(query, batch_size=self.batch_size, raw=True, connection=connection, on_result=exporter.prepare):
+                            with self.database.measure(statement, "serialize"):
+                                exporter.write(batch)
+            summary["rows"] = exporter.count
+            if statement is not None:
+                self.database.stats.record(statement, bytes=os.path.getsize(file))
+            print(f"✅ {name}: {exporter.count} filas en {time.perf_counter() - start:.2f} segundos")
+        except Exception as e:
+            # No se deja un fichero incompleto
+            if os.path.exists(file):
+                os.remove(file)
+            summary["error"] = str(e).splitlines()[0]
+            summary["file"] = None
+            print(f"❌ {name}: {summary['error']}")
+        summary["seconds"] = round(time.perf_counter() - start, 3)
+        return summary
+
+    @staticmethod
+    def print_summary(summaries: list[dict], elapsed: float):
+        """
+        Muestra el resumen de la ejecución de las consultas.
+        :param summaries: Resumen de cada consulta.
+        :param elapsed: Tiempo total de la ejecución.
+        """
+        headers = [ "QUERY", "ROWS", "SECONDS", "RESULT" ]
+        data = [ [ summary["name"], summary["rows"], summary["seconds"], summary["error"] or summary["file"] ] for summary in summaries ]
+        print(tabulate(data, headers=headers, tablefmt="grid"))
+        errors = sum(1 for summary in summaries if summary["error"])
+        total = sum(summary["seconds"] for summary in summaries)
+        print(f"\n{len(summaries) - errors} consultas correctas, {errors} con errores, {sum(summary['rows'] for summary in summaries)} filas")
+        print(f"⏱️ Tiempo total: {elapsed:.2f} segundos (suma de las consultas: {total:.2f} segundos)")
@@ -0,0 +1,146 @@
+import sys
+import json
+import zlib
+import struct
+from array import array
+from typing import BinaryIO, Iterator
+
+"""
+Formato columnar por bloques para exportar resultados de consultas (sin dependencias externas).
+- Cabecera: firma, versión del formato y nombres de las columnas (JSON).
+- Bloques: número de filas del bloque y, para cada columna, su tipo, las filas nulas y los valores
+  (enteros y reales como arrays de 64 bits, cadenas como longitudes + texto UTF-8), comprimidos con zlib.
+Cada bloque se escribe según llega de la base de datos y se puede leer de forma independiente.
+"""
+MAGIC = b"DBQC"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+BLOCK = struct.Struct("<I")
+COLUMN = struct.Struct("<BII")
+
+TYPE_NULL = 0
+TYPE_INT = 1
+TYPE_FLOAT = 2
+TYPE_BOOL = 3
+TYPE_STRING = 4
+TYPE_BYTES = 5
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+class ColumnarWriter:
+    """
+    Escribe filas en formato columnar, bloque a bloque.
+    """
+
+    def __init__(self, output: BinaryIO, columns: list[str]):
+        """
+        :param output: Fichero de salida (abierto en modo binario).
+        :param columns: Nombres de las columnas.
+        """
+        self.output = output
+        self.columns = columns
+        self.count = 0
+        names = json.dumps(columns, ensure_ascii=False).encode("utf-8")
+        self.output.write(HEADER.pack(MAGIC, VERSION, len(names)))
+        self.output.write(names)
+
+    def write(self, rows: list[list]):
+        """
+        Escribe un bloque de filas (con los valores ya convertidos a tipos básicos).
+        :param rows: Filas del bloque.
+        """
+        if not rows:
+            return
+        self.output.write(BLOCK.pack(len(rows)))
+        for i in range(len(self.columns)):
+            values = [ row[i] for row in rows ]
+            nulls = bytes(value is None for value in values)
+            type, data = ColumnarWriter.__encode__([ value for value in values if value is not None ])
+            nulls = zlib.compress(nulls)
+            data = zlib.compress(data)
+            self.output.write(COLUMN.pack(type, len(nulls), len(data)))
+            self.output.write(nulls)
+            self.output.write(data)
+        self.count += len(rows)
+
+    def close(self):
+        self.output.flush()
+
+    @staticmethod
+    def __encode__(values: list) -> tuple[int, bytes]:
+        # El tipo de la columna en el bloque se decide a partir de sus valores (no nulos)
+        if not values:
+            return TYPE_NULL, b""
+        types = set(map(type, values))
+        if types == { bool }:
+            return TYPE_BOOL, bytes(values)
+        if types == { int } and INT64_MIN <= min(values) and max(values) <= INT64_MAX:
+            return TYPE_INT, ColumnarWriter.__pack__(array("q", values))
+        if types <= { int, float } and bool not in types:
+            return TYPE_FLOAT, ColumnarWriter.__pack__(array("d", values))
+        if types <= { bytes, bytearray }:
+            return TYPE_BYTES, ColumnarWriter.__pack_strings__([ bytes(value) for value in values ])
+        return TYPE_STRING, ColumnarWriter.__pack_strings__([ (value if isinstance(value, str) else str(value)).encode("utf-8") for value in values ])
+
+    @staticmethod
+    def __pack__(values: array) -> bytes:
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tobytes()
+
+    @staticmethod
+    def __pack_strings__(values: list[bytes]) -> bytes:
+        lengths = array("I", map(len, values))
+        return ColumnarWriter.__pack__(lengths) + b"".join(values)
+
+
+def read_columnar(input: BinaryIO) -> Iterator[tuple[list[str], list[tuple]]]:
+    """
+    Lee un fichero en formato columnar bloque a bloque.
+    :param input: Fichero de entrada (abierto en modo binario).
+    :return: Iterador de (nombres de las columnas, filas del bloque).
+    """
+    magic, version, names_len = HEADER.unpack(input.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("El fichero no tiene formato columnar de dbquery")
+    if version != VERSION:
+        raise ValueError(f"Versión del formato columnar no soportada: {version} (se esperaba {VERSION})")
+    columns = json.loads(input.read(names_len).decode("utf-8"))
+    while True:
+        block = input.read(BLOCK.size)
+        if not block:
+            break
+        (row_count,) = BLOCK.unpack(block)
+        data = []
+        for _ in columns:
+            type, nulls_len, data_len = COLUMN.unpack(input.read(COLUMN.size))
+            nulls = zlib.decompress(input.read(nulls_len))
+            values = iter(__decode__(type, zlib.decompress(input.read(data_len)), row_count - sum(nulls)))
+            data.append([ None if null else next(values) for null in nulls ])
+        yield columns, list(zip(*data))
+
+
+def __decode__(type: int, data: bytes, count: int) -> list:
+    if type == TYPE_NULL:
+        return []
+    if type == TYPE_BOOL:
+        return [ value == 1 for value in data ]
+    if type in (TYPE_INT, TYPE_FLOAT):
+        values = array("q" if type == TYPE_INT else "d")
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tolist()
+    lengths = array("I")
+    lengths.frombytes(data[:4 * count])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    values = []
+    offset = 4 * count
+    for length in lengths:
+        value = data[offset:offset + length]
+        values.append(value if type == TYPE_BYTES else value.decode("utf-8"))
+        offset += length
+    return values
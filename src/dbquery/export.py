@@ -0,0 +1,192 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from typing import Callable, TextIO, BinaryIO
+
+from sqlalchemy.engine import CursorResult
+from tabulate import tabulate
+
+from dbquery.columnar import ColumnarWriter
+from utils.encoding import JSON_CONVERTERS, RowSerializer
+
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+FORMAT_COLUMNAR = "columnar"
+FORMATS = [ FORMAT_JSON, FORMAT_NDJSON, FORMAT_CSV, FORMAT_COLUMNAR ]
+EXTENSIONS = { FORMAT_JSON: ".json", FORMAT_NDJSON: ".ndjson", FORMAT_CSV: ".csv", FORMAT_COLUMNAR: ".dbqc" }
+
+# En el formato columnar los binarios se guardan tal cual (no en base64)
+COLUMNAR_CONVERTERS = { type: converter for type, converter in JSON_CONVERTERS.items() if type not in (bytes, bytearray) }
+COLUMNAR_CONVERTERS[memoryview] = bytes
+
+
+class Exporter(ABC):
+    """
+    Escribe el resultado de una consulta lote a lote, sin tener todas las filas en memoria.
+    Recibe las filas tal cual las devuelve la base de datos (Database.stream con raw=True) y la conversión
+    de los valores se decide una única vez por columna (ver RowSerializer), con los tipos que informa el driver
+    si se recibe el resultado con prepare (Database.stream con on_result=exporter.prepare).
+    """
+
+    converters : dict[type, Callable] = JSON_CONVERTERS
+
+    def __init__(self, output: TextIO | BinaryIO):
+        """
+        :param output: Fichero (o flujo) de salida.
+        """
+        self.output = output
+        self.columns = None
+        self.count = 0
+        self.__serializer__ = None
+
+    def __enter__(self) -> "Exporter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def prepare(self, result: CursorResult):
+        """
+        Prepara la conversión de los valores con los tipos de las columnas del resultado, antes del primer lote.
+        :param result: Resultado de la consulta (CursorResult).
+        """
+        self.__serializer__ = RowSerializer.from_result(result, converters=self.converters)
+
+    def write(self, rows: list):
+        """
+        Escribe un lote de filas.
+        :param rows: Filas a escribir (Row de SQLAlchemy, o cualquier tupla con el atributo _fields).
+        """
+        if not rows:
+            return
+        if self.columns is None:
+            # Sin el resultado (prepare), la conversión se decide con los valores de las filas
+            if self.__serializer__ is None:
+                self.__serializer__ = RowSerializer(list(rows[0]._fields), converters=self.converters)
+            self.columns = self.__serializer__.columns
+            self.start()
+        self.write_rows(self.__serializer__.convert(rows))
+        self.count += len(rows)
+
+    def start(self):
+        """
+        Se invoca con el primer lote, cuando ya se conocen las columnas.
+        """
+        pass
+
+    @abstractmethod
+    def write_rows(self, rows: list[list]):
+        """
+        Escribe un lote de filas ya convertidas (listas de valores, en el orden de las columnas).
+        """
+
+    def close(self):
+        """
+        Termina el documento (no cierra el fichero de salida).
+        """
+        self.output.flush()
+
+
+class JsonExporter(Exporter):
+    """
+    Escribe el resultado en JSON. Es el mismo documento que genera json.dump(filas, indent=4, ensure_ascii=False).
+    """
+
+    def __init__(self, output: TextIO, indent: int = 4):
+        super().__init__(output)
+        self.indent = indent
+
+    def write_rows(self, rows: list[list]):
+        padding = " " * self.indent
+        for i, values in enumerate(rows):
+            self.output.write(",\n" if self.count + i > 0 else "[\n")
+            self.output.write(padding + json.dumps(dict(zip(self.columns, values)), indent=self.indent, ensure_ascii=False).replace("\n", "\n" + padding))
+
+    def close(self):
+        self.output.write("\n]" if self.count > 0 else "[]")
+        super().close()
+
+
+class NdjsonExporter(Exporter):
+    """
+    Escribe el resultado en NDJSON (un objeto JSON por línea).
+    """
+
+    def write_rows(self, rows: list[list]):
+        columns = self.columns
+        self.output.writelines(json.dumps(dict(zip(columns, values)), ensure_ascii=False) + "\n" for values in rows)
+
+
+class CsvExporter(Exporter):
+    """
+    Escribe el resultado en CSV, con una cabecera con los nombres de las columnas.
+    El fichero de salida debe abrirse con newline="".
+    """
+
+    def __init__(self, output: TextIO, delimiter: str = ","):
+        super().__init__(output)
+        self.writer = csv.writer(output, delimiter=delimiter)
+
+    def start(self):
+        self.writer.writerow(self.columns)
+
+    def write_rows(self, rows: list[list]):
+        self.writer.writerows(rows)
+
+
+class ColumnarExporter(Exporter):
+    """
+    Escribe el resultado en el formato columnar por bloques de dbquery.columnar (cada lote es un bloque).
+    El fichero de salida debe abrirse en modo binario.
+    """
+
+    converters = COLUMNAR_CONVERTERS
+
+    def start(self):
+        self.writer = ColumnarWriter(self.output, self.columns)
+
+    def write_rows(self, rows: list[list]):
+        self.writer.write(rows)
+
+    def close(self):
+        # Sin filas, se escribe al menos la cabecera (sin columnas)
+        if self.columns is None:
+            ColumnarWriter(self.output, [])
+        super().close()
+
+
+class TableExporter(Exporter):
+    """
+    Muestra el resultado como una tabla (tabulate) lote a lote.
+    Cada lote se muestra en su propia tabla; la cabecera sólo se muestra en el primero.
+    """
+
+    def __init__(self, output: TextIO, tablefmt: str = "grid"):
+        super().__init__(output)
+        self.tablefmt = tablefmt
+
+    def write_rows(self, rows: list[list]):
+        headers = self.columns if self.count == 0 else ()
+        print(tabulate(rows, headers=headers, tablefmt=self.tablefmt), file=self.output)
+
+
+EXPORTERS = {
+    FORMAT_JSON: JsonExporter,
+    FORMAT_NDJSON: NdjsonExporter,
+    FORMAT_CSV: CsvExporter,
+    FORMAT_COLUMNAR: ColumnarExporter,
+}
+
+
+def open_output(file: str, format: str) -> TextIO | BinaryIO:
+    """
+    Abre el fichero de salida en el modo que necesita cada formato.
+    :param file: Ruta del fichero.
+    :param format: Formato del fichero.
+    :return: Fichero abierto para escritura.
+    """
+    if format == FORMAT_COLUMNAR:
+        return open(file, "wb")
+    return open(file, "w", encoding="utf-8", newline="" if format == FORMAT_CSV else None)
@@ -2,10 +2,13 @@ import os
 import sys
 import json
 from openai import OpenAI, RateLimitError
+from openai.types.responses import Response
 
 from dbschema.table import Table
+from dbschema.binary import load_table, EXTENSIONS
 
 from dbanalyzer.functions import tools, call_function
+from utils.llm_cache import ResponseCache
 
 tools = [
     {
@@ -78,20 +81,22 @@ def ask_for_help(question: str) -> str:
 def index_schema(schema_dir: str) -> list[dict]:
     index = {}
     for table_file in os.listdir(schema_dir):
-        table = Table.load(os.path.join(schema_dir, table_file))
+        table = load_table(os.path.join(schema_dir, table_file))
         index[table.name] = table.comment
     print(f"🗒️ Índice de esquemas generado con las tablas:", json.dumps(index, indent=4))
     return index
 
 
 def get_table_by_name(schema_dir: str, table_name: str) -> Table:
-    table_path = os.path.join(schema_dir, f"{table_name}.json")
-    if not os.path.exists(table_path):
+    # Admite tablas guardadas en JSON o en formato binario
+    paths = [ os.path.join(schema_dir, f"{table_name}{extension}") for extension in EXTENSIONS.values() ]
+    table_path = next((path for path in paths if os.path.exists(path)), None)
+    if table_path is None:
         raise FileNotFoundError(f"La tabla '{table_name}' no existe en el directorio '{schema_dir}'.")    
-    return Table.load(table_path)
+    return load_table(table_path)
 
 
-def generate_query(apikey: str, schema_dir: str, prompt: str) -> Table:
+def generate_query(apikey: str, schema_dir: str, prompt: str, llm_cache: ResponseCache = None) -> Table:
     print(f"🔍 Generando consulta para el prompt '{prompt}'...")
 
     client = OpenAI(api_key=apikey)
@@ -116,14 +121,24 @@ def generate_query(apikey: str, schema_dir: str, prompt: str) -> Table:
     while True:
 
         try:
-            print(f"➡️ Enviando mensaje al modelo...")
-            response = client.responses.create(
-                model=model,
-                input=input_messages,
-                tools=tools,
-                tool_choice="auto",  # o "required" si quieres forzar tools
-                temperature=temperature,
-            )
+            request = {
+                "model": model,
+                "input": input_messages,
+                "tools": tools,
+                "tool_choice": "auto",  # o "required" si quieres forzar tools
+                "temperature": temperature,
+            }
+
+            # Si la misma petición ya se hizo (con los mismos resultados de las funciones), se reutiliza la respuesta
+            key = ResponseCache.key(**request) if llm_cache is not None else None
+            response = llm_cache.get(key, Response) if llm_cache is not None else None
+            if response is not None:
+                print(f"♻️ Respuesta del modelo recuperada de la caché")
+            else:
+                print(f"➡️ Enviando mensaje al modelo...")
+                response = client.responses.create(**request)
+                if llm_cache is not None:
+                    llm_cache.put(key, response)
         except RateLimitError as e:
             print(f"⚠️ Se ha excedido el límite de tokens por minuto. Esperando 1 minuto para reintentar... ({e})", file=sys.stderr)
             break
@@ -1,11 +1,18 @@
 import sys
+import atexit
 import json
 import argparse
 
 from tabulate import tabulate
+from textwrap import shorten
 
 from dbschema import __module_name__, __module_description__, __module_version__
+from dbschema.binary import BinarySchemaWriter, FORMATS, FORMAT_JSON, FORMAT_BINARY
 from dbschema.database import Database
+from dbschema.query_stats import save_profile
+from dbschema.lazy_schema import LazySchema
+from dbschema.schema_writer import SchemaWriter
+from dbschema.search_index import SearchIndex
 from dbutils.customhelp import CustomHelpFormatter
 from dbutils.dbini import DB_INIFILE, DBIni
 
@@ -35,7 +42,15 @@ def main():
     options.add_argument('--db-url', metavar='URL', nargs='?', help='URL de conexión a la base de datos')
     options.add_argument('--db-name', metavar='DB', nargs='?', help=f"Nombre de la base de datos en el fichero {DB_INIFILE}")
     options.add_argument('--json', metavar='FILE', nargs='?', const='', help='Entrada o salida en formato JSON. Si no se especifica un fichero, se utiliza la entrada y salida estándar.')
+    options.add_argument('--format', choices=FORMATS, default=FORMAT_JSON, help='Formato del fichero del esquema generado con --json: json (por defecto) o binary (formato binario compacto, que ocupa mucho menos).')
     options.add_argument('--output', metavar='DIR', nargs='?', const='.', help='Directorio de salida para los ficheros generados. Por defecto, el directorio actual.')
+    options.add_argument('--workers', metavar='N', type=int, default=1, help='Número de hilos para leer las tablas en paralelo (p.ej. 8-16 con servidores remotos). Por defecto, se leen todas las tablas con unas pocas consultas al catálogo.')
+    options.add_argument('--limit', metavar='N', type=int, default=20, help='Número máximo de resultados de la búsqueda con --search. Por defecto, 20.')
+    options.add_argument('--row-counts', action='store_true', help='Incluye en el esquema generado con --schema el número aproximado de filas de cada tabla (de las estadísticas del catálogo, con una única consulta).')
+    options.add_argument('--profile', metavar='FILE', help='Mide el tiempo de ejecución, lectura y serialización, las filas y los bytes de cada sentencia ejecutada y lo guarda en un fichero JSON al terminar.')
+    options.add_argument('--refresh', action='store_true', help='Ignora el esquema guardado en la caché y lo vuelve a generar a partir de la base de datos.')
+    options.add_argument('--incremental', action='store_true', help='Actualiza el último esquema guardado en la caché, volviendo a leer sólo las tablas añadidas o modificadas.')
+    options.add_argument('--changes', metavar='FILE', help='Guarda en un fichero JSON las tablas añadidas, modificadas y eliminadas detectadas con la opción --incremental.')
 
     # Parsea los argumentos
     args = parser.parse_args()
@@ -50,13 +65,17 @@ def main():
         try:
             # Si no se ha especificado una URL de conexión a la base de datos, intenta obtenerla de las variables de entorno
             db_url = args.db_url or DBIni.load().get_url(args.db_name)
+            pool_options = DBIni.load().get_pool_options(args.db_name) if not args.db_url else None
         except Exception as e:
             print(f"No se ha podido obtener la URL de conexión a la base de datos: {e}", file=sys.stderr)
             sys.exit(1)
 
         # Conecta a la base de datos
         try:
-            database = Database(db_url)
+            database = Database(db_url, workers=args.workers, pool_options=pool_options)
+            if args.profile:
+                # Las estadísticas se activan antes de conectar, para medir también las consultas al catálogo
+                atexit.register(save_profile, database.enable_stats(), args.profile)
             database.connect()
             print(f"Conectado a la base de datos '{database.name}'")
         except Exception as e:
@@ -109,6 +128,11 @@ def main():
             print("❌ No se ha especificado una base de datos. Por favor, utiliza --db-url o --db-name para conectarte a una base de datos.")
             sys.exit(1)
 
+        # El formato binario sólo se puede guardar en un fichero
+        if args.format == FORMAT_BINARY and not args.json:
+            print("❌ El formato binario requiere especificar un fichero con la opción --json.")
+            sys.exit(1)
+
         prefix = args.schema
 
         print(f"⚙️ Generando esquema de la base de datos...")
@@ -117,42 +141,95 @@ def main():
         else:
             print(f"\t- Incluyendo todas las tablas")
 
-        schema = database.get_schema(prefix=prefix)
-
-        if schema is None:
-            print("❌ No se ha podido generar el esquema de la base de datos. Por favor, comprueba que la base de datos contiene tablas.", file=sys.stderr)
-            sys.exit(1)
+        # Número aproximado de filas de cada tabla, de las estadísticas del catálogo (se guarda con la información de la base de datos)
+        database_info = database.__dict__()
+        row_counts = None
+        if args.row_counts:
+            row_counts = database.estimate_row_counts()
+            if row_counts is None:
+                print(f"\t- ⚠️ No se puede estimar el número de filas de las tablas en {database.type}")
+            else:
+                row_counts = { name: count for name, count in sorted(row_counts.items()) if not prefix or prefix in name }
+                database_info["row_counts"] = row_counts
+
+        if args.incremental:
+            schema, changes = database.refresh_schema(prefix=prefix)
+            print(f"\n🔄 Cambios desde la última instantánea del esquema:")
+            changes.print()
+            if args.changes:
+                changes.save(args.changes)
+                print(f"\n✅ Cambios guardados en: {args.changes}")
+            tables = schema.tables if schema else []
+        else:
+            # Las tablas se van procesando según se generan, sin tener el esquema completo en memoria
+            tables = database.iter_schema(prefix=prefix, refresh=args.refresh)
 
         # Guardar en un fichero o mostrar por pantalla
-        if args.json is not None:
-
-            # Añade información de la base de datos junto con el esquema
-            result = {
-                "database": database.__dict__(),
-                "schema": schema.model_dump()
-            }
-         
-            # Convertir el resultado en JSON
-            result_json = json.dumps(result, indent=4)
-
-            # Guardar el resultado en un fichero
-            if len(args.json) > 0:
-                with open(args.json, "w") as f:
-                    f.write(result_json)
+        if args.json is not None and args.format == FORMAT_BINARY:
+
+            # Escribe el esquema en formato binario compacto tabla a tabla
+            with open(args.json, "wb") as output:
+                with BinarySchemaWriter(output, database_info) as writer:
+                    for table in tables:
+                        writer.write(table)
+            count = writer.count
+
+            if count > 0:
+                print(f"\n✅ Esquema guardado en: {args.json} (formato binario)")
+
+        elif args.json is not None:
+
+            # Escribe el esquema en JSON tabla a tabla, junto con la información de la base de datos
+            output = open(args.json, "w", encoding="utf-8", newline="") if len(args.json) > 0 else sys.stdout
+            try:
+                with SchemaWriter(output, database_info) as writer:
+                    for table in tables:
+                        writer.write(table)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+            count = writer.count
+
+            # Guarda el índice de las tablas junto al esquema, para poder cargarlo de forma perezosa
+            if count > 0 and len(args.json) > 0:
+                LazySchema.save_index(args.json, writer.index)
+
+            if count > 0 and len(args.json) > 0:
                 print(f"\n✅ Esquema guardado en: {args.json}")
-            # Mostrar el resultado en formato JSON en la consola
-            else:
-                print(f"\n{result_json}")
 
         else:
 
             # Mostrar tablas del esquema en la consola
-            for table in schema.tables:
+            count = 0
+            for table in tables:
                 print()
                 table.print()
+                count += 1
 
+            if row_counts:
+                print("\n📊 Número aproximado de filas:")
+                print(tabulate([ [ name, count ] for name, count in row_counts.items() ], headers=[ "TABLE_NAME", "ROWS" ], tablefmt="grid"))
+
+        if count == 0:
+            print("❌ No se ha podido generar el esquema de la base de datos. Por favor, comprueba que la base de datos contiene tablas.", file=sys.stderr)
+            sys.exit(1)
+
+    # Buscar tablas y columnas en el esquema
     if args.search is not None:
-        print(f"Pendiente de implementar la búsqueda de '{args.search}' en el esquema (proximamente) ... ⚠️")
+
+        if not args.json:
+            print("❌ No se ha especificado el esquema. Por favor, utiliza --json para indicar el fichero del esquema generado con --schema.")
+            sys.exit(1)
+
+        # Carga el índice de búsqueda guardado junto al esquema (o lo genera la primera vez, o si se indica --refresh)
+        print(f"🔍 Buscando '{args.search}' en el esquema {args.json} ...")
+        with SearchIndex.for_schema(args.json, rebuild=args.refresh) as index:
+            results = index.search(args.search, limit=args.limit)
+
+        headers = [ "SCORE", "TABLE_NAME", "COLUMN_NAME", "COMMENT" ]
+        data = [ [ result["score"], result["table"], result["column"] or "", shorten(result["comment"] or "", width=80, placeholder="...") ] for result in results ]
+        print(tabulate(data, headers=headers, tablefmt="grid"))
+        print(f"\n{len(results)} resultados encontrados")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,235 @@
+import sys
+import json
+import zlib
+import struct
+from array import array
+from typing import BinaryIO
+
+from dbschema.column import Column
+from dbschema.foreign_key import ForeignKey
+from dbschema.reference import Reference
+from dbschema.table import Table
+from utils.files import atomic_open
+
+"""
+Formato binario compacto para esquemas y tablas.
+- Cabecera: firma, versión del formato, tipo de contenido (esquema o tabla), número de tablas,
+  información de la base de datos y tamaño de cada sección.
+- Sección de cadenas: todas las cadenas distintas (nombres, tipos, comentarios...) una única vez, comprimida con zlib.
+- Sección de datos: secuencia de enteros (uint32) con los identificadores de las cadenas y los contadores, comprimida con zlib.
+El identificador 0 está reservado para None.
+"""
+MAGIC = b"DBSB"
+VERSION = 1
+KIND_SCHEMA = 1
+KIND_TABLE = 2
+HEADER = struct.Struct("<4sHBIIIQQ")
+
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+FORMATS = [ FORMAT_JSON, FORMAT_BINARY ]
+EXTENSIONS = { FORMAT_JSON: ".json", FORMAT_BINARY: ".bin" }
+
+# Número de enteros que se acumulan antes de comprimirlos
+FLUSH_SIZE = 1 << 16
+
+
+class BinarySchemaWriter:
+    """
+    Escribe un esquema (o una tabla) en formato binario, tabla a tabla.
+    Tiene la misma interfaz que SchemaWriter, de modo que se pueden usar indistintamente.
+    """
+
+    def __init__(self, output: BinaryIO, database: dict = None, kind: int = KIND_SCHEMA):
+        """
+        :param output: Fichero de salida (abierto en modo binario).
+        :param database: Información de la base de datos que acompaña al esquema.
+        :param kind: Tipo de contenido (KIND_SCHEMA o KIND_TABLE).
+        """
+        self.output = output
+        self.kind = kind
+        self.count = 0
+        self.__strings__ = {}
+        self.__ints__ = array("I")
+        self.__compressor__ = zlib.compressobj()
+        self.__chunks__ = []
+        self.__database_id__ = self.__intern__(json.dumps(database) if database is not None else None)
+
+    def __enter__(self) -> "BinarySchemaWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def write(self, table: Table):
+        """
+        Escribe una tabla en el esquema.
+        :param table: Tabla a escribir.
+        """
+        ints = self.__ints__
+        intern = self.__intern__
+        ints.extend((intern(table.name), intern(table.comment), intern(table.schemaName), len(table.columns)))
+        for column in table.columns:
+            ints.extend((intern(column.name), intern(column.type), 1 if column.nullable else 0, intern(column.comment), intern(column.default)))
+        ints.append(len(table.primary_keys))
+        ints.extend(intern(pk) for pk in table.primary_keys)
+        ints.append(len(table.foreign_keys))
+        for fk in table.foreign_keys:
+            ints.extend((intern(fk.column), intern(fk.reference.table), intern(fk.reference.column)))
+        self.count += 1
+        if len(ints) >= FLUSH_SIZE:
+            self.__flush__()
+
+    def close(self):
+        """
+        Escribe el fichero completo (no cierra el fichero de salida).
+        """
+        self.__flush__()
+        self.__chunks__.append(self.__compressor__.flush())
+        ints_section = b"".join(self.__chunks__)
+
+        strings = list(self.__strings__)
+        lengths = array("I", (len(string) for string in strings))
+        if sys.byteorder == "big":
+            lengths.byteswap()
+        strings_section = zlib.compress(lengths.tobytes() + "".join(strings).encode("utf-8"))
+
+        self.output.write(HEADER.pack(MAGIC, VERSION, self.kind, self.count, self.__database_id__, len(strings), len(strings_section), len(ints_section)))
+        self.output.write(strings_section)
+        self.output.write(ints_section)
+        self.output.flush()
+
+    def __intern__(self, string: str | None) -> int:
+        if string is None:
+            return 0
+        id = self.__strings__.get(string)
+        if id is None:
+            id = self.__strings__[string] = len(self.__strings__) + 1
+        return id
+
+    def __flush__(self):
+        if sys.byteorder == "big":
+            self.__ints__.byteswap()
+        self.__chunks__.append(self.__compressor__.compress(self.__ints__.tobytes()))
+        self.__ints__ = array("I")
+
+
+def read_binary(input: BinaryIO) -> tuple[int, dict, list[Table]]:
+    """
+    Lee un esquema (o una tabla) en formato binario.
+    Los objetos se construyen sin validación (model_construct), ya que el formato sólo se genera desde objetos válidos.
+    :param input: Fichero de entrada (abierto en modo binario).
+    :return: Tipo de contenido, información de la base de datos y tablas.
+    """
+    data = input.read()
+    magic, version, kind, table_count, database_id, strings_count, strings_len, ints_len = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("El fichero no tiene formato binario de esquema de dbtools")
+    if version != VERSION:
+        raise ValueError(f"Versión del formato binario no soportada: {version} (se esperaba {VERSION})")
+
+    # Cadenas (el identificador 0 es None)
+    position = HEADER.size
+    strings_section = zlib.decompress(data[position:position + strings_len])
+    position += strings_len
+    lengths = array("I")
+    lengths.frombytes(strings_section[:4 * strings_count])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    blob = strings_section[4 * strings_count:].decode("utf-8")
+    strings = [ None ]
+    offset = 0
+    for length in lengths:
+        strings.append(blob[offset:offset + length])
+        offset += length
+
+    # Datos
+    ints = array("I")
+    ints.frombytes(zlib.decompress(data[position:position + ints_len]))
+    if sys.byteorder == "big":
+        ints.byteswap()
+
+    tables = __read_tables__(strings, ints, table_count)
+
+    database = json.loads(strings[database_id]) if database_id else None
+    return kind, database, tables
+
+
+def __read_tables__(strings: list[str], ints: array, table_count: int) -> list[Table]:
+    # Crea las tablas a partir de los identificadores de las cadenas y los datos
+    tables = []
+    i = 0
+    for _ in range(table_count):
+        name, comment, schema_name, column_count = strings[ints[i]], strings[ints[i + 1]], strings[ints[i + 2]], ints[i + 3]
+        i += 4
+        columns = []
+        for _ in range(column_count):
+            name_id, type_id, nullable, comment_id, default_id = ints[i:i + 5]
+            columns.append(Column.model_construct(
+                name=strings[name_id],
+                type=strings[type_id],
+                nullable=nullable == 1,
+                comment=strings[comment_id],
+                default=strings[default_id],
+            ))
+            i += 5
+        pk_count = ints[i]
+        primary_keys = [ strings[id] for id in ints[i + 1:i + 1 + pk_count] ]
+        i += 1 + pk_count
+        fk_count = ints[i]
+        i += 1
+        foreign_keys = []
+        for _ in range(fk_count):
+            foreign_keys.append(ForeignKey.model_construct(
+                column=strings[ints[i]],
+                reference=Reference.model_construct(table=strings[ints[i + 1]], column=strings[ints[i + 2]])
+            ))
+            i += 3
+        tables.append(Table.model_construct(
+            name=name,
+            comment=comment,
+            columns=columns,
+            primary_keys=primary_keys,
+            foreign_keys=foreign_keys,
+            schemaName=schema_name
+        ))
+    return tables
+
+
+def is_binary(file: str) -> bool:
+    """
+    Comprueba si un fichero está en formato binario (por su firma).
+    """
+    with open(file, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def save_table(table: Table, file: str, format: str = FORMAT_JSON):
+    """
+    Guarda una tabla en un fichero en el formato indicado (de forma atómica).
+    :param table: Tabla a guardar.
+    :param file: Ruta del fichero.
+    :param format: Formato del fichero (json o binary).
+    """
+    if format == FORMAT_BINARY:
+        with atomic_open(file, "wb") as f:
+            with BinarySchemaWriter(f, kind=KIND_TABLE) as writer:
+                writer.write(table)
+    else:
+        table.save(file)
+
+
+def load_table(file: str) -> Table:
+    """
+    Carga una tabla de un fichero, detectando su formato (json o binary).
+    :param file: Ruta del fichero.
+    :return: Tabla cargada.
+    """
+    if not is_binary(file):
+        return Table.load(file)
+    with open(file, "rb") as f:
+        kind, _, tables = read_binary(f)
+    if kind != KIND_TABLE or len(tables) != 1:
+        raise ValueError(f"El fichero '{file}' no contiene una tabla")
+    return tables[0]
@@ -0,0 +1,249 @@
+import os
+import json
+import pickle
+import hashlib
+import datetime
+from contextlib import contextmanager
+from typing import Iterator
+from sqlalchemy.engine import make_url
+
+from dbschema.lazy_schema import LazySchema
+from dbschema.schema import Schema
+from dbschema.schema_writer import SchemaWriter
+from dbutils.dbini import DBTOOLS_DIR
+from utils.files import atomic_open
+
+CACHE_DIR = os.path.join(DBTOOLS_DIR, "cache")
+
+"""
+Consultas para obtener una huella del catálogo de cada SGBD soportado.
+Deben ser baratas: si la huella no cambia, el esquema guardado en la caché sigue siendo válido.
+- mssql: número de objetos, última modificación en sys.objects y checksum de los comentarios (MS_Description)
+- postgresql: md5 de las columnas (pg_class/pg_attribute), comentarios y restricciones del esquema actual
+- mysql: checksum (CRC32) de columnas, claves y comentarios en INFORMATION_SCHEMA
+"""
+FINGERPRINT_QUERIES = {
+    "mssql": """
+        SELECT CONCAT(
+            COUNT(*), ':',
+            CONVERT(VARCHAR(33), MAX(o.modify_date), 126), ':',
+            (SELECT CHECKSUM_AGG(CHECKSUM(ep.major_id, ep.minor_id, CAST(ep.value AS NVARCHAR(4000))))
+             FROM sys.extended_properties ep WHERE ep.class = 1 AND ep.name = 'MS_Description')
+        ) AS fingerprint
+        FROM sys.objects o
+        WHERE o.is_ms_shipped = 0
+    """,
+    "postgresql": """
+        SELECT md5(string_agg(
+                c.oid::text || ':' || c.relname || ':' || a.attname || ':' || a.atttypid::text || ':' || a.atttypmod::text || ':' ||
+                a.attnotnull::text || ':' || coalesce(col_description(c.oid, a.attnum), '') || ':' || coalesce(obj_description(c.oid, 'pg_class'), ''),
+                ',' ORDER BY c.oid, a.attnum))
+            || ':' ||
+            (SELECT md5(coalesce(string_agg(co.oid::text, ',' ORDER BY co.oid), ''))
+             FROM pg_constraint co JOIN pg_namespace cn ON cn.oid = co.connamespace
+             WHERE cn.nspname = current_schema()) AS fingerprint
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid
+        WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p', 'v', 'm') AND a.attnum > 0 AND NOT a.attisdropped
+    """,
+    "mysql": """
+        SELECT CONCAT(
+            COUNT(*), ':',
+            COALESCE(SUM(CRC32(CONCAT_WS(':', c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE, c.COLUMN_COMMENT))), 0), ':',
+            (SELECT COALESCE(SUM(CRC32(CONCAT_WS(':', k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME))), 0)
+             FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k WHERE k.TABLE_SCHEMA = DATABASE()), ':',
+            (SELECT COALESCE(SUM(CRC32(CONCAT_WS(':', t.TABLE_NAME, t.TABLE_COMMENT))), 0)
+             FROM INFORMATION_SCHEMA.TABLES t WHERE t.TABLE_SCHEMA = DATABASE())
+        ) AS fingerprint
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        WHERE c.TABLE_SCHEMA = DATABASE()
+    """,
+}
+
+"""
+Consultas para obtener la versión de cada tabla (fecha de modificación o checksum de su definición).
+Permiten detectar qué tablas se han añadido, modificado o eliminado desde la última vez que se generó el esquema.
+"""
+TABLE_VERSION_QUERIES = {
+    "mssql": """
+        SELECT t.name AS table_name,
+            CONCAT(
+                CONVERT(VARCHAR(33), t.modify_date, 126), ':',
+                (SELECT CHECKSUM_AGG(CHECKSUM(ep.minor_id, CAST(ep.value AS NVARCHAR(4000))))
+                 FROM sys.extended_properties ep WHERE ep.major_id = t.object_id AND ep.class = 1 AND ep.name = 'MS_Description')
+            ) AS version
+        FROM sys.tables t
+        WHERE t.schema_id = SCHEMA_ID()
+    """,
+    "postgresql": """
+        SELECT c.relname AS table_name,
+            md5(string_agg(
+                a.attname || ':' || a.atttypid::text || ':' || a.atttypmod::text || ':' || a.attnotnull::text || ':' || coalesce(col_description(c.oid, a.attnum), ''),
+                ',' ORDER BY a.attnum)
+                || ':' || coalesce(obj_description(c.oid, 'pg_class'), '')
+                || ':' || coalesce((SELECT string_agg(co.oid::text, ',' ORDER BY co.oid) FROM pg_constraint co WHERE co.conrelid = c.oid), '')
+            ) AS version
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid
+        WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND a.attnum > 0 AND NOT a.attisdropped
+        GROUP BY c.oid, c.relname
+    """,
+    "mysql": """
+        SELECT c.TABLE_NAME AS table_name,
+            CONCAT(
+                SUM(CRC32(CONCAT_WS(':', c.ORDINAL_POSITION, c.COLUMN_NAME, c.COLUMN_TYPE, c.IS_NULLABLE, c.COLUMN_COMMENT))), ':',
+                CRC32(COALESCE(MAX(t.TABLE_COMMENT), '')), ':',
+                (SELECT COALESCE(SUM(CRC32(CONCAT_WS(':', k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME))), 0)
+                 FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k WHERE k.TABLE_SCHEMA = c.TABLE_SCHEMA AND k.TABLE_NAME = c.TABLE_NAME)
+            ) AS version
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        JOIN INFORMATION_SCHEMA.TABLES t ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+        WHERE c.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+        GROUP BY c.TABLE_SCHEMA, c.TABLE_NAME
+    """,
+}
+
+class SchemaCache:
+    """
+    Caché en disco de los esquemas de las bases de datos.
+    Cada entrada se identifica por la URL de conexión (sin contraseña) y el filtro de tablas, y se compone de:
+    - {clave}.json: esquema en el mismo formato que genera `dbschema --schema --json` (legible con Schema.from_json)
+    - {clave}.metadata.pickle: metadatos de SQLAlchemy (usados por dborm)
+    - {clave}.meta.json: URL, filtro, huella del catálogo con la que se generó cada fichero y versión de cada tabla
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def load(self, dburl: str, filter: str, fingerprint: str, lazy: bool = False) -> Schema | LazySchema | None:
+        """
+        Recupera un esquema de la caché si sigue siendo válido
+            :param dburl: URL de conexión a la base de datos
+            :param filter: Filtro de tablas con el que se generó el esquema
+            :param fingerprint: Huella actual del catálogo
+            :param lazy: Si es True, devuelve un LazySchema que sólo carga las tablas a las que se accede
+            :returns: Esquema guardado, o None si no existe o está desactualizado
+        """
+        schema_file, _ = self.__paths__(dburl, filter, "json")
+        if not self.__is_valid__(dburl, filter, "schema", fingerprint):
+            return None
+        try:
+            return LazySchema(schema_file) if lazy else Schema.from_json(schema_file)
+        except Exception:
+            return None
+
+    def load_snapshot(self, dburl: str, filter: str) -> tuple[Schema, dict[str, str]]:
+        """
+        Recupera el último esquema guardado en la caché, aunque esté desactualizado, junto con la versión de cada tabla
+            :param dburl: URL de conexión a la base de datos
+            :param filter: Filtro de tablas con el que se generó el esquema
+            :returns: Esquema guardado y versiones de sus tablas, o (None, None) si no hay una instantánea utilizable
+        """
+        schema_file, _ = self.__paths__(dburl, filter, "json")
+        versions = self.load_meta(dburl, filter).get("versions")
+        if versions is None or not os.path.exists(schema_file):
+            return None, None
+        try:
+            return Schema.from_json(schema_file), versions
+        except Exception:
+            return None, None
+
+    def save(self, dburl: str, filter: str, fingerprint: str, schema: Schema, database: dict = None, versions: dict[str, str] = None):
+        """
+        Guarda un esquema en la caché
+            :param dburl: URL de conexión a la base de datos
+            :param filter: Filtro de tablas con el que se generó el esquema
+            :param fingerprint: Huella del catálogo con la que se generó el esquema
+            :param schema: Esquema a guardar
+            :param database: Información de la base de datos que acompaña al esquema
+            :param versions: Versión de cada tabla del esquema (para el refresco incremental)
+        """
+        with self.writer(dburl, filter, fingerprint, database, versions) as writer:
+            for table in schema.tables:
+                writer.write(table)
+
+    @contextmanager
+    def writer(self, dburl: str, filter: str, fingerprint: str, database: dict = None, versions: dict[str, str] = None) -> Iterator[SchemaWriter]:
+        """
+        Guarda un esquema en la caché tabla a tabla, según se va generando.
+        La entrada sólo se actualiza si se llega al final sin errores.
+            :returns: SchemaWriter sobre el que escribir las tablas del esquema
+        """
+        schema_file, _ = self.__paths__(dburl, filter, "json")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with atomic_open(schema_file, "w", encoding="utf-8", newline="") as f:
+            with SchemaWriter(f, database, indent=None, ensure_ascii=False) as writer:
+                yield writer
+        LazySchema.save_index(schema_file, writer.index)
+        self.__update_meta__(dburl, filter, "schema", fingerprint, versions=versions)
+
+    def load_metadata(self, dburl: str, filter: str, fingerprint: str) -> any:
+        """
+        Recupera los metadatos de SQLAlchemy de la caché si siguen siendo válidos
+            :returns: Objeto MetaData guardado, o None si no existe o está desactualizado
+        """
+        metadata_file, _ = self.__paths__(dburl, filter, "metadata.pickle")
+        if not self.__is_valid__(dburl, filter, "metadata", fingerprint):
+            return None
+        try:
+            with open(metadata_file, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def save_metadata(self, dburl: str, filter: str, fingerprint: str, metadata: any):
+        """
+        Guarda los metadatos de SQLAlchemy en la caché
+        """
+        metadata_file, _ = self.__paths__(dburl, filter, "metadata.pickle")
+        self.__write__(metadata_file, "wb", pickle.dumps(metadata))
+        self.__update_meta__(dburl, filter, "metadata", fingerprint)
+
+    def load_meta(self, dburl: str, filter: str) -> dict:
+        """
+        Recupera la información de la entrada de la caché (URL, filtro, huellas...)
+        """
+        _, meta_file = self.__paths__(dburl, filter, "json")
+        if not os.path.exists(meta_file):
+            return {}
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def __is_valid__(self, dburl: str, filter: str, kind: str, fingerprint: str) -> bool:
+        if fingerprint is None:
+            return False
+        return self.load_meta(dburl, filter).get("fingerprints", {}).get(kind) == fingerprint
+
+    def __update_meta__(self, dburl: str, filter: str, kind: str, fingerprint: str, **extra):
+        _, meta_file = self.__paths__(dburl, filter, "json")
+        meta = self.load_meta(dburl, filter)
+        meta["url"] = SchemaCache.__censored_url__(dburl)
+        meta["filter"] = filter or ""
+        meta.setdefault("fingerprints", {})[kind] = fingerprint
+        meta["updated"] = datetime.datetime.now().isoformat()
+        meta.update(extra)
+        self.__write__(meta_file, "w", json.dumps(meta, indent=4, ensure_ascii=False))
+
+    def __paths__(self, dburl: str, filter: str, extension: str) -> tuple[str, str]:
+        key = hashlib.sha256(f"{SchemaCache.__censored_url__(dburl)}|{filter or ''}".encode("utf-8")).hexdigest()[:32]
+        return (
+            os.path.join(self.cache_dir, f"{key}.{extension}"),
+            os.path.join(self.cache_dir, f"{key}.meta.json")
+        )
+
+    def __write__(self, file: str, mode: str, content):
+        """
+        Escribe el fichero de forma atómica (ver atomic_open), para no dejar entradas a medias
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with atomic_open(file, mode, **({} if "b" in mode else { "encoding": "utf-8" })) as f:
+            f.write(content)
+
+    @staticmethod
+    def __censored_url__(dburl: str) -> str:
+        return make_url(dburl).render_as_string(hide_password=True)
@@ -0,0 +1,59 @@
+import sys
+
+from dbschema.column import Column
+
+
+class CompactColumn:
+    """
+    Representación compacta en memoria de una columna, con la misma interfaz de lectura que Column.
+    Usa __slots__ (sin diccionario por instancia ni validación) e interna el nombre y el tipo,
+    de modo que las cadenas repetidas (p.ej. "VARCHAR(50)") se guardan una única vez.
+    """
+
+    __slots__ = ("name", "type", "nullable", "comment", "default")
+
+    def __init__(self, name: str, type: str, nullable: bool, comment: str = None, default: str = None):
+        self.name = sys.intern(name)
+        self.type = sys.intern(type)
+        self.nullable = nullable
+        self.comment = comment
+        self.default = default
+
+    @classmethod
+    def from_column(cls, column: Column) -> "CompactColumn":
+        return cls(column.name, column.type, column.nullable, column.comment, column.default)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompactColumn":
+        return cls(data["name"], data["type"], data["nullable"], data.get("comment"), data.get("default"))
+
+    def to_column(self) -> Column:
+        return Column.model_construct(**self.model_dump())
+
+    def model_dump(self) -> dict:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "nullable": self.nullable,
+            "comment": self.comment,
+            "default": self.default
+        }
+
+    def __lt__(self, other):
+        if not isinstance(other, CompactColumn):
+            return NotImplemented
+        return self.name < other.name
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactColumn):
+            return NotImplemented
+        return self.name == other.name
+
+    def __str__(self):
+        return f"{self.name}[{self.type}]"
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"CompactColumn({self.name} {self.type})"
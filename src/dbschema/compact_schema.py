@@ -0,0 +1,72 @@
+import json
+from typing import Iterator
+
+from dbschema.binary import read_binary, is_binary, KIND_SCHEMA
+from dbschema.compact_table import CompactTable
+from dbschema.schema import Schema
+
+
+class CompactSchema:
+    """
+    Representación compacta en memoria de un esquema (tablas CompactTable), con la misma interfaz de lectura que Schema.
+    Con esquemas muy grandes (miles de tablas y cientos de miles de columnas) ocupa una fracción de la memoria
+    de los modelos pydantic, ya que no guarda un diccionario por objeto ni duplica las cadenas repetidas.
+    """
+
+    __slots__ = ("tables", "_tables_index")
+
+    def __init__(self, tables: list[CompactTable] = None):
+        self.tables = tables or []
+
+    @classmethod
+    def from_schema(cls, schema: Schema) -> "CompactSchema":
+        return cls([ CompactTable.from_table(table) for table in schema.tables ])
+
+    @staticmethod
+    def load(file: str) -> "CompactSchema":
+        """
+        Carga un esquema de un fichero (json o binary) directamente en su representación compacta, sin validarlo con pydantic.
+        :param file: Ruta del fichero.
+        :return: Esquema cargado.
+        """
+        if is_binary(file):
+            with open(file, "rb") as f:
+                kind, _, tables = read_binary(f)
+            if kind != KIND_SCHEMA:
+                raise ValueError(f"El fichero '{file}' no contiene un esquema")
+            return CompactSchema([ CompactTable.from_table(table) for table in tables ])
+        with open(file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        tables = data["schema"]["tables"] if "schema" in data else data["tables"]
+        return CompactSchema([ CompactTable.from_dict(table) for table in tables ])
+
+    def to_schema(self) -> Schema:
+        """
+        Convierte el esquema en un objeto Schema.
+        """
+        return Schema(tables=[ table.to_table() for table in self.tables ])
+
+    def get_table(self, name: str) -> CompactTable | None:
+        """
+        Recupera una tabla del esquema por su nombre (sin distinguir mayúsculas).
+        """
+        if self._tables_index is None:
+            self._tables_index = {}
+            for table in self.tables:
+                self._tables_index.setdefault(table.name.lower(), table)
+        return self._tables_index.get(name.lower())
+
+    def invalidate_index(self):
+        self._tables_index = None
+
+    def __setattr__(self, name: str, value):
+        # Igual que en Schema: el índice se descarta al sustituir la lista de tablas
+        object.__setattr__(self, name, value)
+        if name == "tables":
+            self.invalidate_index()
+
+    def __iter__(self) -> Iterator[CompactTable]:
+        return iter(self.tables)
+
+    def __len__(self) -> int:
+        return len(self.tables)
@@ -0,0 +1,143 @@
+import sys
+from typing import NamedTuple
+
+from dbschema.compact_column import CompactColumn
+from dbschema.table import Table, print_table
+
+
+class CompactReference(NamedTuple):
+    table: str
+    column: str
+
+    def __str__(self):
+        return f"{self.table}.{self.column}"
+
+
+class CompactForeignKey(NamedTuple):
+    column: str
+    reference: CompactReference
+
+    def __str__(self):
+        return f"{self.column} -> {self.reference}"
+
+
+class CompactTable:
+    """
+    Representación compacta en memoria de una tabla, con la misma interfaz de lectura que Table
+    (search_columns, has_column, print...), pensada para esquemas muy grandes.
+    Las columnas son CompactColumn y las claves foráneas, tuplas con nombre.
+    """
+
+    __slots__ = ("name", "comment", "columns", "primary_keys", "foreign_keys", "schemaName", "_columns_index", "_foreign_keys_index")
+
+    def __init__(self, name: str, comment: str = None, columns: list[CompactColumn] = None, primary_keys: list[str] = None, foreign_keys: list[CompactForeignKey] = None, schemaName: str = None):
+        self.name = sys.intern(name)
+        self.comment = comment
+        self.columns = columns or []
+        self.primary_keys = [ sys.intern(pk) for pk in primary_keys or [] ]
+        self.foreign_keys = foreign_keys or []
+        self.schemaName = schemaName
+
+    @classmethod
+    def from_table(cls, table: Table) -> "CompactTable":
+        return cls(
+            name=table.name,
+            comment=table.comment,
+            columns=[ CompactColumn.from_column(column) for column in table.columns ],
+            primary_keys=table.primary_keys,
+            foreign_keys=[
+                CompactForeignKey(sys.intern(fk.column), CompactReference(sys.intern(fk.reference.table), sys.intern(fk.reference.column)))
+                for fk in table.foreign_keys
+            ],
+            schemaName=table.schemaName
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompactTable":
+        return cls(
+            name=data["name"],
+            comment=data.get("comment"),
+            columns=[ CompactColumn.from_dict(column) for column in data.get("columns", []) ],
+            primary_keys=data.get("primary_keys", []),
+            foreign_keys=[
+                CompactForeignKey(sys.intern(fk["column"]), CompactReference(sys.intern(fk["reference"]["table"]), sys.intern(fk["reference"]["column"])))
+                for fk in data.get("foreign_keys", [])
+            ],
+            schemaName=data.get("schemaName")
+        )
+
+    def to_table(self) -> Table:
+        """
+        Convierte la tabla en un objeto Table (p.ej. para guardarla o serializarla con pydantic).
+        """
+        return Table.model_validate(self.model_dump())
+
+    def model_dump(self) -> dict:
+        return {
+            "name": self.name,
+            "comment": self.comment,
+            "columns": [ column.model_dump() for column in self.columns ],
+            "primary_keys": list(self.primary_keys),
+            "foreign_keys": [
+                { "column": fk.column, "reference": { "table": fk.reference.table, "column": fk.reference.column } }
+                for fk in self.foreign_keys
+            ],
+            "schemaName": self.schemaName
+        }
+
+    def search_columns(self, search_term: str) -> list[CompactColumn]:
+        return [ column for column in self.columns if search_term.lower() in column.name.lower() or search_term.lower() in (column.comment or '').lower() ]
+
+    def has_column(self, column_name: str) -> bool:
+        return self.get_column(column_name) is not None
+
+    def get_column(self, name: str) -> CompactColumn | None:
+        """
+        Recupera una columna por su nombre (sin distinguir mayúsculas).
+        """
+        return self.__indexes__()[0].get(name.lower())
+
+    def get_foreign_keys(self, column_name: str) -> list[CompactForeignKey]:
+        """
+        Recupera las claves foráneas de una columna (sin distinguir mayúsculas).
+        """
+        return self.__indexes__()[1].get(column_name.lower(), [])
+
+    def invalidate_index(self):
+        self._columns_index = None
+        self._foreign_keys_index = None
+
+    def __setattr__(self, name: str, value):
+        # Igual que en Table: los índices se descartan al sustituir las columnas o las claves foráneas
+        object.__setattr__(self, name, value)
+        if name in ("columns", "foreign_keys"):
+            self.invalidate_index()
+
+    def __indexes__(self) -> tuple[dict, dict]:
+        if self._columns_index is None or self._foreign_keys_index is None:
+            self._columns_index = {}
+            for column in self.columns:
+                self._columns_index.setdefault(column.name.lower(), column)
+            self._foreign_keys_index = {}
+            for fk in self.foreign_keys:
+                self._foreign_keys_index.setdefault(fk.column.lower(), []).append(fk)
+        return self._columns_index, self._foreign_keys_index
+
+    def __lt__(self, other):
+        if not isinstance(other, CompactTable):
+            return NotImplemented
+        return self.name < other.name
+
+    def __str__(self):
+        return self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __eq__(self, value):
+        if not isinstance(value, CompactTable):
+            return NotImplemented
+        return self.name == value.name
+
+    def print(self):
+        print_table(self)
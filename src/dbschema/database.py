@@ -1,65 +1,332 @@
+import json
+import zlib
 from urllib.parse import urlparse
-from sqlalchemy import create_engine, inspect, MetaData, Select, text
-from sqlalchemy.engine import Connection, CursorResult
+from typing import Callable, Iterator
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import inspect, literal_column, select, table as table_clause, MetaData, Select, Table as TableMetadata, text
+from sqlalchemy.engine import Connection, CursorResult, Engine
 
+from dbschema.cache import SchemaCache, FINGERPRINT_QUERIES, TABLE_VERSION_QUERIES
+from dbschema.engines import get_engine
+from dbschema.lazy_schema import LazySchema
+from dbschema.query_stats import QueryStats
+from dbschema.reflector import BulkReflector, table_order
+from dbschema.row_counts import ROW_COUNT_QUERIES
+from dbschema.sampler import TableSampler
 from dbschema.table import Table
 from dbschema.schema import Schema
-from utils.encoding import serializable_dict
+from dbschema.schema_changes import SchemaChanges
+from utils.encoding import RowSerializer
 
 class Database:
 
+    engine : Engine = None
     connection : Connection = None
+    schema : Schema | LazySchema = None
+    table_names : list[str] = None
+    row_counts : dict[str, int] = None
+    stats : QueryStats = None
+    parent : "Database" = None
+    # Esquema con el que se ha construido el índice inverso de las claves foráneas (se compara por identidad)
+    __referencing_schema__ : Schema | LazySchema = None
 
-    def __init__(self, dburl: str):
+    def __init__(self, dburl: str, cache: SchemaCache = None, workers: int = 1, pool_options: dict = None):
         parsedurl = urlparse(dburl)
         self.dburl = dburl
         self.server = parsedurl.hostname
         self.port = parsedurl.port
         self.name = parsedurl.path[1:]
         self.type = parsedurl.scheme.split("+")[0]
+        self.cache = cache or SchemaCache()
+        self.workers = max(1, workers)
+        self.pool_options = pool_options or {}
     
     def connect(self):
         """
-        Conecta a la base de datos y recupera el inspector
+        Conecta a la base de datos y recupera el inspector.
+        El engine (y su pool de conexiones) se comparte con el resto de instancias con la misma URL en el proceso
         """
-        self.engine = create_engine(self.dburl)
+        # El pool debe admitir una conexión por hilo de trabajo, además de la conexión principal (si es el primero en crearlo)
+        self.engine = get_engine(self.dburl, self.workers + 1, **self.pool_options)
+        if self.stats is not None:
+            self.stats.attach(self.engine)
         self.connection = self.engine.connect()
         self.inspector = inspect(self.engine)
 
-    def get_schema(self, prefix=None) -> Schema:
+    def clone(self) -> "Database":
         """
-        Recupera el esquema de la base de datos
+        Crea otra instancia de la base de datos con su propia conexión del pool (p.ej. una por hilo de trabajo, ya que
+        las conexiones no se pueden compartir entre hilos), que comparte el esquema cargado, la caché, los nombres y el
+        número de filas de las tablas y las estadísticas
+            :returns: Base de datos conectada
+        """
+        database = Database(self.dburl, cache=self.cache, workers=self.workers, pool_options=self.pool_options)
+        database.parent = self
+        database.engine = self.engine
+        database.schema = self.schema
+        database.stats = self.stats
+        if self.table_names is not None:
+            database.table_names, database.__table_set__ = self.table_names, self.__table_set__
+        if self.row_counts is not None:
+            database.row_counts, database.__row_counts_index__ = self.row_counts, self.__row_counts_index__
+        database.connection = self.engine.connect()
+        database.inspector = inspect(self.engine)
+        return database
+
+    def close(self):
+        """
+        Devuelve la conexión al pool (el engine sigue disponible para otras instancias) y deja de medir las sentencias
+        (salvo en las copias creadas con clone, que comparten las estadísticas)
+        """
+        if self.stats is not None and self.parent is None:
+            self.stats.detach()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self) -> "Database":
+        if self.connection is None:
+            self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def enable_stats(self) -> QueryStats:
+        """
+        Activa la recogida de estadísticas de las sentencias ejecutadas (tiempos de ejecución, lectura y
+        serialización, filas y bytes), agrupadas por sentencia
+            :returns: Estadísticas de la base de datos (se van actualizando)
+        """
+        if self.stats is None:
+            self.stats = QueryStats()
+            if self.engine is not None:
+                self.stats.attach(self.engine)
+        return self.stats
+
+    def measure(self, statement: str | None, phase: str):
+        """
+        Mide el tiempo de un bloque de código como una fase (fetch o serialize) de una sentencia, si las estadísticas están activadas
+            :param statement: SQL de la sentencia ya compilado con compile (se compila una única vez para todas sus
+                mediciones), o None si las estadísticas no están activadas
+            :param phase: Fase de la sentencia
+        """
+        return self.stats.measure(statement, phase) if self.stats is not None and statement is not None else nullcontext()
+
+    def compile(self, query : Select | str) -> str:
+        """
+        Compila una sentencia con el dialecto de la base de datos: es el SQL que recibe el driver, con el que se agrupan
+        las estadísticas de su ejecución, así que las del resto de fases se deben registrar con el mismo SQL
+            :param query: Sentencia SQL
+            :returns: SQL de la sentencia
+        """
+        if isinstance(query, str):
+            query = text(query)
+        return str(query.compile(dialect=self.engine.dialect))
+
+    def get_schema(self, prefix=None, refresh=False) -> Schema:
+        """
+        Recupera el esquema de la base de datos (de la caché si el catálogo no ha cambiado)
             :param prefix: Prefijo para las tablas a incluir
+            :param refresh: Si es True, ignora la caché y vuelve a generar el esquema
             :returns: Esquema de la base de datos
         """
+        tables = list(self.iter_schema(prefix=prefix, refresh=refresh))
+        if not tables:
+            return None
+        self.schema = Schema(tables=tables)
+        return self.schema
+
+    def iter_schema(self, prefix=None, refresh=False) -> Iterator[Table]:
+        """
+        Recupera las tablas del esquema de la base de datos una a una, según se van generando
+        (de la caché si el catálogo no ha cambiado), de modo que no es necesario tener el esquema completo en memoria
+            :param prefix: Prefijo para las tablas a incluir
+            :param refresh: Si es True, ignora la caché y vuelve a generar el esquema
+            :returns: Iterador de las tablas del esquema, ordenadas por nombre (ver table_order)
+        """
+
+        # Comprueba si hay un esquema en la caché generado con la misma huella del catálogo
+        fingerprint = self.fingerprint()
+        if not refresh:
+            schema = self.cache.load(self.dburl, prefix, fingerprint, lazy=True)
+            if schema is not None:
+                print(f"- Esquema recuperado de la caché: ✅ {len(schema)} tablas")
+                self.schema = schema
+                yield from schema
+                return
 
         # Recuperando la lista de tablas de la base de datos con el prefijo indicado
-        table_names = self.list_tables(filter=prefix) if prefix else None
+        table_names = self.list_tables(filter=prefix, refresh=refresh)
 
         if not table_names:
             print(f"- Tablas a incluir: ❌ No se han encontrado tablas con el prefijo '{prefix}'")
+            return
+
+        print("- Tablas a incluir: ✅", table_names if prefix else "Todas")
+        if self.workers > 1:
+            # Reflejar las tablas en paralelo, una por hilo de trabajo
+            print(f"- Reflejando tablas en paralelo con {self.workers} hilos")
+            tables = self.iter_tables(table_names)
+        else:
+            # Cargar la estructura de la base de datos existente con unas pocas consultas al catálogo
+            tables = BulkReflector(self.connection).iter_tables(table_names)
+
+        # Guardar el esquema en la caché según se genera (sólo se guarda si se genera completo)
+        self.schema = None
+        if fingerprint is None:
+            yield from tables
+            return
+        versions = self.table_versions(prefix)
+        with self.cache.writer(self.dburl, prefix, fingerprint, self.__dict__(), versions) as writer:
+            for table in tables:
+                writer.write(table)
+                yield table
+
+    def refresh_schema(self, prefix=None) -> tuple[Schema, SchemaChanges]:
+        """
+        Actualiza de forma incremental el último esquema guardado en la caché, volviendo a reflejar
+        sólo las tablas añadidas o modificadas desde entonces y eliminando las que ya no existen
+            :param prefix: Prefijo para las tablas a incluir
+            :returns: Esquema actualizado y cambios detectados
+        """
+        fingerprint = self.fingerprint()
+        versions = self.table_versions(prefix)
+        self.get_table_names(refresh=True)
+        snapshot, old_versions = self.cache.load_snapshot(self.dburl, prefix)
+
+        # Sin instantánea previa (o sin soporte para versiones de tablas) se genera el esquema completo
+        if snapshot is None or versions is None:
+            print("- No hay una instantánea previa del esquema: ⚙️ se generará completo")
+            schema = self.get_schema(prefix=prefix, refresh=True)
+            names = [ table.name for table in schema.tables ] if schema else []
+            return schema, SchemaChanges(added=names)
+
+        changes = SchemaChanges.compare(old_versions, versions)
+        if not changes.has_changes():
+            print("- Esquema sin cambios desde la última instantánea ✅")
+            self.schema = snapshot
+            return snapshot, changes
+
+        # Vuelve a reflejar sólo las tablas añadidas o modificadas
+        tables = { table.name: table for table in snapshot.tables if table.name not in changes.removed }
+        for table in self.get_tables(changes.changed):
+            tables[table.name] = table
+
+        schema = Schema(tables=[ tables[name] for name in sorted(tables, key=table_order) ])
+        if fingerprint is not None:
+            self.cache.save(self.dburl, prefix, fingerprint, schema, self.__dict__(), versions=versions)
+        self.schema = schema
+        return schema, changes
+
+    def table_versions(self, prefix=None) -> dict[str, str]:
+        """
+        Recupera la versión de cada tabla (fecha de modificación o checksum de su definición)
+            :param prefix: Prefijo para las tablas a incluir
+            :returns: Diccionario con la versión de cada tabla, o None si no está soportado para este SGBD
+        """
+        query = TABLE_VERSION_QUERIES.get(self.connection.dialect.name)
+        if query is None:
+            return None
+        try:
+            rows = self.connection.execute(text(query)).mappings().all()
+        except Exception as e:
+            print(f"⚠️ No se han podido recuperar las versiones de las tablas: {e}")
+            self.connection.rollback()
             return None
+        return {
+            row["table_name"]: str(row["version"])
+            for row in rows
+            if not prefix or prefix in row["table_name"]
+        }
 
-        # Cargar la estructura de la base de datos existente
-        print("- Tablas a incluir: ✅", table_names or "Todas")
-        metadata = MetaData()
-        metadata.reflect(bind=self.engine, only=table_names)
+    def get_cached_schema(self, prefix=None) -> LazySchema:
+        """
+        Recupera el esquema de la base de datos sólo si está en la caché y sigue siendo válido (nunca refleja el catálogo)
+            :param prefix: Prefijo con el que se generó el esquema
+            :returns: Esquema de la base de datos, o None si no está en la caché
+        """
+        schema = self.cache.load(self.dburl, prefix, self.fingerprint(), lazy=True)
+        if schema is not None:
+            self.schema = schema
+        return schema
 
-        # Generar el esquema de la base de datos
-        return Schema.from_metadata(metadata, table_names)
+    def fingerprint(self) -> str:
+        """
+        Calcula una huella barata del catálogo de la base de datos, que cambia cuando cambia su estructura
+            :returns: Huella del catálogo, o None si no está soportado para este SGBD
+        """
+        query = FINGERPRINT_QUERIES.get(self.connection.dialect.name)
+        if query is None:
+            return None
+        try:
+            fingerprint = self.connection.execute(text(query)).scalar()
+            return str(fingerprint) if fingerprint is not None else None
+        except Exception as e:
+            print(f"⚠️ No se ha podido calcular la huella del catálogo, no se usará la caché: {e}")
+            self.connection.rollback()
+            return None
     
-    def get_table(self, name: str) -> Table:
+    def get_table(self, name: str, refresh=False) -> Table:
         """
         Recupera el esquema de una tabla específica en la base de datos
             :param name: Nombre de la tabla a recuperar
+            :param refresh: Si es True, refleja la tabla aunque esté en el esquema cargado
             :returns: Esquema de la tabla
         """
-        metadata = MetaData()
-        metadata.reflect(bind=self.engine, only=[name])
-        for table_name, table_metadata in metadata.tables.items():
-            if table_name.lower() == name.lower():
-                return Table.from_metadata(table_metadata)
-        return None
+        if self.schema is not None and not refresh:
+            table = self.schema.get_table(name)
+            if table is not None:
+                return table
+        return self.__reflect_table__(name)
+
+    def get_tables(self, names: list[str]) -> list[Table]:
+        """
+        Refleja varias tablas en paralelo (tantos hilos como workers), cada una con su propia conexión del pool
+            :param names: Nombres de las tablas a reflejar
+            :returns: Esquemas de las tablas encontradas, ordenados por nombre (ver table_order)
+        """
+        return list(self.iter_tables(names))
+
+    def iter_tables(self, names: list[str]) -> Iterator[Table]:
+        """
+        Refleja varias tablas en paralelo, devolviéndolas en orden según van estando disponibles
+            :param names: Nombres de las tablas a reflejar
+            :returns: Iterador de las tablas encontradas, ordenadas por nombre (ver table_order)
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for table in executor.map(self.__reflect_table__, sorted(names, key=table_order)):
+                if table is not None:
+                    yield table
+
+    def get_referencing_tables(self, name: str) -> list[str]:
+        """
+        Recupera las tablas con claves foráneas que hacen referencia a una tabla, según el esquema cargado
+        (el índice inverso de las claves foráneas se construye la primera vez y se comparte con las copias creadas con clone)
+            :param name: Nombre de la tabla referenciada
+            :returns: Nombres de las tablas que la referencian (ninguna si no hay un esquema cargado)
+        """
+        if self.parent is not None:
+            return self.parent.get_referencing_tables(name)
+        if self.schema is None:
+            return []
+        if self.__referencing_schema__ is not self.schema:
+            index = {}
+            # El esquema perezoso se recorre sin retener las tablas en memoria
+            for table in (self.schema if isinstance(self.schema, LazySchema) else self.schema.tables):
+                for fk in table.foreign_keys:
+                    referencing = index.setdefault(fk.reference.table.lower(), [])
+                    if table.name not in referencing:
+                        referencing.append(table.name)
+            self.__referencing_index__, self.__referencing_schema__ = index, self.schema
+        return self.__referencing_index__.get(name.lower(), [])
+
+    def __reflect_table__(self, name: str) -> Table:
+        # Sólo se refleja la propia tabla: sin resolver las claves foráneas no se reflejan también las tablas a las que hace referencia
+        with self.engine.connect() as connection:
+            table_metadata = TableMetadata(name, MetaData(), autoload_with=connection, resolve_fks=False)
+        return Table.from_metadata(table_metadata)
     
     def table_exists(self, name: str) -> bool:
         """
@@ -67,16 +334,29 @@ class Database:
             :param name: Nombre de la tabla a verificar
             :returns: True si la tabla existe, False en caso contrario
         """
-        return name in self.inspector.get_table_names()
+        self.get_table_names()
+        return name in self.__table_set__
 
-    def list_tables(self, filter=None) -> list[str]:
+    def get_table_names(self, refresh=False) -> list[str]:
+        """
+        Recupera los nombres de todas las tablas de la base de datos, consultando el catálogo sólo la primera vez
+            :param refresh: Si es True, vuelve a consultar el catálogo
+            :returns: Lista de nombres de tablas
+        """
+        if self.table_names is None or refresh:
+            self.table_names = self.inspector.get_table_names()
+            self.__table_set__ = set(self.table_names)
+        return self.table_names
+
+    def list_tables(self, filter=None, refresh=False) -> list[str]:
         """
         Recupera la lista de tablas de la base de datos
             :param filter: Filtro para las tablas
+            :param refresh: Si es True, vuelve a consultar el catálogo en lugar de usar la lista ya recuperada
             :returns: Lista de nombres de tablas
         """
         tables = []
-        for table_name in self.inspector.get_table_names():
+        for table_name in self.get_table_names(refresh=refresh):
             if filter and not filter in table_name:
                 continue
             tables.append(table_name)
@@ -106,16 +386,71 @@ class Database:
     def __str__(self):
         return f"Database: {self.name} ({self.type})"
     
-    def count_rows(self, table_name: str) -> int:
+    def count_rows(self, table_name: str, exact=False) -> int:
         """
-        Cuenta el número de filas de una tabla
+        Cuenta el número de filas de una tabla. Por defecto devuelve la estimación de las estadísticas del catálogo
+        (sin recorrer la tabla) y sólo hace un COUNT(*) si no hay estimación para la tabla o si se indica exact
             :param table_name: Nombre de la tabla a contar
-            :returns: Número de filas de la tabla
+            :param exact: Si es True, cuenta las filas con COUNT(*) aunque haya una estimación
+            :returns: Número (aproximado, salvo con exact) de filas de la tabla
         """
+        if not exact:
+            estimate = self.__estimate_row_count__(table_name)
+            # Una estimación de 0 filas puede deberse a estadísticas desactualizadas: se comprueba si la tabla está vacía
+            if estimate is not None and (estimate > 0 or not self.__has_rows__(table_name)):
+                return estimate
         query = text(f"SELECT COUNT(*) as total FROM {table_name}")
         result = self.execute(query)
         return result[0]['total'] if result else 0
     
+    def estimate_row_counts(self, refresh=False) -> dict[str, int]:
+        """
+        Recupera el número aproximado de filas de todas las tablas con una única consulta a las estadísticas del catálogo
+        (la primera vez; después se reutiliza el resultado)
+            :param refresh: Si es True, vuelve a consultar el catálogo
+            :returns: Diccionario con el número aproximado de filas de cada tabla (sólo las tablas con estadísticas),
+                o None si no está soportado para este SGBD
+        """
+        if self.row_counts is not None and not refresh:
+            return self.row_counts
+        query = ROW_COUNT_QUERIES.get(self.connection.dialect.name)
+        if query is None:
+            return None
+        try:
+            rows = self.connection.execute(text(query)).mappings().all()
+        except Exception as e:
+            print(f"⚠️ No se ha podido recuperar el número aproximado de filas de las tablas: {e}")
+            self.connection.rollback()
+            rows = []
+        self.row_counts = { row["table_name"]: int(row["row_count"]) for row in rows if row["row_count"] is not None }
+        self.__row_counts_index__ = { name.lower(): count for name, count in self.row_counts.items() }
+        return self.row_counts
+
+    def __estimate_row_count__(self, table_name: str) -> int:
+        row_counts = self.estimate_row_counts()
+        if row_counts is None:
+            return None
+        count = row_counts.get(table_name)
+        return count if count is not None else self.__row_counts_index__.get(table_name.lower())
+
+    def __has_rows__(self, table_name: str) -> bool:
+        query = select(literal_column("1")).select_from(table_clause(table_name)).limit(1)
+        return self.connection.execute(query).first() is not None
+
+    def sample(self, table_name: str, limit: int = 10, seed: int = None) -> list[dict]:
+        """
+        Obtiene una muestra aleatoria de las filas de una tabla, con un coste que no depende del tamaño de la tabla
+        (TABLESAMPLE, saltos aleatorios por la clave primaria o desplazamientos aleatorios, según el SGBD).
+        La muestra es reproducible: mientras no cambien los datos, se obtienen siempre las mismas filas
+            :param table_name: Nombre de la tabla a muestrear
+            :param limit: Número máximo de filas de la muestra
+            :param seed: Semilla del muestreo. Por defecto, una derivada del nombre de la tabla
+            :returns: Filas de la muestra
+        """
+        if seed is None:
+            seed = zlib.crc32(table_name.encode("utf-8")) & 0x7fffffff
+        return TableSampler(self, seed).sample(table_name, limit)
+
     def execute(self, query : Select | str) -> list[dict]:
         """
         Ejecuta una consulta SQL en la base de datos
@@ -123,6 +458,55 @@ class Database:
             :returns: Resultado de la consulta
         """
         result : CursorResult = self.connection.execute(query)
-        result = result.mappings().all()
-        result = [ serializable_dict(dict(row)) for row in result ]
-        return result
+        statement = self.compile(query) if self.stats is not None else None
+        with self.measure(statement, "fetch"):
+            rows = result.all()
+        with self.measure(statement, "serialize"):
+            serializer = RowSerializer.from_result(result)
+            rows = serializer.serialize(rows)
+        if self.stats is not None:
+            self.stats.record(statement, rows=len(rows), bytes=Database.__json_size__(rows))
+        return rows
+
+    def stream(self, query : Select | str, batch_size: int = 10000, raw: bool = False, connection: Connection = None, on_result: Callable[[CursorResult], None] = None) -> Iterator[list[dict]]:
+        """
+        Ejecuta una consulta SQL en la base de datos y devuelve el resultado por lotes, con un cursor del lado
+        del servidor, de modo que la memoria utilizada no depende del tamaño del resultado
+            :param query: Consulta SQL a ejecutar
+            :param batch_size: Número de filas de cada lote
+            :param raw: Si es True, devuelve las filas tal cual (Row), sin convertirlas en diccionarios serializables
+            :param connection: Conexión a utilizar (p.ej. una por hilo, del pool del engine). Por defecto, la conexión principal
+            :param on_result: Función que recibe el resultado antes de leer el primer lote (p.ej. Exporter.prepare, para
+                conocer los tipos de las columnas que informa el driver)
+            :returns: Iterador de los lotes de filas del resultado
+        """
+        if isinstance(query, str):
+            query = text(query)
+        # Las opciones se pasan a la ejecución, no a la conexión, que las conservaría para las siguientes consultas
+        connection = connection or self.connection
+        result : CursorResult = connection.execute(query, execution_options={ "stream_results": True, "yield_per": batch_size })
+        if on_result is not None:
+            on_result(result)
+        serializer = RowSerializer.from_result(result) if not raw else None
+        partitions = result.partitions(batch_size)
+        # Se compila una única vez para todos los lotes
+        statement = self.compile(query) if self.stats is not None else None
+        try:
+            while True:
+                with self.measure(statement, "fetch"):
+                    partition = next(partitions, None)
+                if partition is None:
+                    break
+                if not raw:
+                    with self.measure(statement, "serialize"):
+                        partition = serializer.serialize(partition)
+                if self.stats is not None:
+                    self.stats.record(statement, rows=len(partition), bytes=Database.__json_size__(partition) if not raw else 0)
+                yield partition
+        finally:
+            result.close()
+
+    @staticmethod
+    def __json_size__(rows: list[dict]) -> int:
+        # Tamaño aproximado del resultado serializado (sólo se calcula con las estadísticas activadas)
+        return len(json.dumps(rows, ensure_ascii=False).encode("utf-8"))
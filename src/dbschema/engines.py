@@ -0,0 +1,56 @@
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+"""
+Registro de engines de SQLAlchemy del proceso, uno por URL de conexión (y opciones del pool configuradas).
+Todas las instancias de Database con la misma URL comparten el engine y su pool de conexiones, de modo que
+las herramientas que se ejecutan varias veces en el mismo proceso (p.ej. scripts que importan dbschema)
+no vuelven a pagar el coste de establecer las conexiones.
+"""
+
+# Opciones del pool por defecto: se comprueba la conexión antes de usarla (pre-ping) y se renueva cada hora,
+# para no reutilizar conexiones cerradas por el servidor o por un firewall tras un tiempo inactivas
+DEFAULT_POOL_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+# Tamaño mínimo del pool y conexiones adicionales por defecto (los de SQLAlchemy), si no se configuran
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+
+__engines__ : dict[tuple, Engine] = {}
+__lock__ = threading.Lock()
+
+
+def get_engine(dburl: str, connections: int = 1, **options) -> Engine:
+    """
+    Devuelve el engine de una URL de conexión, creándolo sólo la primera vez.
+    El tamaño del pool se decide al crearlo: el configurado (pool_size) o, si no, el suficiente para las conexiones que
+    necesita el primero que lo pide (como mínimo DEFAULT_POOL_SIZE). No depende de cada llamada, para que todas
+    las instancias con la misma URL compartan el engine aunque usen distinto número de hilos.
+    :param dburl: URL de conexión a la base de datos.
+    :param connections: Número de conexiones simultáneas que se van a usar (p.ej. una por hilo de trabajo y la principal).
+    :param options: Opciones del pool configuradas (pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping).
+    :return: Engine compartido por todas las conexiones a la misma URL con las mismas opciones configuradas.
+    """
+    options = { **DEFAULT_POOL_OPTIONS, **{ key: value for key, value in options.items() if value is not None } }
+    key = (dburl, tuple(sorted(options.items())))
+    with __lock__:
+        engine = __engines__.get(key)
+        if engine is None:
+            options.setdefault("pool_size", max(DEFAULT_POOL_SIZE, connections))
+            options.setdefault("max_overflow", DEFAULT_MAX_OVERFLOW)
+            engine = __engines__[key] = create_engine(dburl, **options)
+        return engine
+
+
+def dispose_engines():
+    """
+    Cierra todas las conexiones de los pools y vacía el registro.
+    """
+    with __lock__:
+        for engine in __engines__.values():
+            engine.dispose()
+        __engines__.clear()
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import mmap
+from typing import Iterator
+
+from dbschema.table import Table
+from utils.files import atomic_open
+
+INDEX_EXTENSION = ".idx"
+INDEX_VERSION = 1
+
+# Tokens relevantes del JSON para localizar las tablas: cadenas, llaves, corchetes y dos puntos
+JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]:]')
+NAME_KEY = b'"name"'
+
+
+class LazySchema:
+    """
+    Esquema cargado de forma perezosa desde un fichero JSON generado por dbschema.
+    En lugar de validar todas las tablas al cargar el fichero, utiliza un índice con la posición de cada tabla
+    (guardado junto al fichero JSON, en {fichero}.idx) y sólo construye cada Table cuando se accede a ella.
+    """
+
+    def __init__(self, json_file: str):
+        """
+        :param json_file: Ruta del fichero JSON con el esquema.
+        """
+        self.json_file = json_file
+        self.__file__ = open(json_file, "rb")
+        self.__data__ = mmap.mmap(self.__file__.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(json_file) > 0 else b""
+        self.__index__ = LazySchema.load_index(json_file)
+        if self.__index__ is None:
+            self.__index__ = LazySchema.build_index(self.__data__)
+            LazySchema.save_index(json_file, self.__index__)
+        self.__positions__ = { name.lower(): (start, end) for name, start, end in self.__index__ }
+        self.__tables__ = {}
+
+    def __enter__(self) -> "LazySchema":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if isinstance(self.__data__, mmap.mmap):
+            self.__data__.close()
+        self.__file__.close()
+
+    def names(self) -> list[str]:
+        """
+        Nombres de las tablas del esquema (sin cargarlas).
+        """
+        return [ name for name, _, _ in self.__index__ ]
+
+    def get_table(self, name: str) -> Table | None:
+        """
+        Recupera una tabla por su nombre (sin distinguir mayúsculas), validándola sólo la primera vez.
+        :param name: Nombre de la tabla.
+        :return: Tabla, o None si no existe en el esquema.
+        """
+        key = name.lower()
+        table = self.__tables__.get(key)
+        if table is None and key in self.__positions__:
+            table = self.__load_table__(*self.__positions__[key])
+            self.__tables__[key] = table
+        return table
+
+    @property
+    def tables(self) -> list[Table]:
+        """
+        Todas las tablas del esquema (las carga todas, como Schema.tables).
+        """
+        return [ self.get_table(name) for name in self.names() ]
+
+    def __iter__(self) -> Iterator[Table]:
+        """
+        Recorre todas las tablas del esquema en orden, sin retenerlas en memoria (salvo las que ya se hayan cargado).
+        """
+        for name, start, end in self.__index__:
+            yield self.__tables__.get(name.lower()) or self.__load_table__(start, end)
+
+    def __len__(self) -> int:
+        return len(self.__index__)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.__positions__
+
+    def __load_table__(self, start: int, end: int) -> Table:
+        return Table.model_validate(json.loads(self.__data__[start:end]))
+
+    @staticmethod
+    def build_index(data: bytes) -> list[tuple[str, int, int]]:
+        """
+        Construye el índice de las tablas recorriendo el JSON sin llegar a construir los objetos.
+        Admite tanto documentos {"database": ..., "schema": {"tables": [...]}} como {"tables": [...]}.
+        :param data: Contenido del fichero JSON.
+        :return: Lista de (nombre, inicio, fin) de cada tabla, con posiciones en bytes.
+        """
+        index = []
+        stack = []          # clave bajo la que se ha abierto cada contenedor (objeto o array)
+        key = None          # última clave leída
+        last_string = None
+        start = None        # posición de inicio de la tabla actual
+        name = None
+        awaiting_name = False
+        for match in JSON_TOKEN.finditer(data):
+            token = match.group()
+            char = token[:1]
+            if char == b'"':
+                if awaiting_name:
+                    name = json.loads(token)
+                last_string = token
+                awaiting_name = False
+            elif char == b':':
+                key = last_string
+                # La clave "name" directamente dentro de una tabla (no de sus columnas)
+                awaiting_name = start is not None and key == NAME_KEY and LazySchema.__in_tables__(stack[:-1])
+            elif char in (b'{', b'['):
+                if char == b'{' and start is None and LazySchema.__in_tables__(stack):
+                    start = match.start()
+                    name = None
+                stack.append(key)
+                key = None
+                awaiting_name = False
+            else:
+                stack.pop()
+                if char == b'}' and start is not None and LazySchema.__in_tables__(stack):
+                    index.append((name, start, match.end()))
+                    start = None
+                awaiting_name = False
+        return index
+
+    @staticmethod
+    def __in_tables__(path: list) -> bool:
+        return path == [ None, b'"schema"', b'"tables"' ] or path == [ None, b'"tables"' ]
+
+    @staticmethod
+    def load_index(json_file: str) -> list[tuple[str, int, int]] | None:
+        """
+        Carga el índice guardado junto al fichero JSON, si existe y corresponde a la versión actual del fichero.
+        """
+        index_file = json_file + INDEX_EXTENSION
+        if not os.path.exists(index_file):
+            return None
+        try:
+            with open(index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            stat = os.stat(json_file)
+            if index.get("version") != INDEX_VERSION or index.get("size") != stat.st_size or index.get("mtime_ns") != stat.st_mtime_ns:
+                return None
+            return [ tuple(entry) for entry in index["tables"] ]
+        except Exception:
+            return None
+
+    @staticmethod
+    def save_index(json_file: str, index: list[tuple[str, int, int]]):
+        """
+        Guarda el índice de las tablas junto al fichero JSON ({fichero}.idx), de forma atómica.
+        Si no se puede guardar (p.ej. directorio de sólo lectura), se ignora y se volverá a construir la próxima vez.
+        """
+        try:
+            stat = os.stat(json_file)
+            with atomic_open(json_file + INDEX_EXTENSION, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "tables": index
+                }, f, ensure_ascii=False)
+        except OSError:
+            pass
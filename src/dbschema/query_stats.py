@@ -0,0 +1,164 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from tabulate import tabulate
+
+PHASES = [ "execute", "fetch", "serialize" ]
+
+# Normalización de las sentencias para agruparlas por su "huella" (sin literales ni espacios)
+COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+STRINGS = re.compile(r"N?'(?:[^']|'')*'")
+NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+SPACES = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normaliza una sentencia SQL para agrupar las que sólo se diferencian en sus literales
+    (p.ej. "SELECT * FROM t WHERE id = 5" -> "select * from t where id = ?").
+    """
+    sql = COMMENTS.sub(" ", str(sql))
+    sql = STRINGS.sub("?", sql)
+    sql = NUMBERS.sub("?", sql)
+    sql = IN_LISTS.sub("(?...)", sql)
+    return SPACES.sub(" ", sql).strip().lower()
+
+
+class QueryStats:
+    """
+    Estadísticas de las sentencias ejecutadas en una base de datos, agrupadas por su huella:
+    número de ejecuciones, tiempo de ejecución, de lectura de las filas y de serialización, filas y bytes.
+    El tiempo de ejecución se mide con los eventos del engine (incluye las consultas al catálogo);
+    el resto lo registra Database (o quien lea y serialice el resultado) con measure() y record().
+    """
+
+    def __init__(self):
+        self.queries = {}
+        self.__lock__ = threading.Lock()
+        self.__engine__ = None
+
+    def attach(self, engine: Engine):
+        """
+        Empieza a medir el tiempo de ejecución de todas las sentencias del engine.
+        """
+        self.detach()
+        event.listen(engine, "before_cursor_execute", self.__before_cursor_execute__)
+        event.listen(engine, "after_cursor_execute", self.__after_cursor_execute__)
+        event.listen(engine, "handle_error", self.__handle_error__)
+        self.__engine__ = engine
+
+    def detach(self):
+        """
+        Deja de medir las sentencias del engine.
+        """
+        if self.__engine__ is not None:
+            event.remove(self.__engine__, "before_cursor_execute", self.__before_cursor_execute__)
+            event.remove(self.__engine__, "after_cursor_execute", self.__after_cursor_execute__)
+            event.remove(self.__engine__, "handle_error", self.__handle_error__)
+            self.__engine__ = None
+
+    def record(self, sql: str, executions: int = 0, rows: int = 0, bytes: int = 0, **phases: float):
+        """
+        Acumula las estadísticas de una sentencia.
+        :param sql: Sentencia SQL.
+        :param executions: Número de ejecuciones a sumar.
+        :param rows: Número de filas a sumar.
+        :param bytes: Número de bytes a sumar.
+        :param phases: Segundos a sumar a cada fase (execute, fetch, serialize).
+        """
+        key = fingerprint(sql)
+        with self.__lock__:
+            stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = {
+                    "id": hashlib.sha1(key.encode("utf-8")).hexdigest()[:12],
+                    "sql": key,
+                    "executions": 0,
+                    **{ phase: 0.0 for phase in PHASES },
+                    "rows": 0,
+                    "bytes": 0
+                }
+            stats["executions"] += executions
+            stats["rows"] += rows
+            stats["bytes"] += bytes
+            for phase, seconds in phases.items():
+                stats[phase] += seconds
+
+    @contextmanager
+    def measure(self, sql: str, phase: str):
+        """
+        Mide el tiempo de un bloque de código y lo suma a una fase de la sentencia.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(sql, **{ phase: time.perf_counter() - start })
+
+    def to_dict(self) -> dict:
+        with self.__lock__:
+            queries = sorted(self.queries.values(), key=QueryStats.__total__, reverse=True)
+            queries = [ dict(stats) for stats in queries ]
+        totals = { phase: round(sum(stats[phase] for stats in queries), 6) for phase in PHASES }
+        totals.update({ key: sum(stats[key] for stats in queries) for key in ("executions", "rows", "bytes") })
+        for stats in queries:
+            for phase in PHASES:
+                stats[phase] = round(stats[phase], 6)
+        return { "totals": totals, "queries": queries }
+
+    def save(self, json_file: str):
+        """
+        Guarda las estadísticas en un fichero JSON (ordenadas por tiempo total, de mayor a menor).
+        """
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+    def print(self, limit: int = 10):
+        """
+        Muestra las sentencias que más tiempo han consumido.
+        """
+        stats = self.to_dict()
+        headers = [ "ID", "EXEC", "EXECUTE (s)", "FETCH (s)", "SERIALIZE (s)", "ROWS", "BYTES", "SQL" ]
+        data = [
+            [ query["id"], query["executions"], f"{query['execute']:.3f}", f"{query['fetch']:.3f}", f"{query['serialize']:.3f}", query["rows"], query["bytes"], query["sql"][:60] ]
+            for query in stats["queries"][:limit]
+        ]
+        print(tabulate(data, headers=headers, tablefmt="grid", disable_numparse=True))
+        totals = stats["totals"]
+        print(f"Total: {totals['executions']} ejecuciones, execute {totals['execute']:.3f}s, fetch {totals['fetch']:.3f}s, serialize {totals['serialize']:.3f}s, {totals['rows']} filas")
+
+    @staticmethod
+    def __total__(stats: dict) -> float:
+        return sum(stats[phase] for phase in PHASES)
+
+    # El inicio de cada ejecución se guarda en la conexión por cursor, y se descarta al terminar o al fallar
+
+    def __before_cursor_execute__(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_stats_start", {})[id(cursor)] = time.perf_counter()
+
+    def __after_cursor_execute__(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_stats_start"].pop(id(cursor))
+        self.record(statement, executions=1, execute=time.perf_counter() - start)
+
+    def __handle_error__(self, context):
+        # Si la ejecución falla no se invoca after_cursor_execute
+        cursor = getattr(context.execution_context, "cursor", None)
+        if context.connection is not None and cursor is not None:
+            context.connection.info.get("query_stats_start", {}).pop(id(cursor), None)
+
+
+def save_profile(stats: QueryStats, json_file: str):
+    """
+    Muestra y guarda las estadísticas de las sentencias ejecutadas (opción --profile de las herramientas).
+    """
+    print("\n⏱️ Perfil de las sentencias ejecutadas:")
+    stats.print()
+    stats.save(json_file)
+    print(f"✅ Perfil guardado en: {json_file}")
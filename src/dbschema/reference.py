@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from sqlalchemy.exc import NoReferencedTableError
 
 class Reference(BaseModel):
 
@@ -7,7 +8,13 @@ class Reference(BaseModel):
 
     @classmethod
     def from_metadata(cls, fk_metadata: any):
-        column_metadata = fk_metadata.column
+        try:
+            column_metadata = fk_metadata.column
+        except NoReferencedTableError:
+            # La tabla referenciada no está en los metadatos (p.ej. al reflejar una tabla sin resolver sus claves foráneas):
+            # se toman del destino de la clave, "[esquema.]tabla.columna"
+            table_name, column_name = fk_metadata.target_fullname.rsplit(".", 1)
+            return cls(table = table_name.rsplit(".", 1)[-1], column = column_name)
         return cls(
             table = column_metadata.table.name,
             column = column_metadata.name
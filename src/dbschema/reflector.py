@@ -0,0 +1,262 @@
+from typing import Iterator
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.types import NullType, Numeric, Float, String, _Binary
+
+from dbschema.column import Column
+from dbschema.foreign_key import ForeignKey
+from dbschema.reference import Reference
+from dbschema.table import Table
+
+"""
+Consultas al catálogo para la reflexión masiva de los SGBD soportados.
+Cada consulta recupera la información de todas las tablas del esquema por defecto de una sola vez:
+- table_comments: (table_name, comment)
+- primary_keys: (table_name, column_name) ordenadas por posición en la clave
+- foreign_keys: (table_name, column_name, referred_table, referred_column) ordenadas por restricción y posición
+- columns: (table_name, column_name, data_type, char_length, numeric_precision, numeric_scale, is_nullable, comment) ordenadas por tabla y posición
+PostgreSQL no aparece porque el inspector de SQLAlchemy ya hace la reflexión masiva sobre pg_catalog.
+"""
+CATALOG_QUERIES = {
+    "mssql": {
+        "table_comments": """
+            SELECT t.name AS table_name, CAST(ep.value AS NVARCHAR(4000)) AS comment
+            FROM sys.tables t
+            JOIN sys.extended_properties ep ON ep.major_id = t.object_id AND ep.minor_id = 0 AND ep.class = 1 AND ep.name = 'MS_Description'
+            WHERE t.schema_id = SCHEMA_ID()
+        """,
+        "primary_keys": """
+            SELECT kcu.TABLE_NAME AS table_name, kcu.COLUMN_NAME AS column_name
+            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+            JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+                ON kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME AND kcu.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND kcu.TABLE_NAME = tc.TABLE_NAME
+            WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY' AND tc.TABLE_SCHEMA = SCHEMA_NAME()
+            ORDER BY kcu.TABLE_NAME, kcu.ORDINAL_POSITION
+        """,
+        "foreign_keys": """
+            SELECT pt.name AS table_name, pc.name AS column_name, rt.name AS referred_table, rc.name AS referred_column
+            FROM sys.foreign_key_columns fkc
+            JOIN sys.tables pt ON pt.object_id = fkc.parent_object_id
+            JOIN sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+            JOIN sys.tables rt ON rt.object_id = fkc.referenced_object_id
+            JOIN sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+            WHERE pt.schema_id = SCHEMA_ID()
+            ORDER BY pt.name, fkc.constraint_object_id, fkc.constraint_column_id
+        """,
+        "columns": """
+            SELECT c.TABLE_NAME AS table_name, c.COLUMN_NAME AS column_name, c.DATA_TYPE AS data_type,
+                c.CHARACTER_MAXIMUM_LENGTH AS char_length, c.NUMERIC_PRECISION AS numeric_precision, c.NUMERIC_SCALE AS numeric_scale,
+                c.IS_NULLABLE AS is_nullable, CAST(ep.value AS NVARCHAR(4000)) AS comment
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            LEFT JOIN sys.extended_properties ep
+                ON ep.major_id = OBJECT_ID(QUOTENAME(c.TABLE_SCHEMA) + '.' + QUOTENAME(c.TABLE_NAME))
+                AND ep.minor_id = COLUMNPROPERTY(ep.major_id, c.COLUMN_NAME, 'ColumnId')
+                AND ep.class = 1 AND ep.name = 'MS_Description'
+            WHERE c.TABLE_SCHEMA = SCHEMA_NAME()
+            ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+        """,
+    },
+    "mysql": {
+        "table_comments": """
+            SELECT TABLE_NAME AS table_name, TABLE_COMMENT AS comment
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_COMMENT <> ''
+        """,
+        "primary_keys": """
+            SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND CONSTRAINT_NAME = 'PRIMARY'
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """,
+        "foreign_keys": """
+            SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, REFERENCED_TABLE_NAME AS referred_table, REFERENCED_COLUMN_NAME AS referred_column
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+            ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+        """,
+        "columns": """
+            SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, DATA_TYPE AS data_type,
+                CHARACTER_MAXIMUM_LENGTH AS char_length, NUMERIC_PRECISION AS numeric_precision, NUMERIC_SCALE AS numeric_scale,
+                IS_NULLABLE AS is_nullable, NULLIF(COLUMN_COMMENT, '') AS comment
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """,
+    },
+}
+
+# Número de tablas por lote cuando se usa el inspector de SQLAlchemy
+INSPECTOR_CHUNK_SIZE = 500
+
+
+def table_order(name: str) -> tuple[str, str]:
+    """
+    Clave con la que se ordenan las tablas reflejadas: por nombre sin distinguir mayúsculas (como la intercalación
+    habitual de SQL Server y MySQL) y, a igualdad, por el nombre exacto. Es la misma con cualquier SGBD y número de hilos.
+    """
+    return (name.lower(), name)
+
+
+class BulkReflector:
+    """
+    Reflexión masiva del esquema de la base de datos.
+    En lugar de reflejar tabla a tabla con MetaData.reflect, lanza unas pocas consultas al catálogo
+    para todas las tablas y construye directamente los objetos Table/Column del esquema.
+    """
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.dialect = connection.dialect
+
+    def reflect(self, table_names: list[str]) -> list[Table]:
+        """
+        Refleja las tablas indicadas
+            :param table_names: Nombres de las tablas a reflejar
+            :returns: Lista de tablas, ordenadas por nombre (ver table_order)
+        """
+        return list(self.iter_tables(table_names))
+
+    def iter_tables(self, table_names: list[str]) -> Iterator[Table]:
+        """
+        Refleja las tablas indicadas, devolviéndolas una a una según se construyen
+            :param table_names: Nombres de las tablas a reflejar
+            :returns: Iterador de tablas, ordenadas por nombre (ver table_order)
+        """
+        if self.dialect.name in CATALOG_QUERIES:
+            return BulkReflector.__in_order__(self.__iter_catalog_tables__(table_names), table_names)
+        return self.__iter_inspector_tables__(table_names)
+
+    def __iter_catalog_tables__(self, table_names: list[str]) -> Iterator[Table]:
+        queries = CATALOG_QUERIES[self.dialect.name]
+        selected = set(table_names)
+
+        # Comentarios, claves primarias y foráneas (pequeños, se cargan completos)
+        comments = {}
+        for row in self.__query__(queries["table_comments"]):
+            if row["table_name"] in selected:
+                comments[row["table_name"]] = row["comment"]
+        primary_keys = {}
+        for row in self.__query__(queries["primary_keys"]):
+            if row["table_name"] in selected:
+                primary_keys.setdefault(row["table_name"], []).append(row["column_name"])
+        foreign_keys = {}
+        for row in self.__query__(queries["foreign_keys"]):
+            if row["table_name"] in selected:
+                foreign_keys.setdefault(row["table_name"], []).append(
+                    ForeignKey(
+                        column=row["column_name"],
+                        reference=Reference(table=row["referred_table"], column=row["referred_column"])
+                    )
+                )
+
+        # Columnas (la parte grande): se recorren en streaming y se agrupan por tabla
+        current_name = None
+        columns = []
+        result = self.connection.execute(text(queries["columns"]), execution_options={ "stream_results": True })
+        for row in result.mappings():
+            table_name = row["table_name"]
+            if table_name not in selected:
+                continue
+            if table_name != current_name:
+                if current_name is not None:
+                    yield self.__build_table__(current_name, comments, columns, primary_keys, foreign_keys)
+                current_name = table_name
+                columns = []
+            columns.append(
+                Column(
+                    name=row["column_name"],
+                    type=Column.__prettify_type__(self.__build_type__(row)),
+                    nullable=row["is_nullable"] == "YES",
+                    comment=row["comment"],
+                    default=None,
+                )
+            )
+        if current_name is not None:
+            yield self.__build_table__(current_name, comments, columns, primary_keys, foreign_keys)
+
+    def __iter_inspector_tables__(self, table_names: list[str]) -> Iterator[Table]:
+        inspector = inspect(self.connection)
+        names = sorted(table_names, key=table_order)
+        for i in range(0, len(names), INSPECTOR_CHUNK_SIZE):
+            chunk = names[i:i + INSPECTOR_CHUNK_SIZE]
+            multi_columns = inspector.get_multi_columns(filter_names=chunk)
+            multi_pks = inspector.get_multi_pk_constraint(filter_names=chunk)
+            multi_fks = inspector.get_multi_foreign_keys(filter_names=chunk)
+            # Los dialectos sin comentarios (p.ej. SQLite) no implementan su reflexión
+            multi_comments = inspector.get_multi_table_comment(filter_names=chunk) if self.dialect.supports_comments else {}
+            for key in sorted(multi_columns, key=lambda key: table_order(key[1])):
+                yield Table(
+                    name=key[1],
+                    comment=multi_comments.get(key, {}).get("text"),
+                    columns=[
+                        Column(
+                            name=column["name"],
+                            type=Column.__prettify_type__(column["type"]),
+                            nullable=column["nullable"],
+                            comment=column.get("comment"),
+                            default=None,
+                        )
+                        for column in multi_columns[key]
+                    ],
+                    primary_keys=multi_pks.get(key, {}).get("constrained_columns", []),
+                    foreign_keys=[
+                        ForeignKey(
+                            column=column,
+                            reference=Reference(table=fk["referred_table"], column=referred_column)
+                        )
+                        for fk in multi_fks.get(key, [])
+                        for column, referred_column in zip(fk["constrained_columns"], fk["referred_columns"])
+                    ],
+                    schemaName=None
+                )
+
+    @staticmethod
+    def __in_order__(tables: Iterator[Table], table_names: list[str]) -> Iterator[Table]:
+        # Las consultas al catálogo devuelven las tablas en el orden de la intercalación de la base de datos, que puede
+        # diferir de table_order: sólo se retienen las tablas que llegan antes de su turno
+        expected = sorted(set(table_names), key=table_order)
+        position = 0
+        pending = {}
+        for table in tables:
+            pending[table.name] = table
+            while position < len(expected) and expected[position] in pending:
+                yield pending.pop(expected[position])
+                position += 1
+        # Las tablas sin columnas en el catálogo (p.ej. eliminadas) no llegan nunca
+        for name in expected[position:]:
+            if name in pending:
+                yield pending.pop(name)
+
+    def __query__(self, sql: str) -> list:
+        return self.connection.execute(text(sql)).mappings().all()
+
+    def __build_type__(self, row) -> any:
+        """
+        Construye el tipo de SQLAlchemy de una columna a partir de los datos del catálogo,
+        del mismo modo que lo hace el dialecto al reflejar la tabla (para que el tipo resultante sea idéntico)
+        """
+        coltype = self.dialect.ischema_names.get(row["data_type"].lower())
+        if coltype is None:
+            return NullType()
+        kwargs = {}
+        if issubclass(coltype, (String, _Binary)):
+            kwargs["length"] = None if row["char_length"] == -1 else row["char_length"]
+        elif issubclass(coltype, (Numeric, Float)):  # Float ya no deriva de Numeric en SQLAlchemy 2.1
+            kwargs["precision"] = row["numeric_precision"]
+            if not issubclass(coltype, Float):
+                kwargs["scale"] = row["numeric_scale"]
+        try:
+            return coltype(**kwargs)
+        except TypeError:
+            return coltype()
+
+    @staticmethod
+    def __build_table__(name: str, comments: dict, columns: list[Column], primary_keys: dict, foreign_keys: dict) -> Table:
+        return Table(
+            name=name,
+            comment=comments.get(name),
+            columns=columns,
+            primary_keys=primary_keys.get(name, []),
+            foreign_keys=foreign_keys.get(name, []),
+            schemaName=None
+        )
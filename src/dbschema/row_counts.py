@@ -0,0 +1,27 @@
+"""
+Consultas para obtener el número aproximado de filas de todas las tablas a partir de las estadísticas del catálogo.
+Son mucho más baratas que un COUNT(*) (no recorren las tablas), pero sólo son tan precisas como las estadísticas:
+- mssql: filas del montón o del índice clúster de cada partición (sys.dm_db_partition_stats, requiere VIEW DATABASE STATE)
+- postgresql: estimación del planificador (pg_class.reltuples, -1 si la tabla no se ha analizado nunca)
+- mysql: estimación del motor de almacenamiento (INFORMATION_SCHEMA.TABLES.TABLE_ROWS, aproximada en InnoDB)
+"""
+ROW_COUNT_QUERIES = {
+    "mssql": """
+        SELECT t.name AS table_name, SUM(p.row_count) AS row_count
+        FROM sys.tables t
+        JOIN sys.dm_db_partition_stats p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+        WHERE t.schema_id = SCHEMA_ID()
+        GROUP BY t.name
+    """,
+    "postgresql": """
+        SELECT c.relname AS table_name, CASE WHEN c.reltuples < 0 THEN NULL ELSE c.reltuples::bigint END AS row_count
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p')
+    """,
+    "mysql": """
+        SELECT TABLE_NAME AS table_name, TABLE_ROWS AS row_count
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    """,
+}
@@ -0,0 +1,146 @@
+import re
+import math
+import random
+
+from sqlalchemy import column, func, literal_column, select, table, tablesample
+
+from dbschema.table import Table
+
+# Tablas con menos filas que este número se ordenan al azar completas: no compensa muestrear
+SMALL_TABLE_ROWS = 1000
+# Porcentaje de filas que se muestrea de más con TABLESAMPLE (se muestrean páginas completas, no filas)
+OVERSAMPLING = 10
+# Número máximo de saltos aleatorios por la clave primaria en el muestreo por rangos
+MAX_PROBES = 5
+# Tipos de columna enteros (sin la longitud ni modificadores como UNSIGNED), para el muestreo por rangos
+INTEGER_TYPES = { "INT", "INTEGER", "BIGINT", "SMALLINT", "TINYINT", "MEDIUMINT", "INT2", "INT4", "INT8", "SERIAL", "BIGSERIAL", "SMALLSERIAL" }
+
+# Estrategias de muestreo
+STRATEGY_RANDOM_ORDER = "random_order"
+STRATEGY_LIMIT = "limit"
+STRATEGY_TABLESAMPLE = "tablesample"
+STRATEGY_KEY_RANGE = "key_range"
+STRATEGY_RANDOM_OFFSET = "random_offset"
+
+
+class TableSampler:
+    """
+    Obtiene una muestra de las filas de una tabla con un coste aproximadamente constante, independiente del tamaño de la tabla:
+    - Tablas pequeñas (o sin estimación de filas): toda la tabla ordenada al azar (ORDER BY RANDOM(), NEWID() o RAND()),
+      con LIMIT/TOP.
+    - PostgreSQL y SQL Server: TABLESAMPLE SYSTEM, que lee sólo un porcentaje de las páginas de la tabla.
+    - Tablas con una clave primaria entera: varios saltos aleatorios por la clave (pk >= valor aleatorio ORDER BY pk),
+      cada uno resuelto con una búsqueda en el índice.
+    - MySQL sin clave primaria entera: LIMIT con un desplazamiento aleatorio.
+    Si una estrategia no devuelve suficientes filas, se prueba con la siguiente y, en último caso, se leen las primeras
+    filas con LIMIT/TOP.
+    """
+
+    def __init__(self, database: any, seed: int = None):
+        """
+        :param database: Base de datos (conectada).
+        :param seed: Semilla para los valores aleatorios (para obtener siempre la misma muestra mientras no cambien los datos).
+        """
+        self.database = database
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def sample(self, table_name: str, limit: int = 10, total: int = None) -> list[dict]:
+        """
+        Obtiene una muestra de las filas de una tabla.
+        :param table_name: Nombre de la tabla.
+        :param limit: Número máximo de filas de la muestra.
+        :param total: Número (aproximado) de filas de la tabla. Por defecto, la estimación del catálogo.
+        :return: Filas de la muestra (como mucho limit).
+        """
+        if total is None:
+            total = self.database.count_rows(table_name)
+        if total == 0 or limit <= 0:
+            return []
+        rows = []
+        for strategy in self.strategies(limit, total):
+            try:
+                sample = self.__sample__(strategy, table_name, limit, total)
+            except Exception as e:
+                print(f"⚠️ No se ha podido muestrear la tabla '{table_name}' con la estrategia '{strategy}': {e}")
+                self.database.connection.rollback()
+                continue
+            if sample is None:
+                continue
+            rows = sample
+            if len(rows) >= min(limit, total):
+                break
+        return rows[:limit]
+
+    def strategies(self, limit: int, total: int) -> list[str]:
+        """
+        Estrategias de muestreo a probar, en orden, según el SGBD y el tamaño de la tabla.
+        """
+        if total <= max(limit, SMALL_TABLE_ROWS):
+            return [ STRATEGY_RANDOM_ORDER, STRATEGY_LIMIT ]
+        dialect = self.database.connection.dialect.name
+        strategies = []
+        if dialect in ("postgresql", "mssql"):
+            strategies.append(STRATEGY_TABLESAMPLE)
+        strategies.append(STRATEGY_KEY_RANGE)
+        if dialect == "mysql":
+            strategies.append(STRATEGY_RANDOM_OFFSET)
+        strategies.append(STRATEGY_LIMIT)
+        return strategies
+
+    def __sample__(self, strategy: str, table_name: str, limit: int, total: int) -> list[dict] | None:
+        source = table(table_name)
+        if strategy == STRATEGY_RANDOM_ORDER:
+            return self.database.execute(select(literal_column("*")).select_from(source).order_by(self.__random__()).limit(limit))
+        if strategy == STRATEGY_LIMIT:
+            return self.database.execute(select(literal_column("*")).select_from(source).limit(limit))
+        if strategy == STRATEGY_TABLESAMPLE:
+            percent = min(100.0, round(limit * OVERSAMPLING * 100.0 / total, 6))
+            # SQL Server necesita indicar PERCENT; PostgreSQL sólo admite el porcentaje. Con semilla, REPEATABLE devuelve las mismas páginas
+            argument = literal_column(f"{percent:f} PERCENT") if self.database.connection.dialect.name == "mssql" else literal_column(f"{percent:f}")
+            return self.database.execute(select(literal_column("*")).select_from(tablesample(source, func.system(argument), name="s", seed=literal_column(str(self.seed)) if self.seed is not None else None)).limit(limit))
+        if strategy == STRATEGY_KEY_RANGE:
+            return self.__sample_key_range__(table_name, limit)
+        if strategy == STRATEGY_RANDOM_OFFSET:
+            offset = self.random.randint(0, max(0, total - limit))
+            return self.database.execute(select(literal_column("*")).select_from(source).limit(limit).offset(offset))
+        return None
+
+    def __sample_key_range__(self, table_name: str, limit: int) -> list[dict] | None:
+        # Sólo con una clave primaria entera (los valores intermedios entre el mínimo y el máximo son claves válidas)
+        key = TableSampler.__integer_key__(self.database.get_table(table_name))
+        if key is None:
+            return None
+        source = table(table_name, column(key))
+        low, high = self.database.connection.execute(select(func.min(source.c[key]), func.max(source.c[key]))).one()
+        if low is None:
+            return None
+        probes = min(limit, MAX_PROBES)
+        per_probe = math.ceil(limit / probes)
+        # Se descartan las filas repetidas entre saltos que se solapan
+        rows = {}
+        for _ in range(probes):
+            start = self.random.randint(int(low), int(high))
+            query = select(literal_column("*")).select_from(source).where(source.c[key] >= start).order_by(source.c[key]).limit(per_probe)
+            for row in self.database.execute(query):
+                rows.setdefault(row.get(key), row)
+        return list(rows.values())
+
+    def __random__(self):
+        # Función de valores aleatorios del SGBD, para ordenar las filas al azar (en MySQL, con la semilla)
+        dialect = self.database.connection.dialect.name
+        if dialect == "mssql":
+            return func.newid()
+        if dialect == "mysql":
+            return func.rand(self.seed) if self.seed is not None else func.rand()
+        return func.random()
+
+    @staticmethod
+    def __integer_key__(table_schema: Table) -> str | None:
+        if table_schema is None or len(table_schema.primary_keys) != 1:
+            return None
+        key = table_schema.get_column(table_schema.primary_keys[0])
+        # Sólo el nombre del tipo: INTEGER(11) UNSIGNED -> INTEGER
+        if key is None or re.split(r"[\s(]", key.type.strip().upper(), maxsplit=1)[0] not in INTEGER_TYPES:
+            return None
+        return key.name
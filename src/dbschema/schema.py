@@ -1,6 +1,7 @@
 import json
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
+from dbschema.binary import BinarySchemaWriter, read_binary, is_binary, FORMAT_JSON, FORMAT_BINARY, KIND_SCHEMA
 from dbschema.table import Table
 
 
@@ -8,7 +9,11 @@ class Schema(BaseModel):
 
     tables: list[Table] = []
 
-    @classmethod
+    # Índice de las tablas por nombre (sin distinguir mayúsculas).
+    # Se descarta al sustituir la lista o al modificarla con add_table y remove_table
+    _tables_index: dict = PrivateAttr(default=None)
+
+    @staticmethod
     def get_table_from_metadata(schema_metadata, name: str) -> Table | None:
         """
         Retrieves a table from the schema metadata by its name.
@@ -18,10 +23,59 @@ class Schema(BaseModel):
         Returns:
             Table: The table object if found, otherwise None.
         """
-        for table_name, table_metadata in schema_metadata.tables.items():
-            if table_name.lower() == name.lower():
-                return Table.from_metadata(table_metadata)
-        return None
+        table_metadata = schema_metadata.tables.get(name)
+        if table_metadata is None:
+            table_metadata = next((metadata for table_name, metadata in schema_metadata.tables.items() if table_name.lower() == name.lower()), None)
+        return Table.from_metadata(table_metadata) if table_metadata is not None else None
+
+    def get_table(self, name: str) -> Table | None:
+        """
+        Recupera una tabla del esquema por su nombre (sin distinguir mayúsculas).
+        """
+        return self.__indexes__().get(name.lower())
+
+    def has_table(self, name: str) -> bool:
+        return self.get_table(name) is not None
+
+    def add_table(self, table: Table):
+        """
+        Añade una tabla al esquema.
+        """
+        self.tables.append(table)
+        self.invalidate_index()
+
+    def remove_table(self, name: str) -> Table | None:
+        """
+        Elimina una tabla del esquema por su nombre (sin distinguir mayúsculas).
+        :param name: Nombre de la tabla.
+        :return: Tabla eliminada, o None si no existe.
+        """
+        table = self.get_table(name)
+        if table is not None:
+            self.tables.remove(table)
+            self.invalidate_index()
+        return table
+
+    def invalidate_index(self):
+        """
+        Descarta el índice por nombre. Es necesario si se modifican directamente las tablas (p.ej. renombrando
+        una tabla o con tables.append); al sustituir la lista o con add_table y remove_table se descarta automáticamente.
+        """
+        self._tables_index = None
+
+    def __setattr__(self, name: str, value):
+        super().__setattr__(name, value)
+        if name == "tables":
+            self.invalidate_index()
+
+    def __indexes__(self) -> dict[str, Table]:
+        # Se construye la primera vez que se usa, y tras descartarlo
+        if self._tables_index is None:
+            index = {}
+            for table in self.tables:
+                index.setdefault(table.name.lower(), table)
+            self._tables_index = index
+        return self._tables_index
 
     @classmethod
     def from_metadata(cls, metadata: any, table_names: list[str] = None) -> "Schema":
@@ -38,34 +92,43 @@ class Schema(BaseModel):
             schema_json = json.load(f)
         return Schema.model_validate(schema_json["schema"])
 
+    @staticmethod
+    def load(file: str) -> "Schema":
+        """
+        Carga un esquema de un fichero, detectando su formato (json o binary).
+        :param file: Ruta del fichero.
+        :return: Esquema cargado.
+        """
+        if not is_binary(file):
+            return Schema.from_json(file)
+        with open(file, "rb") as f:
+            kind, _, tables = read_binary(f)
+        if kind != KIND_SCHEMA:
+            raise ValueError(f"El fichero '{file}' no contiene un esquema")
+        return Schema.model_construct(tables=tables)
+
     def to_json(self, indent=4, separators=None) -> str:
         schema_dict = self.model_dump()
         return json.dumps(schema_dict, indent=indent, separators=separators)
 
     def reduce(self) -> dict:
         return {
-            table.name: {
-                "columns": {
-                    column.name: (
-                        f"{column.type} NOT NULL"
-                        if not column.nullable
-                        else column.type
-                    )
-                    for column in table.columns
-                },
-                "primary_keys": table.primary_keys,
-                "foreign_keys": {
-                    fk.column: f"{fk.reference.table}.{fk.reference.column}"
-                    for fk in table.foreign_keys
-                },
-            }
+            table.name: table.reduce()
             for table in self.tables
         }
 
-    def save(self, json_file: str):
+    def save(self, json_file: str, format: str = FORMAT_JSON, database: dict = None):
         """
-        Guarda el esquema en un archivo JSON.
+        Guarda el esquema en un archivo JSON (o en formato binario).
         :param file_path: Ruta del archivo donde se guardará el esquema.
+        :param format: Formato del archivo (json o binary).
+        :param database: Información de la base de datos que acompaña al esquema (sólo en formato binario).
         """
+        if format == FORMAT_BINARY:
+            with open(json_file, "wb") as f:
+                with BinarySchemaWriter(f, database) as writer:
+                    for table in self.tables:
+                        writer.write(table)
+            return
         with open(json_file, "w", encoding="utf-8") as f:
             json.dump(self.model_dump(), f, indent=4, ensure_ascii=False)
\ No newline at end of file
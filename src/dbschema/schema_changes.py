@@ -0,0 +1,62 @@
+import json
+from pydantic import BaseModel
+
+
+class SchemaChanges(BaseModel):
+
+    added: list[str] = []
+    altered: list[str] = []
+    removed: list[str] = []
+    unchanged: int = 0
+
+    @classmethod
+    def compare(cls, old_versions: dict[str, str], new_versions: dict[str, str]) -> "SchemaChanges":
+        """
+        Compara las versiones de las tablas de dos instantáneas del esquema.
+        :param old_versions: Versión de cada tabla en la instantánea anterior.
+        :param new_versions: Versión de cada tabla en la base de datos.
+        :return: Tablas añadidas, modificadas y eliminadas.
+        """
+        common = old_versions.keys() & new_versions.keys()
+        altered = sorted(name for name in common if old_versions[name] != new_versions[name])
+        return cls(
+            added=sorted(new_versions.keys() - old_versions.keys()),
+            altered=altered,
+            removed=sorted(old_versions.keys() - new_versions.keys()),
+            unchanged=len(common) - len(altered)
+        )
+
+    @property
+    def changed(self) -> list[str]:
+        """
+        Tablas que hay que volver a procesar (añadidas o modificadas).
+        """
+        return sorted(self.added + self.altered)
+
+    def has_changes(self) -> bool:
+        return bool(self.added or self.altered or self.removed)
+
+    def print(self):
+        print("Tablas añadidas    :", ", ".join(self.added) if self.added else "Ninguna")
+        print("Tablas modificadas :", ", ".join(self.altered) if self.altered else "Ninguna")
+        print("Tablas eliminadas  :", ", ".join(self.removed) if self.removed else "Ninguna")
+        print("Tablas sin cambios :", self.unchanged)
+
+    def save(self, json_file: str):
+        """
+        Guarda los cambios en un archivo JSON.
+        :param json_file: Ruta del archivo donde se guardarán los cambios.
+        """
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(self.model_dump(), f, indent=4, ensure_ascii=False)
+
+    @staticmethod
+    def load(json_file: str) -> "SchemaChanges":
+        """
+        Carga los cambios desde un archivo JSON.
+        :param json_file: Ruta del archivo desde donde se cargarán los cambios.
+        :return: Objeto SchemaChanges cargado desde el archivo JSON.
+        """
+        with open(json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return SchemaChanges.model_validate(data)
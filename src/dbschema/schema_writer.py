@@ -0,0 +1,86 @@
+import json
+from typing import TextIO
+
+from dbschema.table import Table
+
+
+class SchemaWriter:
+    """
+    Escribe un esquema en formato JSON tabla a tabla, sin tener que construir el documento completo en memoria.
+    El resultado es el mismo documento que genera json.dumps({"database": ..., "schema": schema.model_dump()}, indent=4),
+    por lo que se puede leer con Schema.from_json.
+    Además, registra la posición (en bytes) de cada tabla, para generar el índice que usa LazySchema
+    (el fichero de salida debe abrirse con newline="" para que las posiciones sean exactas).
+    """
+
+    def __init__(self, output: TextIO, database: dict = None, indent: int = 4, ensure_ascii: bool = True):
+        """
+        :param output: Fichero (o flujo) de salida.
+        :param database: Información de la base de datos que acompaña al esquema.
+        :param indent: Indentación del JSON generado.
+        :param ensure_ascii: Si es True, escapa los caracteres no ASCII.
+        """
+        self.output = output
+        self.database = database
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self.position = 0
+        self.index = []
+        self.__started__ = False
+
+    def __enter__(self) -> "SchemaWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def write(self, table: Table):
+        """
+        Escribe una tabla en el esquema.
+        :param table: Tabla a escribir.
+        """
+        if not self.__started__:
+            self.__write_header__()
+        self.__emit__(self.__separator__() if self.count > 0 else "")
+        self.__emit__(self.__newline__(3))
+        start = self.position
+        self.__emit__(self.__dumps__(table.model_dump(), 3))
+        self.index.append((table.name, start, self.position))
+        self.count += 1
+
+    def close(self):
+        """
+        Cierra el documento JSON (no cierra el fichero de salida).
+        """
+        if not self.__started__:
+            self.__write_header__()
+        if self.count > 0:
+            self.__emit__(self.__newline__(2))
+        self.__emit__("]")
+        self.__emit__(self.__newline__(1) + "}")
+        self.__emit__(self.__newline__(0) + "}")
+        self.output.flush()
+
+    def __write_header__(self):
+        # Se escribe con la primera tabla, para no mezclarse con los mensajes que se muestran antes
+        self.__started__ = True
+        self.__emit__("{")
+        self.__emit__(self.__newline__(1) + '"database": ' + self.__dumps__(self.database, 1) + self.__separator__())
+        self.__emit__(self.__newline__(1) + '"schema": {')
+        self.__emit__(self.__newline__(2) + '"tables": [')
+
+    def __emit__(self, text: str):
+        self.output.write(text)
+        self.position += len(text) if self.ensure_ascii else len(text.encode("utf-8"))
+
+    def __dumps__(self, value: any, level: int) -> str:
+        dumped = json.dumps(value, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        return dumped.replace("\n", self.__newline__(level)) if self.indent else dumped
+
+    def __separator__(self) -> str:
+        return "," if self.indent else ", "
+
+    def __newline__(self, level: int) -> str:
+        return "\n" + " " * (self.indent * level) if self.indent else ""
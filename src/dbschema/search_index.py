@@ -0,0 +1,336 @@
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import heapq
+import struct
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+from dbschema.binary import is_binary
+from dbschema.lazy_schema import LazySchema
+from dbschema.schema import Schema
+from dbschema.table import Table
+from utils.files import atomic_open
+
+"""
+Formato del índice de búsqueda ({fichero}.search.idx), pensado para usarlo con mmap sin cargarlo completo:
+- Cabecera: firma, versión, tamaño y fecha de modificación del fichero del esquema indexado, número de términos,
+  de documentos y de entradas de las listas de documentos, y tamaño de los términos.
+- Posiciones (uint64) de cada término, de la lista de documentos de cada término y de cada documento.
+- Listas de documentos de cada término: identificadores (uint32) y pesos (float32), por peso descendente.
+- Términos ordenados (utf-8) y documentos ([tabla, columna, comentario] en JSON).
+Los enteros y los pesos se guardan en little-endian.
+"""
+INDEX_EXTENSION = ".search.idx"
+INDEX_VERSION = 2
+MAGIC = b"DBSI"
+HEADER = struct.Struct("<4sH2xQQIIQQ")
+
+# Peso de cada campo en la puntuación: coincidir en el nombre cuenta más que en el comentario
+NAME_WEIGHT = 3.0
+COMMENT_WEIGHT = 1.0
+# Las coincidencias por prefijo puntúan menos que las exactas
+PREFIX_FACTOR = 0.5
+
+# Palabras: secuencias de letras o dígitos; y fronteras de CamelCase (fechaAlta, XMLFile, ...)
+WORD = re.compile(r"[^\W_]+")
+CAMEL_CASE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def fold(text: str) -> str:
+    """
+    Elimina las tildes y diacríticos de un texto (p.ej. "Descripción" -> "Descripcion").
+    """
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Divide un texto en términos normalizados (sin tildes y en minúsculas), separando snake_case y CamelCase.
+    Los nombres compuestos se indexan también completos (p.ej. "FECHA_ALTA" -> "fecha", "alta", "fechaalta").
+    :param text: Texto a dividir.
+    :return: Lista de términos.
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in re.split(r"\s+", fold(text)):
+        parts = [ part for chunk in WORD.findall(word) for part in CAMEL_CASE.findall(chunk) ]
+        tokens.extend(part.lower() for part in parts)
+        whole = word.strip(".,;:()[]{}\"'¿?¡!").replace("_", "").lower()
+        if len(parts) > 1 and WORD.fullmatch(whole):
+            tokens.append(whole)
+    return tokens
+
+
+class SearchIndex:
+    """
+    Índice invertido para buscar tablas y columnas de un esquema por su nombre y su comentario.
+    Se construye una única vez a partir del fichero del esquema y se guarda junto a él ({fichero}.search.idx).
+    Al cargarlo sólo se proyecta en memoria (mmap): cada búsqueda localiza sus términos con una búsqueda binaria
+    en la lista ordenada de términos y sólo lee las listas de documentos de esos términos.
+    """
+
+    def __init__(self, data: bytes | mmap.mmap):
+        """
+        :param data: Contenido del índice (ver el formato al principio del módulo).
+        """
+        magic, version, _, _, term_count, document_count, entry_count, terms_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != INDEX_VERSION:
+            raise ValueError("El fichero no es un índice de búsqueda de dbschema en la versión actual")
+        self.__data__ = data
+        self.__view__ = memoryview(data)
+        position = HEADER.size
+        self.__term_offsets__, position = self.__section__("Q", position, term_count + 1)
+        self.__posting_offsets__, position = self.__section__("Q", position, term_count + 1)
+        self.__document_offsets__, position = self.__section__("Q", position, document_count + 1)
+        self.__ids__, position = self.__section__("I", position, entry_count)
+        self.__weights__, position = self.__section__("f", position, entry_count)
+        self.__terms_start__ = position
+        self.__documents_start__ = position + terms_length
+        self.terms = TermList(self)
+        self.document_count = document_count
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Libera el fichero del índice (si se ha cargado de un fichero).
+        """
+        self.__term_offsets__ = self.__posting_offsets__ = self.__document_offsets__ = None
+        self.__ids__ = self.__weights__ = None
+        self.__view__.release()
+        if isinstance(self.__data__, mmap.mmap):
+            self.__data__.close()
+
+    @classmethod
+    def build(cls, tables: Iterable[Table]) -> "SearchIndex":
+        """
+        Construye el índice a partir de las tablas de un esquema.
+        :param tables: Tablas del esquema.
+        :return: Índice de búsqueda.
+        """
+        documents = []
+        postings = {}
+
+        def add(table_name: str, column_name: str | None, comment: str | None):
+            id = len(documents)
+            documents.append(json.dumps([ table_name, column_name, comment ], ensure_ascii=False).encode("utf-8"))
+            weights = {}
+            for token in tokenize(column_name if column_name is not None else table_name):
+                weights[token] = weights.get(token, 0.0) + NAME_WEIGHT
+            for token in tokenize(comment):
+                weights[token] = weights.get(token, 0.0) + COMMENT_WEIGHT
+            for token, weight in weights.items():
+                postings.setdefault(token, []).append((id, weight))
+
+        for table in tables:
+            add(table.name, None, table.comment)
+            for column in table.columns:
+                add(table.name, column.name, column.comment)
+        return cls(SearchIndex.__encode__(documents, postings))
+
+    @staticmethod
+    def for_schema(schema_file: str, rebuild: bool = False) -> "SearchIndex":
+        """
+        Carga el índice guardado junto al fichero del esquema, o lo construye (y lo guarda) si no existe
+        o no corresponde a la versión actual del fichero.
+        :param schema_file: Fichero del esquema (json o binary).
+        :param rebuild: Si es True, vuelve a construir el índice aunque exista.
+        :return: Índice de búsqueda.
+        """
+        index = None if rebuild else SearchIndex.load(schema_file)
+        if index is None:
+            if is_binary(schema_file):
+                index = SearchIndex.build(Schema.load(schema_file).tables)
+            else:
+                with LazySchema(schema_file) as schema:
+                    index = SearchIndex.build(schema)
+            index.save(schema_file)
+        return index
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """
+        Busca las tablas y columnas que contienen todos los términos de la consulta (completos o como prefijo),
+        ordenadas por relevancia (tf-idf ponderado por campo).
+        :param query: Términos de búsqueda.
+        :param limit: Número máximo de resultados.
+        :return: Lista de resultados (puntuación, tabla, columna y comentario).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+        expansions = [ self.__expand__(term) for term in terms ]
+        if not all(expansions):
+            return []
+        if len(expansions) == 1:
+            ranked = self.__top__(expansions[0], limit)
+        else:
+            ranked = self.__rank__(expansions, limit)
+        results = []
+        for id, score in ranked:
+            table_name, column_name, comment = self.document(id)
+            results.append({ "score": round(score, 3), "table": table_name, "column": column_name, "comment": comment })
+        return results
+
+    def document(self, id: int) -> list:
+        """
+        Documento indexado: [tabla, columna (None para la propia tabla), comentario].
+        """
+        start = self.__documents_start__ + self.__document_offsets__[id]
+        end = self.__documents_start__ + self.__document_offsets__[id + 1]
+        return json.loads(bytes(self.__view__[start:end]))
+
+    def term(self, position: int) -> str:
+        """
+        Término del índice en una posición de la lista ordenada de términos.
+        """
+        start = self.__terms_start__ + self.__term_offsets__[position]
+        end = self.__terms_start__ + self.__term_offsets__[position + 1]
+        return str(self.__view__[start:end], "utf-8")
+
+    def __expand__(self, term: str) -> list[tuple[int, float]]:
+        # Términos del índice que empiezan por el término buscado (incluido él mismo): posición y factor de la puntuación
+        tokens = []
+        position = bisect_left(self.terms, term)
+        while position < len(self.terms):
+            token = self.term(position)
+            if not token.startswith(term):
+                break
+            tokens.append((position, 1.0 if token == term else PREFIX_FACTOR))
+            position += 1
+        return tokens
+
+    def __scores__(self, position: int, factor: float) -> Iterable[tuple[float, int]]:
+        # Puntuaciones (negativas, para ordenarlas de mayor a menor) de los documentos de un término, en orden
+        start, end = self.__posting_offsets__[position], self.__posting_offsets__[position + 1]
+        scale = math.log(1 + self.document_count / (end - start)) * factor
+        return zip((-scale * weight for weight in self.__weights__[start:end]), self.__ids__[start:end])
+
+    def __top__(self, tokens: list[tuple[int, float]], limit: int) -> list[tuple[int, float]]:
+        # Con un único término: las listas de cada término ya están ordenadas, así que basta con mezclarlas hasta tener
+        # limit documentos (la primera aparición de cada documento es su mejor puntuación)
+        ranked = []
+        seen = set()
+        for score, id in heapq.merge(*(self.__scores__(position, factor) for position, factor in tokens)):
+            if id in seen:
+                continue
+            seen.add(id)
+            ranked.append((id, -score))
+            if len(ranked) == limit:
+                break
+        return ranked
+
+    def __rank__(self, expansions: list[list[tuple[int, float]]], limit: int) -> list[tuple[int, float]]:
+        # Con varios términos: sólo los documentos que contienen todos (empezando por el término con menos documentos)
+        def size(tokens: list[tuple[int, float]]) -> int:
+            return sum(self.__posting_offsets__[position + 1] - self.__posting_offsets__[position] for position, _ in tokens)
+
+        scores = None
+        for tokens in sorted(expansions, key=size):
+            term_scores = {}
+            for position, factor in tokens:
+                for score, id in self.__scores__(position, factor):
+                    if (scores is None or id in scores) and score < term_scores.get(id, 0.0):
+                        term_scores[id] = score
+            scores = term_scores if scores is None else { id: score + term_scores[id] for id, score in scores.items() if id in term_scores }
+            if not scores:
+                return []
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [ (id, -score) for id, score in ranked ]
+
+    def save(self, schema_file: str):
+        """
+        Guarda el índice junto al fichero del esquema ({fichero}.search.idx), de forma atómica.
+        Si no se puede guardar (p.ej. directorio de sólo lectura), se ignora y se volverá a construir la próxima vez.
+        """
+        try:
+            stat = os.stat(schema_file)
+            header = bytearray(self.__view__[:HEADER.size])
+            _, _, _, _, *counts = HEADER.unpack_from(header, 0)
+            HEADER.pack_into(header, 0, MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns, *counts)
+            with atomic_open(schema_file + INDEX_EXTENSION, "wb") as f:
+                f.write(header)
+                f.write(self.__view__[HEADER.size:])
+        except OSError:
+            pass
+
+    @staticmethod
+    def load(schema_file: str) -> "SearchIndex":
+        """
+        Carga el índice guardado junto al fichero del esquema, si existe y corresponde a la versión actual del fichero.
+        """
+        index_file = schema_file + INDEX_EXTENSION
+        if not os.path.exists(index_file):
+            return None
+        try:
+            stat = os.stat(schema_file)
+            with open(index_file, "rb") as f:
+                magic, version, size, mtime_ns, *_ = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or version != INDEX_VERSION or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                    return None
+                return SearchIndex(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except Exception:
+            return None
+
+    def __section__(self, typecode: str, position: int, count: int) -> tuple[memoryview | array, int]:
+        # Vista (sin copiarla) de una sección de enteros o pesos, y posición siguiente
+        end = position + count * array(typecode).itemsize
+        if sys.byteorder == "little":
+            return self.__view__[position:end].cast(typecode), end
+        values = array(typecode)
+        values.frombytes(self.__view__[position:end])
+        values.byteswap()
+        return values, end
+
+    @staticmethod
+    def __encode__(documents: list[bytes], postings: dict[str, list[tuple[int, float]]]) -> bytes:
+        # Genera el contenido del índice (sin el tamaño ni la fecha del esquema, que se añaden al guardarlo)
+        term_offsets, posting_offsets, document_offsets = array("Q", [ 0 ]), array("Q", [ 0 ]), array("Q", [ 0 ])
+        ids, weights = array("I"), array("f")
+        terms = bytearray()
+        for term in sorted(postings):
+            terms += term.encode("utf-8")
+            term_offsets.append(len(terms))
+            # Por peso descendente, para poder terminar las búsquedas en cuanto se tienen los mejores resultados
+            for id, weight in sorted(postings[term], key=lambda entry: (-entry[1], entry[0])):
+                ids.append(id)
+                weights.append(weight)
+            posting_offsets.append(len(ids))
+        length = 0
+        for document in documents:
+            length += len(document)
+            document_offsets.append(length)
+        sections = [ term_offsets, posting_offsets, document_offsets, ids, weights ]
+        if sys.byteorder == "big":
+            for section in sections:
+                section.byteswap()
+        header = HEADER.pack(MAGIC, INDEX_VERSION, 0, 0, len(postings), len(documents), len(ids), len(terms))
+        return b"".join([ header, *(section.tobytes() for section in sections), bytes(terms), *documents ])
+
+
+class TermList:
+    """
+    Lista ordenada de los términos de un índice de búsqueda, leídos del índice sólo cuando se accede a ellos
+    (p.ej. en una búsqueda binaria con bisect).
+    """
+
+    def __init__(self, index: SearchIndex):
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.index.__term_offsets__) - 1
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self.index.term(position)
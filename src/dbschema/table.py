@@ -1,11 +1,12 @@
 import json
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from tabulate import tabulate
 from textwrap import shorten
 from typing import Optional
 
 from dbschema.column import Column
 from dbschema.foreign_key import ForeignKey
+from utils.files import atomic_open
 
 
 class Table(BaseModel):
@@ -17,6 +18,11 @@ class Table(BaseModel):
     foreign_keys: list[ForeignKey] = []
     schemaName: Optional[str]
 
+    # Índices por nombre (sin distinguir mayúsculas) de las columnas y de las claves foráneas por columna.
+    # Se descartan al sustituir las listas o al modificarlas con add_column, remove_column y add_foreign_key
+    _columns_index: dict = PrivateAttr(default=None)
+    _foreign_keys_index: dict = PrivateAttr(default=None)
+
     @classmethod
     def from_metadata(cls, table_metadata: any):
         return cls(
@@ -41,7 +47,100 @@ class Table(BaseModel):
         return [ column for column in self.columns if search_term.lower() in column.name.lower() or search_term.lower() in (column.comment or '').lower() ]
     
     def has_column(self, column_name: str) -> bool:
-        return any(column.name == column_name for column in self.columns)
+        return self.get_column(column_name) is not None
+
+    def get_column(self, name: str) -> Column | None:
+        """
+        Recupera una columna por su nombre (sin distinguir mayúsculas).
+        """
+        return self.__indexes__()[0].get(name.lower())
+
+    def get_foreign_keys(self, column_name: str) -> list[ForeignKey]:
+        """
+        Recupera las claves foráneas de una columna (sin distinguir mayúsculas).
+        """
+        return self.__indexes__()[1].get(column_name.lower(), [])
+
+    def add_column(self, column: Column):
+        """
+        Añade una columna a la tabla.
+        """
+        self.columns.append(column)
+        self.invalidate_index()
+
+    def remove_column(self, name: str) -> Column | None:
+        """
+        Elimina una columna de la tabla por su nombre (sin distinguir mayúsculas), junto con sus claves foráneas.
+        :param name: Nombre de la columna.
+        :return: Columna eliminada, o None si no existe.
+        """
+        column = self.get_column(name)
+        if column is None:
+            return None
+        self.columns.remove(column)
+        self.primary_keys = [ pk for pk in self.primary_keys if pk.lower() != column.name.lower() ]
+        self.foreign_keys = [ fk for fk in self.foreign_keys if fk.column.lower() != column.name.lower() ]
+        self.invalidate_index()
+        return column
+
+    def add_foreign_key(self, foreign_key: ForeignKey):
+        """
+        Añade una clave foránea a la tabla.
+        """
+        self.foreign_keys.append(foreign_key)
+        self.invalidate_index()
+
+    def reduce(self, comments: bool = False) -> dict:
+        """
+        Representación reducida de la tabla (tipos de las columnas, claves primarias y foráneas), mucho más breve
+        que model_dump, p.ej. para enviarla a un modelo de lenguaje.
+        :param comments: Si es True, incluye los comentarios de la tabla y de las columnas que los tengan.
+        :return: Diccionario con la representación reducida de la tabla.
+        """
+        reduced = {}
+        if comments and self.comment:
+            reduced["comment"] = self.comment
+        reduced["columns"] = {
+            column.name: (
+                f"{column.type} NOT NULL"
+                if not column.nullable
+                else column.type
+            ) + (f" -- {column.comment}" if comments and column.comment else "")
+            for column in self.columns
+        }
+        reduced["primary_keys"] = self.primary_keys
+        reduced["foreign_keys"] = {
+            fk.column: f"{fk.reference.table}.{fk.reference.column}"
+            for fk in self.foreign_keys
+        }
+        return reduced
+
+    def invalidate_index(self):
+        """
+        Descarta los índices por nombre. Es necesario si se modifican directamente las columnas o claves foráneas
+        (p.ej. renombrando una columna o con columns.append); al sustituir las listas o con add_column,
+        remove_column y add_foreign_key se descartan automáticamente.
+        """
+        self._columns_index = None
+        self._foreign_keys_index = None
+
+    def __setattr__(self, name: str, value):
+        super().__setattr__(name, value)
+        if name in ("columns", "foreign_keys"):
+            self.invalidate_index()
+
+    def __indexes__(self) -> tuple[dict, dict]:
+        # Se construyen la primera vez que se usan, y tras descartarlos
+        if self._columns_index is None or self._foreign_keys_index is None:
+            columns_index = {}
+            for column in self.columns:
+                columns_index.setdefault(column.name.lower(), column)
+            foreign_keys_index = {}
+            for fk in self.foreign_keys:
+                foreign_keys_index.setdefault(fk.column.lower(), []).append(fk)
+            self._columns_index = columns_index
+            self._foreign_keys_index = foreign_keys_index
+        return self._columns_index, self._foreign_keys_index
     
     def __lt__(self, other):
         if not isinstance(other, Table):
@@ -60,45 +159,14 @@ class Table(BaseModel):
         return self.name == value.name
     
     def print(self):
-        fks = set()
-        for fk in self.foreign_keys:
-            fks.add(fk.column)
-        print("Tabla           :", self.name)
-        print("Descripción     :", self.comment if self.comment else "")
-        print("Clave primaria  :", ", ".join(self.primary_keys) if self.primary_keys else "Ninguna")
-        print("Claves foráneas :", ", ".join(fks) if fks else "Ninguna")
-        headers = ["PK", "COLUMN_NAME", "TYPE", "NULLABLE", "RELATION", "COMMENT"]
-        data = []
-        for column in self.columns:
-            type = column.type
-            is_pk = "🔑" if column.name in self.primary_keys else "❌"
-            is_nullable = "✅" if column.nullable else "❌"
-            relations = []
-            for fk in self.foreign_keys:
-                if column.name == fk.column:
-                    relations.append(f"{fk.reference}")
-            data.append(
-                [
-                    is_pk,
-                    column.name,
-                    type,
-                    is_nullable,
-                    "\n".join(relations),
-                    shorten(
-                        column.comment if column.comment else "",
-                        width=100,
-                        placeholder="...",
-                    ),
-                ]
-            )
-        print(tabulate(data, headers=headers, tablefmt="grid"))
+        print_table(self)
 
     def save(self, json_file: str):
         """
-        Guarda la tabla en un archivo JSON.
+        Guarda la tabla en un archivo JSON (de forma atómica: nunca queda un archivo a medias).
         :param file_path: Ruta del archivo donde se guardará la tabla.
         """
-        with open(json_file, "w", encoding="utf-8") as f:
+        with atomic_open(json_file, "w", encoding="utf-8") as f:
             json.dump(self.model_dump(), f, indent=4, ensure_ascii=False)
 
     @staticmethod
@@ -110,4 +178,41 @@ class Table(BaseModel):
         """
         with open(json_file, "r", encoding="utf-8") as f:
             data = json.load(f)
-        return Table.model_validate(data)
\ No newline at end of file
+        return Table.model_validate(data)
+
+
+def print_table(table: any):
+    """
+    Muestra por consola la estructura de una tabla (Table o CompactTable).
+    :param table: Tabla a mostrar.
+    """
+    fks = set()
+    for fk in table.foreign_keys:
+        fks.add(fk.column)
+    primary_keys = set(table.primary_keys)
+    print("Tabla           :", table.name)
+    print("Descripción     :", table.comment if table.comment else "")
+    print("Clave primaria  :", ", ".join(table.primary_keys) if table.primary_keys else "Ninguna")
+    print("Claves foráneas :", ", ".join(fks) if fks else "Ninguna")
+    headers = ["PK", "COLUMN_NAME", "TYPE", "NULLABLE", "RELATION", "COMMENT"]
+    data = []
+    for column in table.columns:
+        type = column.type
+        is_pk = "🔑" if column.name in primary_keys else "❌"
+        is_nullable = "✅" if column.nullable else "❌"
+        relations = [ f"{fk.reference}" for fk in table.get_foreign_keys(column.name) ]
+        data.append(
+            [
+                is_pk,
+                column.name,
+                type,
+                is_nullable,
+                "\n".join(relations),
+                shorten(
+                    column.comment if column.comment else "",
+                    width=100,
+                    placeholder="...",
+                ),
+            ]
+        )
+    print(tabulate(data, headers=headers, tablefmt="grid"))
@@ -30,6 +30,22 @@ DBMS_DEFAULT_CONFIG = {
 CREDENTIALS_TEMPLATE = "${username}:${password}"
 PASSWORD_PLACEHOLDER = "{PASSWORD}"
 
+"""
+Opciones del pool de conexiones que se pueden configurar en cada sección (y su tipo).
+- pool_size: Número de conexiones que se mantienen abiertas
+- max_overflow: Número de conexiones adicionales que se pueden abrir temporalmente
+- pool_timeout: Segundos de espera por una conexión libre
+- pool_recycle: Segundos tras los que se renueva una conexión
+- pool_pre_ping: Si se comprueba la conexión antes de usarla (yes/no)
+"""
+POOL_OPTIONS = {
+    "pool_size": int,
+    "max_overflow": int,
+    "pool_timeout": float,
+    "pool_recycle": int,
+    "pool_pre_ping": lambda value: str(value).lower() in ("yes", "true", "1"),
+}
+
 @dataclass
 class DBConfig():
     """
@@ -43,8 +59,9 @@ class DBConfig():
     database: str
     driver: str
     trusted_connection: bool
+    pool_options: dict
 
-    def __init__(self, type: str, host: str, port: int, database: str, username: str = None, password: str = None, driver: str = None, trusted_connection: bool = None):
+    def __init__(self, type: str, host: str, port: int, database: str, username: str = None, password: str = None, driver: str = None, trusted_connection: bool = None, pool_options: dict = None):
         """
         Inicializa la configuración de la base de datos.
         Args:
@@ -56,6 +73,7 @@ class DBConfig():
             password (str): Contraseña para la conexión.
             driver (str): Controlador ODBC para SQL Server.
             trusted_connection (bool): Si se debe usar una conexión confiable para SQL Server.
+            pool_options (dict): Opciones del pool de conexiones (ver POOL_OPTIONS).
         """
         if type not in DBMS_DEFAULT_CONFIG:
             raise ValueError(f"Tipo de base de datos no soportado: {type}")
@@ -73,6 +91,7 @@ class DBConfig():
         self.database = database
         self.driver = driver
         self.trusted_connection = trusted_connection
+        self.pool_options = pool_options or {}
 
     @classmethod
     def from_section(cls, section: dict) -> "DBConfig":
@@ -97,7 +116,8 @@ class DBConfig():
             port = int(section["port"]) if "port" in section else DBMS_DEFAULT_CONFIG[db_type]["port"],
             database = section["database"],
             driver = section.get("driver", DBMS_DEFAULT_CONFIG[db_type]["driver"] if db_type == "mssql" else None),
-            trusted_connection = section.get("trusted_connection") == "yes" if "trusted_connection" in section else False
+            trusted_connection = section.get("trusted_connection") == "yes" if "trusted_connection" in section else False,
+            pool_options = { key: convert(section[key]) for key, convert in POOL_OPTIONS.items() if key in section }
         )
 
     @classmethod
@@ -161,6 +181,8 @@ class DBConfig():
             "driver": self.driver,
             "trusted_connection": trusted_connection
         }
+        for key, value in self.pool_options.items():
+            config[key] = ("yes" if value else "no") if isinstance(value, bool) else value
         return {k: v for k, v in config.items() if v is not None}  # Elimina valores None
 
     def to_url(self, include_lib = True, placeholders: dict = None, censored: bool = False) -> str:
@@ -81,6 +81,16 @@ class DBIni():
         """
         return self.get_config(section_name).to_url(placeholders=placeholders, censored=censored)
 
+    def get_pool_options(self, section_name: str) -> dict:
+        """
+        Obtiene las opciones del pool de conexiones de una sección del archivo .ini.
+        Args:
+            section_name (str): Nombre de la sección a obtener.
+        Returns:
+            dict: Opciones del pool de conexiones (sólo las especificadas en la sección).
+        """
+        return self.get_config(section_name).pool_options
+
     def add_config(self, section_name: str, config: DBConfig):
         """
         Añade una sección de configuración a un archivo .ini. (si existe la sección, la actualiza)
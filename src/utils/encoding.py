@@ -1,13 +1,132 @@
 import base64
 import datetime
+from uuid import UUID
 from decimal import Decimal
+from typing import Callable
 
-def serializable_dict(row : dict) -> dict:
-    for k, v in row.items():
-        if isinstance(v, bytes):
-            row[k] = base64.b64encode(v).decode("utf-8")
-        elif isinstance(v, Decimal):
-            row[k] = float(v)
-        elif isinstance(v, datetime.datetime):
-            row[k] = v.isoformat()
-    return row
\ No newline at end of file
+def to_base64(value: bytes) -> str:
+    return base64.b64encode(value).decode("utf-8")
+
+def to_isoformat(value: datetime.date | datetime.time) -> str:
+    return value.isoformat()
+
+# Conversión a un tipo serializable en JSON, por tipo de valor
+JSON_CONVERTERS : dict[type, Callable] = {
+    bytes: to_base64,
+    bytearray: to_base64,
+    memoryview: lambda value: to_base64(bytes(value)),
+    Decimal: float,
+    datetime.datetime: to_isoformat,
+    datetime.date: to_isoformat,
+    datetime.time: to_isoformat,
+    UUID: str,
+}
+
+def json_converter(value: any, converters: dict[type, Callable] = JSON_CONVERTERS) -> Callable | None:
+    """
+    Devuelve la función que convierte un valor (y todos los de su tipo) en un valor serializable en JSON.
+    :param value: Valor de ejemplo.
+    :param converters: Conversiones por tipo de valor.
+    :return: Función de conversión, o None si el valor no necesita conversión.
+    """
+    converter = converters.get(type(value))
+    if converter is None:
+        for base, base_converter in converters.items():
+            if isinstance(value, base):
+                return base_converter
+    return converter
+
+class RowSerializer:
+    """
+    Convierte las filas de un resultado en valores serializables en JSON, planificando la conversión una única vez
+    por columna (en lugar de comprobar el tipo de cada celda):
+    - Si el driver informa del tipo Python de la columna (cursor.description) y SQLAlchemy no transforma sus valores
+      (p.ej. en las consultas text()), se usa ese tipo.
+    - Si no, se decide con el primer valor no nulo de la columna (p.ej. el tipo Uuid devuelve uuid.UUID aunque
+      el driver informe de str).
+    Después, sólo se recorren las columnas que necesitan conversión.
+    """
+
+    def __init__(self, columns: list[str], types: list[type | None] = None, converters: dict[type, Callable] = JSON_CONVERTERS):
+        """
+        :param columns: Nombres de las columnas.
+        :param types: Tipo Python de cada columna, si se conoce (None si no).
+        :param converters: Conversiones por tipo de valor.
+        """
+        self.columns = list(columns)
+        self.converters = converters
+        self.__active__ = []
+        self.__pending__ = []
+        for i, column_type in enumerate(types or [ None ] * len(self.columns)):
+            if column_type is None:
+                self.__pending__.append(i)
+                continue
+            converter = RowSerializer.__converter_for_type__(column_type, converters)
+            if converter is not None:
+                self.__active__.append((i, converter))
+
+    @classmethod
+    def from_result(cls, result: any, converters: dict[type, Callable] = JSON_CONVERTERS) -> "RowSerializer":
+        """
+        Crea el conversor de un resultado de SQLAlchemy, con los tipos de las columnas que informa el driver
+        (sólo los de las columnas cuyos valores no transforma SQLAlchemy con un procesador de resultados).
+        :param result: Resultado de la consulta (CursorResult).
+        :param converters: Conversiones por tipo de valor.
+        """
+        description = result.cursor.description if getattr(result, "cursor", None) is not None else None
+        types = [ entry[1] if isinstance(entry[1], type) else None for entry in description ] if description else None
+        columns = list(result.keys())
+        # Procesadores de resultados de cada columna (si no se conocen, no se puede confiar en ningún tipo del driver)
+        processors = getattr(getattr(result, "_metadata", None), "_processors", None)
+        if types is not None and (len(types) != len(columns) or processors is None or len(processors) != len(types)):
+            types = None
+        if types is not None:
+            types = [ column_type if processor is None else None for column_type, processor in zip(types, processors) ]
+        return cls(columns, types, converters)
+
+    def convert(self, rows: list) -> list[list]:
+        """
+        Convierte un lote de filas.
+        :param rows: Filas (tuplas o Row de SQLAlchemy).
+        :return: Filas convertidas (listas de valores).
+        """
+        converted = []
+        for row in rows:
+            values = list(row)
+            if self.__pending__:
+                self.__resolve__(values)
+            for i, converter in self.__active__:
+                value = values[i]
+                if value is not None:
+                    values[i] = converter(value)
+            converted.append(values)
+        return converted
+
+    def serialize(self, rows: list) -> list[dict]:
+        """
+        Convierte un lote de filas en diccionarios serializables en JSON.
+        :param rows: Filas (tuplas o Row de SQLAlchemy).
+        :return: Filas convertidas (diccionarios columna -> valor).
+        """
+        columns = self.columns
+        return [ dict(zip(columns, values)) for values in self.convert(rows) ]
+
+    def __resolve__(self, values: list):
+        # Decide la conversión de las columnas pendientes con su primer valor no nulo
+        for i in list(self.__pending__):
+            value = values[i]
+            if value is None:
+                continue
+            self.__pending__.remove(i)
+            converter = json_converter(value, self.converters)
+            if converter is not None:
+                self.__active__.append((i, converter))
+
+    @staticmethod
+    def __converter_for_type__(column_type: type, converters: dict[type, Callable]) -> Callable | None:
+        converter = converters.get(column_type)
+        if converter is None:
+            for base, base_converter in converters.items():
+                if issubclass(column_type, base):
+                    return base_converter
+        return converter
@@ -0,0 +1,25 @@
+import os
+import uuid
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+@contextmanager
+def atomic_open(file: str, mode: str = "w", **kwargs) -> Iterator[IO]:
+    """
+    Abre un fichero para escritura de forma atómica: se escribe en un fichero temporal del mismo directorio que sólo
+    sustituye al fichero final cuando se ha escrito completo, de modo que nunca queda un fichero a medias ni se mezcla
+    la escritura de varios hilos o procesos (gana la última que termina).
+    :param file: Ruta del fichero.
+    :param mode: Modo de apertura ("w" o "wb").
+    :param kwargs: Resto de argumentos de open (p.ej. encoding).
+    :return: Fichero temporal abierto para escritura.
+    """
+    tmp_file = f"{file}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_file, mode.replace("w", "x"), **kwargs) as f:
+            yield f
+        os.replace(tmp_file, file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
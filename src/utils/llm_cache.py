@@ -0,0 +1,133 @@
+import os
+import json
+import hashlib
+import threading
+from pydantic import BaseModel
+
+from dbutils.dbini import DBTOOLS_DIR
+from utils.files import atomic_open
+
+LLM_CACHE_DIR = os.path.join(DBTOOLS_DIR, "cache", "llm")
+# Tamaño máximo por defecto de la caché (en bytes)
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    Caché en disco de las respuestas del modelo, direccionada por contenido: la clave es un hash (SHA-256) de todo lo que
+    determina la respuesta (modelo, temperatura, instrucciones, mensajes de entrada con los resultados de las funciones,
+    definición de las funciones y formato de la respuesta). Si nada ha cambiado, la respuesta se recupera sin llamar a la API.
+    Cuando la caché supera su tamaño máximo, se eliminan las respuestas usadas hace más tiempo.
+    """
+
+    def __init__(self, cache_dir: str = LLM_CACHE_DIR, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        :param cache_dir: Directorio de la caché.
+        :param max_size: Tamaño máximo de la caché (en bytes).
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__size__ = None
+        self.__lock__ = threading.Lock()
+
+    @staticmethod
+    def key(**request) -> str:
+        """
+        Calcula la clave de una petición a la API.
+        :param request: Argumentos de la petición (model, temperature, input, tools, text_format...).
+        :return: Hash SHA-256 de la petición.
+        """
+        data = json.dumps(request, default=ResponseCache.__default__, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, response_type: type[BaseModel]) -> BaseModel | None:
+        """
+        Recupera una respuesta de la caché.
+        :param key: Clave de la petición.
+        :param response_type: Tipo de la respuesta (p.ej. Response o ParsedResponse[Table]).
+        :return: Respuesta, o None si no está en la caché (o no se puede leer).
+        """
+        file = self.__cache_file__(key)
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                response = response_type.model_validate_json(f.read())
+            # Se actualiza la fecha de modificación, que indica cuándo se usó por última vez
+            os.utime(file)
+        except (OSError, ValueError):
+            with self.__lock__:
+                self.misses += 1
+            return None
+        with self.__lock__:
+            self.hits += 1
+        return response
+
+    def put(self, key: str, response: BaseModel):
+        """
+        Guarda una respuesta en la caché, eliminando las más antiguas si se supera el tamaño máximo.
+        :param key: Clave de la petición.
+        :param response: Respuesta del modelo.
+        """
+        file = self.__cache_file__(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        data = response.model_dump_json()
+        with atomic_open(file, "w", encoding="utf-8") as f:
+            f.write(data)
+        with self.__lock__:
+            if self.__size__ is None:
+                self.__size__ = sum(size for _, size, _ in self.__entries__())
+            else:
+                self.__size__ += len(data.encode("utf-8"))
+            if self.__size__ > self.max_size:
+                self.__evict__()
+
+    def clear(self):
+        """
+        Elimina todas las respuestas de la caché.
+        """
+        with self.__lock__:
+            for file, _, _ in self.__entries__():
+                os.remove(file)
+            self.__size__ = 0
+
+    def __evict__(self):
+        # Elimina las respuestas usadas hace más tiempo hasta quedar por debajo del 90% del tamaño máximo
+        entries = sorted(self.__entries__(), key=lambda entry: entry[2])
+        size = sum(size for _, size, _ in entries)
+        for file, file_size, _ in entries:
+            if size <= self.max_size * 0.9:
+                break
+            try:
+                os.remove(file)
+                size -= file_size
+            except OSError:
+                pass
+        self.__size__ = size
+
+    def __entries__(self) -> list[tuple[str, int, float]]:
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue    # Eliminada mientras tanto (p.ej. por otro hilo)
+                entries.append((os.path.join(directory, name), stat.st_size, stat.st_mtime))
+        return entries
+
+    def __cache_file__(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    @staticmethod
+    def __default__(value: any) -> any:
+        # Mensajes del modelo (p.ej. llamadas a funciones) y formatos de respuesta (modelos de pydantic)
+        if isinstance(value, BaseModel):
+            return value.model_dump(mode="json")
+        if isinstance(value, type) and issubclass(value, BaseModel):
+            return value.model_json_schema()
+        return str(value)
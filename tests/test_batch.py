@@ -0,0 +1,46 @@
+from dbquery.batch import split_statements
+
+
+def test_split_on_semicolons_and_go():
+    sql = "SELECT 1;\nSELECT 2\nGO\nSELECT 3;;\n"
+    assert split_statements(sql) == [ "SELECT 1", "SELECT 2", "SELECT 3" ]
+
+
+def test_quoted_semicolons_do_not_split():
+    sql = """SELECT 'a;b', 'it''s;' FROM "t;1" JOIN [t;2] ON 1 = 1; SELECT `c;d` FROM t"""
+    assert split_statements(sql) == [
+        """SELECT 'a;b', 'it''s;' FROM "t;1" JOIN [t;2] ON 1 = 1""",
+        "SELECT `c;d` FROM t",
+    ]
+
+
+def test_comments_do_not_split():
+    sql = "SELECT 1 -- fin; no\n, 2 /* otro; */ FROM t;\n-- sólo un comentario;\n/* y otro */;"
+    assert split_statements(sql) == [ "SELECT 1 -- fin; no\n, 2 /* otro; */ FROM t" ]
+
+
+def test_mysql_hash_comments_and_backslash_escapes():
+    sql = "SELECT 'a\\';b' # comentario; no\nFROM t;\n# sólo un comentario;\nSELECT 2"
+    assert split_statements(sql, "mysql") == [ "SELECT 'a\\';b' # comentario; no\nFROM t", "# sólo un comentario;\nSELECT 2" ]
+
+
+def test_hash_is_not_a_comment_in_other_dialects():
+    # Tablas temporales de SQL Server
+    assert split_statements("SELECT * FROM #temporal; SELECT 2", "mssql") == [ "SELECT * FROM #temporal", "SELECT 2" ]
+
+
+def test_postgresql_dollar_quoted_bodies():
+    sql = """
+CREATE FUNCTION f() RETURNS integer AS $$
+BEGIN
+    RETURN 1;
+END;
+$$ LANGUAGE plpgsql;
+DO $body$ BEGIN PERFORM 1; END $body$;
+SELECT price$1 FROM t
+"""
+    assert split_statements(sql, "postgresql") == [
+        "CREATE FUNCTION f() RETURNS integer AS $$\nBEGIN\n    RETURN 1;\nEND;\n$$ LANGUAGE plpgsql",
+        "DO $body$ BEGIN PERFORM 1; END $body$",
+        "SELECT price$1 FROM t",
+    ]
@@ -0,0 +1,117 @@
+import io
+import json
+
+import pytest
+
+from dbschema.binary import (
+    BinarySchemaWriter, read_binary, is_binary, save_table, load_table,
+    HEADER, MAGIC, VERSION, KIND_SCHEMA, KIND_TABLE, FORMAT_BINARY, FORMAT_JSON,
+)
+from dbschema.column import Column
+from dbschema.foreign_key import ForeignKey
+from dbschema.reference import Reference
+from dbschema.schema import Schema
+from dbschema.table import Table
+
+
+def make_table(name: str, comment: str | None = None, schema_name: str | None = None, fk_table: str | None = None) -> Table:
+    columns = [
+        Column(name="ID", type="INTEGER", nullable=False, comment=None, default=None),
+        Column(name="NOMBRE", type="VARCHAR(50)", nullable=True, comment="Nombre (con tildes: áéíóú ñ)", default=None),
+        Column(name="ACTIVO", type="BOOLEAN", nullable=False, comment=None, default="1"),
+    ]
+    foreign_keys = []
+    if fk_table is not None:
+        columns.append(Column(name="REF_ID", type="INTEGER", nullable=True, comment="", default=None))
+        foreign_keys.append(ForeignKey(column="REF_ID", reference=Reference(table=fk_table, column="ID")))
+    return Table(name=name, comment=comment, columns=columns, primary_keys=["ID"], foreign_keys=foreign_keys, schemaName=schema_name)
+
+
+@pytest.fixture
+def schema() -> Schema:
+    # Los nombres de columnas y tipos se repiten entre tablas (se guardan una sola vez), con comentarios nulos y vacíos
+    return Schema(tables=[
+        make_table("CLIENTES", comment="Clientes de la empresa", schema_name="ventas"),
+        make_table("PEDIDOS", comment=None, fk_table="CLIENTES"),
+        make_table("LINEAS", comment="", fk_table="PEDIDOS"),
+        Table(name="VACIA", comment=None, columns=[], primary_keys=[], foreign_keys=[], schemaName=None),
+    ])
+
+
+def test_schema_round_trip(schema, tmp_path):
+    file = tmp_path / "schema.bin"
+    schema.save(str(file), format=FORMAT_BINARY)
+    assert is_binary(str(file))
+    loaded = Schema.load(str(file))
+    assert loaded.model_dump() == schema.model_dump()
+
+
+def test_schema_binary_matches_json(schema, tmp_path):
+    json_file = tmp_path / "schema.json"
+    binary_file = tmp_path / "schema.bin"
+    schema.save(str(json_file), format=FORMAT_JSON)
+    schema.save(str(binary_file), format=FORMAT_BINARY)
+    assert not is_binary(str(json_file))
+    with open(json_file, "r", encoding="utf-8") as f:
+        assert Schema.load(str(binary_file)).model_dump() == json.load(f)
+
+
+def test_interned_strings_are_stored_once(schema):
+    output = io.BytesIO()
+    with BinarySchemaWriter(output) as writer:
+        for table in schema.tables:
+            writer.write(table)
+    strings_count = HEADER.unpack_from(output.getvalue(), 0)[5]
+    distinct = set()
+    for table in schema.tables:
+        distinct.update((table.name, table.comment, table.schemaName))
+        for column in table.columns:
+            distinct.update((column.name, column.type, column.comment, column.default))
+        for fk in table.foreign_keys:
+            distinct.update((fk.column, fk.reference.table, fk.reference.column))
+    distinct.discard(None)
+    assert strings_count == len(distinct)
+
+
+def test_table_round_trip(tmp_path):
+    table = make_table("PEDIDOS", comment="Pedidos", schema_name="ventas", fk_table="CLIENTES")
+    binary_file = tmp_path / "PEDIDOS.bin"
+    json_file = tmp_path / "PEDIDOS.json"
+    save_table(table, str(binary_file), FORMAT_BINARY)
+    save_table(table, str(json_file), FORMAT_JSON)
+    loaded = load_table(str(binary_file))
+    assert loaded.model_dump() == table.model_dump()
+    assert loaded.model_dump() == load_table(str(json_file)).model_dump()
+    assert loaded.get_foreign_keys("REF_ID")[0].reference.table == "CLIENTES"
+
+
+def test_header(schema):
+    database = { "type": "mssql", "name": "PincelPreDB", "server": None, "port": 1433 }
+    output = io.BytesIO()
+    with BinarySchemaWriter(output, database) as writer:
+        for table in schema.tables:
+            writer.write(table)
+    magic, version, kind, table_count = HEADER.unpack_from(output.getvalue(), 0)[:4]
+    assert (magic, version, kind, table_count) == (MAGIC, VERSION, KIND_SCHEMA, len(schema.tables))
+
+    output.seek(0)
+    kind, loaded_database, tables = read_binary(output)
+    assert kind == KIND_SCHEMA
+    assert loaded_database == database
+    assert [ table.model_dump() for table in tables ] == [ table.model_dump() for table in schema.tables ]
+
+
+def test_table_file_is_not_a_schema(tmp_path):
+    file = tmp_path / "tabla.bin"
+    save_table(make_table("CLIENTES"), str(file), FORMAT_BINARY)
+    with open(file, "rb") as f:
+        assert read_binary(f)[0] == KIND_TABLE
+    with pytest.raises(ValueError):
+        Schema.load(str(file))
+
+
+def test_invalid_header():
+    with pytest.raises(ValueError):
+        read_binary(io.BytesIO(HEADER.pack(b"XXXX", VERSION, KIND_SCHEMA, 0, 0, 0, 0, 0)))
+    with pytest.raises(ValueError):
+        read_binary(io.BytesIO(HEADER.pack(MAGIC, VERSION + 1, KIND_SCHEMA, 0, 0, 0, 0, 0)))
@@ -0,0 +1,98 @@
+from dbschema.column import Column
+from dbschema.compact_schema import CompactSchema
+from dbschema.foreign_key import ForeignKey
+from dbschema.reference import Reference
+from dbschema.schema import Schema
+from dbschema.table import Table
+
+
+def column(name: str) -> Column:
+    return Column(name=name, type="INTEGER", nullable=True, comment=None, default=None)
+
+
+def foreign_key(column_name: str, table_name: str) -> ForeignKey:
+    return ForeignKey(column=column_name, reference=Reference(table=table_name, column="ID"))
+
+
+def table(name: str, *column_names: str, foreign_keys: list[ForeignKey] = None) -> Table:
+    return Table(
+        name=name, comment=None, columns=[ column(column_name) for column_name in column_names ],
+        primary_keys=[], foreign_keys=foreign_keys or [], schemaName=None
+    )
+
+
+def test_table_lookups_ignore_case():
+    pedidos = table("PEDIDOS", "ID", "Cliente_Id", foreign_keys=[ foreign_key("CLIENTE_ID", "CLIENTES") ])
+    assert pedidos.has_column("cliente_id")
+    assert pedidos.get_column("id") is pedidos.columns[0]
+    assert not pedidos.has_column("fecha")
+    assert [ str(fk) for fk in pedidos.get_foreign_keys("cliente_ID") ] == [ "CLIENTE_ID -> CLIENTES.ID" ]
+    assert pedidos.get_foreign_keys("id") == []
+
+
+def test_table_lookups_after_add_and_remove():
+    pedidos = table("PEDIDOS", "ID", "CLIENTE_ID", foreign_keys=[ foreign_key("CLIENTE_ID", "CLIENTES") ])
+    assert not pedidos.has_column("fecha")
+    pedidos.add_column(column("FECHA"))
+    assert pedidos.has_column("fecha")
+    pedidos.add_foreign_key(foreign_key("FECHA", "CALENDARIO"))
+    assert [ fk.reference.table for fk in pedidos.get_foreign_keys("fecha") ] == [ "CALENDARIO" ]
+    removed = pedidos.remove_column("cliente_id")
+    assert removed.name == "CLIENTE_ID"
+    assert not pedidos.has_column("CLIENTE_ID")
+    assert pedidos.get_foreign_keys("CLIENTE_ID") == []
+    assert pedidos.remove_column("cliente_id") is None
+
+
+def test_table_lookups_after_reassigning_lists():
+    pedidos = table("PEDIDOS", "ID", "CLIENTE_ID", foreign_keys=[ foreign_key("CLIENTE_ID", "CLIENTES") ])
+    assert pedidos.has_column("cliente_id")
+    pedidos.columns = [ column("ID"), column("IMPORTE") ]
+    pedidos.foreign_keys = []
+    assert not pedidos.has_column("cliente_id")
+    assert pedidos.has_column("importe")
+    assert pedidos.get_foreign_keys("cliente_id") == []
+
+
+def test_table_lookups_after_in_place_changes_and_invalidate():
+    pedidos = table("PEDIDOS", "ID")
+    assert pedidos.has_column("id")
+    pedidos.columns[0].name = "CODIGO"
+    pedidos.invalidate_index()
+    assert pedidos.has_column("codigo")
+    assert not pedidos.has_column("id")
+
+
+def test_schema_lookups():
+    schema = Schema(tables=[ table("Clientes", "ID"), table("PEDIDOS", "ID") ])
+    assert schema.get_table("CLIENTES") is schema.tables[0]
+    assert schema.has_table("pedidos")
+    assert not schema.has_table("lineas")
+
+    schema.add_table(table("Lineas", "ID"))
+    assert schema.has_table("LINEAS")
+    assert schema.remove_table("clientes").name == "Clientes"
+    assert not schema.has_table("Clientes")
+    assert schema.remove_table("clientes") is None
+
+    schema.tables = [ table("FACTURAS", "ID") ]
+    assert schema.has_table("facturas")
+    assert not schema.has_table("pedidos")
+
+    schema.tables[0].name = "ALBARANES"
+    schema.invalidate_index()
+    assert schema.has_table("albaranes")
+    assert not schema.has_table("facturas")
+
+
+def test_compact_schema_lookups():
+    schema = CompactSchema.from_schema(Schema(tables=[
+        table("CLIENTES", "ID"),
+        table("Pedidos", "ID", "CLIENTE_ID", foreign_keys=[ foreign_key("CLIENTE_ID", "CLIENTES") ]),
+    ]))
+    pedidos = schema.get_table("PEDIDOS")
+    assert pedidos.name == "Pedidos"
+    assert pedidos.has_column("cliente_id")
+    assert [ str(fk) for fk in pedidos.get_foreign_keys("Cliente_Id") ] == [ "CLIENTE_ID -> CLIENTES.ID" ]
+    schema.tables = [ pedidos ]
+    assert schema.get_table("clientes") is None
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from dbschema.query_stats import QueryStats, fingerprint
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint("SELECT *  FROM t WHERE id = 5 AND name = 'x' -- comentario") == "select * from t where id = ? and name = ?"
+
+
+def test_executions_are_measured(engine):
+    stats = QueryStats()
+    stats.attach(engine)
+    with engine.connect() as connection:
+        for value in (1, 2):
+            connection.execute(text(f"SELECT {value}")).all()
+    stats.detach()
+    queries = stats.to_dict()["queries"]
+    assert [ (query["sql"], query["executions"]) for query in queries ] == [ ("select ?", 2) ]
+
+
+def test_failed_executions_do_not_leave_start_times(engine):
+    stats = QueryStats()
+    stats.attach(engine)
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM no_existe"))
+        assert connection.info["query_stats_start"] == {}
+        connection.execute(text("SELECT 1")).all()
+        assert connection.info["query_stats_start"] == {}
+    stats.detach()
+    assert [ query["sql"] for query in stats.to_dict()["queries"] ] == [ "select ?" ]
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, MetaData
+from sqlalchemy.dialects import mssql, mysql
+from sqlalchemy.types import NullType
+
+from dbschema.reflector import BulkReflector
+from dbschema.schema import Schema
+from dbschema.table import Table
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # SQLite no tiene consultas al catálogo: se refleja con el inspector de SQLAlchemy (y no admite comentarios)
+    engine = create_engine(f"sqlite:///{tmp_path / 'reflector.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE clientes (id INTEGER PRIMARY KEY, nombre VARCHAR(50) NOT NULL, saldo NUMERIC(10, 2))")
+        connection.exec_driver_sql("CREATE TABLE pedidos (id INTEGER PRIMARY KEY, cliente_id INTEGER REFERENCES clientes(id), fecha DATE, importe FLOAT)")
+        connection.exec_driver_sql("""
+            CREATE TABLE lineas (
+                pedido_id INTEGER NOT NULL, numero INTEGER NOT NULL, descripcion TEXT, datos BLOB,
+                PRIMARY KEY (pedido_id, numero), FOREIGN KEY (pedido_id) REFERENCES pedidos(id)
+            )
+        """)
+        connection.exec_driver_sql("CREATE TABLE vacia (codigo CHAR(3))")
+    yield engine
+    engine.dispose()
+
+
+def test_inspector_reflection_matches_metadata(engine):
+    names = [ "pedidos", "clientes", "vacia", "lineas" ]
+    metadata = MetaData()
+    metadata.reflect(bind=engine, only=names)
+    expected = sorted(Schema.from_metadata(metadata).tables, key=lambda table: table.name)
+    with engine.connect() as connection:
+        tables = BulkReflector(connection).reflect(names)
+    assert [ table.model_dump() for table in tables ] == [ table.model_dump() for table in expected ]
+
+
+def test_inspector_reflection_only_selected_tables(engine):
+    with engine.connect() as connection:
+        tables = BulkReflector(connection).reflect([ "lineas" ])
+    assert [ table.name for table in tables ] == [ "lineas" ]
+    assert tables[0].primary_keys == [ "pedido_id", "numero" ]
+    assert [ str(fk) for fk in tables[0].foreign_keys ] == [ "pedido_id -> pedidos.id" ]
+
+
+def catalog_row(data_type: str, char_length: int = None, numeric_precision: int = None, numeric_scale: int = None) -> dict:
+    return { "data_type": data_type, "char_length": char_length, "numeric_precision": numeric_precision, "numeric_scale": numeric_scale }
+
+
+@pytest.fixture(params=[ mssql.dialect(), mysql.dialect() ], ids=[ "mssql", "mysql" ])
+def reflector(request) -> BulkReflector:
+    # Sólo se usa el dialecto, para construir los tipos a partir de las filas del catálogo
+    return BulkReflector(SimpleNamespace(dialect=request.param))
+
+
+def test_build_type_max_length_string(reflector):
+    # VARCHAR(MAX) (mssql) se informa con longitud -1
+    coltype = reflector.__build_type__(catalog_row("varchar", char_length=-1))
+    assert type(coltype).__name__ == "VARCHAR"
+    assert coltype.length is None
+
+
+def test_build_type_string_length(reflector):
+    coltype = reflector.__build_type__(catalog_row("NVARCHAR", char_length=50))
+    assert type(coltype).__name__ == "NVARCHAR"
+    assert coltype.length == 50
+
+
+def test_build_type_numeric(reflector):
+    coltype = reflector.__build_type__(catalog_row("numeric", numeric_precision=10, numeric_scale=2))
+    assert type(coltype).__name__ == "NUMERIC"
+    assert (coltype.precision, coltype.scale) == (10, 2)
+    coltype = reflector.__build_type__(catalog_row("decimal", numeric_precision=18, numeric_scale=0))
+    assert type(coltype).__name__ == "DECIMAL"
+    assert (coltype.precision, coltype.scale) == (18, 0)
+
+
+def test_build_type_float_without_scale(reflector):
+    # Los tipos de coma flotante sólo tienen precisión
+    coltype = reflector.__build_type__(catalog_row("float", numeric_precision=53, numeric_scale=None))
+    assert type(coltype).__name__ == "FLOAT"
+    assert coltype.precision == 53
+
+
+def test_build_type_unknown(reflector):
+    assert isinstance(reflector.__build_type__(catalog_row("tipo_desconocido")), NullType)
+
+
+def test_tables_are_ordered_case_insensitively(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orden.db'}")
+    with engine.begin() as connection:
+        for name in ("b", "A", "a_c", "C"):
+            connection.exec_driver_sql(f"CREATE TABLE {name} (id INTEGER)")
+    with engine.connect() as connection:
+        tables = BulkReflector(connection).reflect([ "b", "A", "a_c", "C" ])
+    engine.dispose()
+    assert [ table.name for table in tables ] == [ "A", "a_c", "b", "C" ]
+
+
+def test_catalog_tables_are_reordered():
+    # Las tablas del catálogo llegan en el orden de la intercalación de la base de datos
+    tables = [ Table(name=name, comment=None, columns=[], primary_keys=[], foreign_keys=[], schemaName=None) for name in ("a_c", "A", "C", "b") ]
+    ordered = BulkReflector.__in_order__(iter(tables), [ "A", "a_c", "b", "C", "falta" ])
+    assert [ table.name for table in ordered ] == [ "A", "a_c", "b", "C" ]
@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+from dbschema.column import Column
+from dbschema.foreign_key import ForeignKey
+from dbschema.lazy_schema import LazySchema
+from dbschema.reference import Reference
+from dbschema.schema import Schema
+from dbschema.schema_writer import SchemaWriter
+from dbschema.table import Table
+
+DATABASE = { "name": "pruebas", "type": "sqlite", "row_counts": { "ALUMNOS": 10 } }
+
+
+@pytest.fixture
+def schema() -> Schema:
+    return Schema(tables=[
+        Table(
+            name="ALUMNOS", comment="Alumnos matriculados", primary_keys=[ "ID" ], foreign_keys=[], schemaName=None,
+            columns=[
+                Column(name="ID", type="INTEGER", nullable=False, comment=None, default=None),
+                Column(name="NOMBRE", type="VARCHAR(50)", nullable=True, comment="Nombre y apellidos (año, categoría \"ñ\")", default="'—'"),
+            ],
+        ),
+        Table(
+            name="MATRÍCULAS", comment=None, primary_keys=[], schemaName="dbo",
+            columns=[ Column(name="ALUMNO_ID", type="INTEGER", nullable=False, comment="Alumno ✓", default=None) ],
+            foreign_keys=[ ForeignKey(column="ALUMNO_ID", reference=Reference(table="ALUMNOS", column="ID")) ],
+        ),
+        Table(name="VACIA", comment=None, columns=[], primary_keys=[], foreign_keys=[], schemaName=None),
+    ])
+
+
+def write(schema: Schema, **options) -> tuple[str, list]:
+    output = io.StringIO(newline="")
+    with SchemaWriter(output, DATABASE, **options) as writer:
+        for table in schema.tables:
+            writer.write(table)
+    return output.getvalue(), writer.index
+
+
+def test_same_document_as_json_dumps(schema):
+    document, _ = write(schema)
+    assert document == json.dumps({ "database": DATABASE, "schema": schema.model_dump() }, indent=4)
+    assert json.loads(document)["schema"] == json.loads(schema.to_json())
+
+
+def test_same_document_without_indent_and_ascii(schema):
+    document, _ = write(schema, indent=None, ensure_ascii=False)
+    assert document == json.dumps({ "database": DATABASE, "schema": schema.model_dump() }, ensure_ascii=False)
+
+
+def test_empty_schema():
+    document, index = write(Schema(tables=[]))
+    assert document == json.dumps({ "database": DATABASE, "schema": { "tables": [] } }, indent=4)
+    assert index == []
+
+
+@pytest.mark.parametrize("options", [ {}, { "indent": None, "ensure_ascii": False } ], ids=[ "indent", "compact" ])
+def test_index_offsets_are_bytes(schema, options):
+    document, index = write(schema, **options)
+    data = document.encode("utf-8")
+    assert [ name for name, _, _ in index ] == [ table.name for table in schema.tables ]
+    for (_, start, end), table in zip(index, schema.tables):
+        assert json.loads(data[start:end]) == table.model_dump()
+    assert index == LazySchema.build_index(data)
+
+
+def test_readable_by_schema_and_lazy_schema(schema, tmp_path):
+    file = str(tmp_path / "schema.json")
+    with open(file, "w", encoding="utf-8", newline="") as f:
+        with SchemaWriter(f, DATABASE, ensure_ascii=False) as writer:
+            for table in schema.tables:
+                writer.write(table)
+    LazySchema.save_index(file, writer.index)
+
+    assert Schema.from_json(file) == schema
+    assert LazySchema.load_index(file) == writer.index
+    with LazySchema(file) as lazy:
+        assert lazy.names() == [ table.name for table in schema.tables ]
+        assert lazy.get_table("matrículas") == schema.tables[1]
+        assert list(lazy) == schema.tables
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+from dbschema.search_index import SearchIndex, INDEX_EXTENSION
+
+
+def schema_tables() -> list[dict]:
+    return [
+        {
+            "name": "CLIENTES", "comment": "Clientes de la empresa", "primary_keys": [ "ID" ], "foreign_keys": [], "schemaName": None,
+            "columns": [
+                { "name": "ID", "type": "INTEGER", "nullable": False, "comment": None, "default": None },
+                { "name": "FECHA_ALTA", "type": "DATE", "nullable": True, "comment": "Fecha de alta del cliente", "default": None },
+                { "name": "nombreCompleto", "type": "VARCHAR(100)", "nullable": True, "comment": "Nombre y apellidos", "default": None },
+            ],
+        },
+        {
+            "name": "MATRICULAS", "comment": "Matrículas de los alumnos", "primary_keys": [ "ID" ], "foreign_keys": [], "schemaName": None,
+            "columns": [
+                { "name": "ID", "type": "INTEGER", "nullable": False, "comment": None, "default": None },
+                { "name": "FECHA_MATRICULA", "type": "DATE", "nullable": True, "comment": "Fecha de la matrícula", "default": None },
+            ],
+        },
+    ]
+
+
+@pytest.fixture
+def schema_file(tmp_path) -> str:
+    file = str(tmp_path / "schema.json")
+    with open(file, "w", encoding="utf-8") as f:
+        json.dump({ "schema": { "tables": schema_tables() } }, f, indent=4)
+    return file
+
+
+def test_search_ranks_name_matches_first(schema_file):
+    with SearchIndex.for_schema(schema_file) as index:
+        results = index.search("fecha")
+    assert [ (result["table"], result["column"]) for result in results ] == [
+        ("CLIENTES", "FECHA_ALTA"), ("MATRICULAS", "FECHA_MATRICULA")
+    ]
+
+
+def test_search_all_terms_and_prefixes(schema_file):
+    with SearchIndex.for_schema(schema_file) as index:
+        assert [ result["column"] for result in index.search("fecha matrícula") ] == [ "FECHA_MATRICULA" ]
+        assert [ result["column"] for result in index.search("nombre") ] == [ "nombreCompleto" ]
+        assert index.search("fecha inexistente") == []
+        assert len(index.search("fec", limit=1)) == 1
+
+
+def test_saved_index_gives_same_results(schema_file):
+    with SearchIndex.for_schema(schema_file) as built:
+        expected = { query: built.search(query) for query in ("fecha", "cli", "matricula alumnos", "id") }
+    assert os.path.exists(schema_file + INDEX_EXTENSION)
+    with SearchIndex.load(schema_file) as loaded:
+        assert { query: loaded.search(query) for query in expected } == expected
+
+
+def test_index_is_rebuilt_when_schema_changes(schema_file):
+    SearchIndex.for_schema(schema_file).close()
+    with open(schema_file, "w", encoding="utf-8") as f:
+        json.dump({ "schema": { "tables": schema_tables()[:1] } }, f, indent=4)
+    assert SearchIndex.load(schema_file) is None
+    with SearchIndex.for_schema(schema_file) as index:
+        assert index.search("matricula") == []